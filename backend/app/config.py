@@ -1,6 +1,16 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+
+def _token_map(value: str) -> Dict[str, int]:
+    """Parse "task=tokens,task=tokens"."""
+    limits = {}
+    for item in value.split(","):
+        task, _, tokens = item.partition("=")
+        if task.strip() and tokens.strip().isdigit():
+            limits[task.strip()] = int(tokens.strip())
+    return limits
 
 
 class Settings(BaseSettings):
@@ -20,10 +30,150 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit: str = "10/minute"
     
+    # History search ("postgres" uses the Supabase tsvector index, "sqlite" a local FTS5 index;
+    # HISTORY_BACKEND=sqlite always searches with the local index)
+    search_backend: str = "postgres"
+    search_index_path: str = "data/search_index.db"
+    
+    # History storage: "supabase", or "sqlite" for a local database (no Supabase needed).
+    # LOCAL_USER_ID lets requests without a token act as one local user when Supabase
+    # auth is not configured (single-user self-hosting).
+    history_backend: str = "supabase"
+    history_db_path: str = "data/history.db"
+    history_db_readers: int = 4
+    history_db_batch_size: int = 64
+    local_user_id: str = ""
+    
+    # History export (/api/content/history/export): rows read per keyset page
+    history_export_page_size: int = 200
+    
+    # Dashboard usage aggregates: daily buckets kept
+    usage_daily_days: int = 90
+    
+    # History body storage (content-addressed, compressed blobs). Opt-in: Supabase
+    # deployments need the content_blobs migration from the README first
+    blob_storage_enabled: bool = False
+    blob_compression_level: int = 10
+    
+    # Response compression (gzip/brotli, negotiated via Accept-Encoding)
+    compression_min_size: int = 1024
+    compression_offload_size: int = 262144
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    
+    # Profiling: requests sending "X-Profile: <profile_token>" are profiled into profile_dir;
+    # the same token, sent as X-Admin-Token, opens the stats endpoints
+    profile_token: Optional[str] = None
+    profile_dir: str = "data/profiles"
+    
+    # Tracing ("jsonl", "console", "none" or "module:Class" of a SpanExporter)
+    trace_sample_rate: float = 0.0
+    trace_exporter: str = "jsonl"
+    trace_file: str = "data/traces.jsonl"
+    
+    # Start-up: import SDKs and open upstream clients in the background at boot
+    warmup_on_startup: bool = False
+    
+    # Cross-worker shared state (SQLite WAL file shared by all uvicorn workers);
+    # expired entries are purged on this interval by every worker
+    shared_state_path: str = "data/shared_state.db"
+    shared_state_purge_interval_seconds: int = 300
+    
+    # Inline editor sessions
+    editor_session_ttl_seconds: int = 3600
+    editor_max_sessions: int = 1000
+    editor_cache_min_chars: int = 16000
+    editor_cache_rebuild_edits: int = 20
+    
+    # Editor WebSocket channel (/api/content/ws)
+    editor_channel_max_inflight: int = 8
+    editor_channel_auth_timeout_seconds: float = 10.0
+    
+    # Uploaded PDF/HTML/DOCX/Markdown sources are reduced to clean text locally
+    extraction_enabled: bool = True
+    extraction_workers: int = 2
+    extraction_timeout_seconds: float = 30.0
+    extraction_cache_size: int = 64
+    
+    # LLM providers: "gemini", "local" (OpenAI-compatible server) or "module:Class".
+    # LLM_ROUTES sends individual tasks elsewhere, e.g. "seo_meta=local,hooks=local".
+    llm_default_provider: str = "gemini"
+    llm_routes: str = ""
+    local_llm_url: str = "http://localhost:8080/v1"
+    local_llm_model: str = "local"
+    local_llm_concurrency: int = 2
+    local_llm_timeout_seconds: float = 30.0
+    
+    # Prompt budgets (tokens): default input budget for the variable part of a prompt,
+    # plus per-task overrides of the defaults in services/budget.py, e.g. "psychology=4000"
+    prompt_token_budget: int = 4000
+    prompt_token_budgets: str = ""
+    output_token_limits: str = ""
+    
+    # Per-source summaries (outline + key points) for requests with useSummary
+    summary_min_tokens: int = 2000
+    summary_ttl_seconds: int = 604800
+    summary_max_entries: int = 500
+    
+    # Narrative engine (/api/tools/narrative): beats per curve, beats given model-written insights
+    narrative_max_beats: int = 48
+    narrative_insight_beats: int = 3
+    
+    # Model call scheduler: concurrent Gemini calls per worker. With adaptive
+    # concurrency the limit moves between min and max (AIMD on latency and 429s).
+    adaptive_concurrency: bool = True
+    model_initial_inflight: int = 4
+    model_min_inflight: int = 1
+    model_max_inflight: int = 16
+    model_latency_spike_factor: float = 3.0
+    model_max_queue_wait_seconds: float = 20.0
+    
+    # Upstream quota back-off (doubles per 429 strike, capped)
+    quota_backoff_seconds: int = 30
+    quota_backoff_max_seconds: int = 600
+    
+    # Speculative prefetch of follow-up analyses after /generate (opt-in)
+    prefetch_enabled: bool = False
+    prefetch_ttl_seconds: int = 300
+    prefetch_concurrency: int = 2
+    prefetch_stats_flush_seconds: int = 10
+    
+    # Idempotency-Key on /generate and /generate-batch: how long responses are replayed,
+    # how long a claim may run before duplicates give up on it, and their poll interval
+    idempotency_ttl_seconds: int = 86400
+    idempotency_pending_seconds: int = 300
+    idempotency_poll_seconds: float = 0.25
+    idempotency_max_entries: int = 5000
+    
+    # Variants (variants=N): candidates at least this similar (word-shingle Jaccard) to a
+    # better-ranked one are dropped as near-duplicates
+    variant_similarity_threshold: float = 0.7
+    
+    # Sectioned long-form documents (BLOG/NEWSLETTER) kept for partial regeneration
+    sectioned_document_ttl_seconds: int = 86400
+    sectioned_document_max_entries: int = 2000
+    
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
     
+    @property
+    def llm_routes_map(self) -> Dict[str, str]:
+        routes = {}
+        for route in self.llm_routes.split(","):
+            task, _, provider = route.partition("=")
+            if task.strip() and provider.strip():
+                routes[task.strip()] = provider.strip()
+        return routes
+    
+    @property
+    def prompt_token_budgets_map(self) -> Dict[str, int]:
+        return _token_map(self.prompt_token_budgets)
+    
+    @property
+    def output_token_limits_map(self) -> Dict[str, int]:
+        return _token_map(self.output_token_limits)
+    
     @property
     def supabase_enabled(self) -> bool:
         """Check if Supabase is configured."""
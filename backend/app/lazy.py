@@ -0,0 +1,41 @@
+"""
+Lazy module imports - defer heavy SDK imports until first attribute access.
+
+`google.genai` and `supabase` together take a large share of process start-up.
+Binding them through `lazy_import` keeps module-level names (`types.Part`, ...)
+working while the real import happens on the first request that needs them.
+"""
+import importlib
+import threading
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Module proxy that imports the target on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_name = name
+        self._lazy_module = None
+        self._lazy_lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, attr: str):
+        if attr.startswith("_lazy_"):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    @property
+    def loaded(self) -> bool:
+        return self._lazy_module is not None
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for `name` without importing it yet."""
+    return LazyModule(name)
@@ -1,6 +1,7 @@
 """
 ContANT AI Backend - FastAPI Application
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,21 +11,60 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from .config import get_settings
+from .responses import DefaultJSONResponse, CompressionMiddleware
+from .timing import ServerTimingMiddleware
+from .tracing import TracingMiddleware, configure_tracing
 from .routers import content_router, tools_router, seo_router
+from .services import warm_up_client, warm_up_supabase
+from .services.extraction import shutdown_extraction_pool
+from .services.history_store import close_history_store
+from .services.prefetch import flush_prefetch_stats
+from .services.shared_state import get_shared_store
 
 
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
 
+def _warm_up() -> None:
+    """Import the SDKs and open upstream clients before the first real request."""
+    try:
+        warm_up_supabase()
+        warm_up_client()
+        print("🐜 Upstream clients warmed up")
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+
+
+async def _purge_shared_state(interval: int) -> None:
+    """Drop expired shared-store entries (sessions, documents, caches) periodically."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            purged = await asyncio.to_thread(get_shared_store().purge_expired)
+            if purged:
+                print(f"Shared state: purged {purged} expired entries")
+        except Exception as e:
+            print(f"Shared state purge failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
     print("🐜 ContANT AI Backend starting up...")
+    get_shared_store().purge_expired()
+    purger = asyncio.create_task(_purge_shared_state(get_settings().shared_state_purge_interval_seconds))
+    if get_settings().warmup_on_startup:
+        # Runs in the background so /health answers while the SDKs load
+        asyncio.get_running_loop().run_in_executor(None, _warm_up)
     yield
     # Shutdown
     print("🐜 ContANT AI Backend shutting down...")
+    purger.cancel()
+    flush_prefetch_stats()
+    shutdown_extraction_pool()
+    close_history_store()
 
 
 # Create FastAPI application
@@ -33,6 +73,7 @@ app = FastAPI(
     description="The Content Repurposing Colony - API Backend",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -49,6 +90,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "X-Profile-File", "Idempotent-Replayed"],
+)
+
+# Sampled request tracing (route spans; services add child spans)
+configure_tracing(settings.trace_sample_rate, settings.trace_exporter, settings.trace_file)
+app.add_middleware(TracingMiddleware)
+
+# Per-phase Server-Timing header and opt-in per-request profiling
+app.add_middleware(
+    ServerTimingMiddleware,
+    profile_token=settings.profile_token,
+    profile_dir=settings.profile_dir,
+)
+
+# Compress large responses (history, batches, base64 images)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    offload_size=settings.compression_offload_size,
+    gzip_level=settings.gzip_level,
+    brotli_quality=settings.brotli_quality,
 )
 
 
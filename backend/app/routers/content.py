@@ -1,57 +1,170 @@
 """
 Content Generation Router - API endpoints for content creation and modification.
 """
+import hashlib
+from datetime import date, datetime
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
 
 from ..schemas import (
     ContentRequest,
     ContentFormat,
     ModifyContentRequest,
+    EditorSessionCreate,
+    EditorSessionResponse,
+    SessionEditRequest,
+    SessionEditResponse,
+    RegenerateSectionsRequest,
+    RegenerateSectionsResponse,
     AnalyzePsychologyRequest,
     GenerateStrategyRequest,
     GenerateImageRequest,
+    SourceSummaryRequest,
+    SourceSummary,
     PsychologyAnalysis,
     ContentStrategy,
     ContentHistoryResponse,
+    HistorySearchResponse,
+    UsageStats,
     UserResponse,
 )
 from ..services import (
     generate_platform_content,
+    generate_platform_variants,
     modify_content,
     analyze_content_psychology,
     generate_content_strategy,
     generate_marketing_image,
     get_current_user,
+    require_operator,
     require_auth,
     save_content_history,
+    save_content_psychology,
     get_content_history,
+    get_content_history_item,
     delete_content_history,
+    search_content_history,
+    thread_segments,
+    source_report,
+    extract_source,
+    get_source_summary,
+    compact_source,
+    get_history_version,
+    get_usage_stats,
+    export_ndjson,
+    export_markdown_zip,
+    decode_cursor,
+    create_editor_session,
+    get_editor_session,
+    close_editor_session,
+    apply_session_edit,
+    serve_editor_channel,
+    SECTIONED_FORMATS,
+    create_sectioned_document,
+    regenerate_sections,
+    schedule_prefetch,
+    get_prefetched,
+    get_prefetch_stats,
+    run_idempotent,
+    request_fingerprint,
+    Lane,
+    model_lane,
+    get_model_scheduler,
 )
 
 router = APIRouter(prefix="/api/content", tags=["Content"])
 
 
+def _section_list(document) -> list:
+    return [
+        {"index": i, "heading": section.heading, "fingerprint": section.fingerprint}
+        for i, section in enumerate(document.sections)
+    ]
+
+
+async def _generation_result(
+    request: ContentRequest,
+    format: ContentFormat,
+    content: str,
+    user: Optional[UserResponse],
+) -> dict:
+    """Generated content, plus the parsed tweets (with weighted lengths) for threads,
+    a regenerable section list for long-form formats and the token savings of an
+    extracted source file."""
+    result = {"format": format.value, "content": content}
+    extraction = source_report(request.source_file)
+    if extraction:
+        result["sourceExtraction"] = extraction
+    if format == ContentFormat.TWITTER:
+        result["thread"] = [
+            {"text": tweet.text, "length": tweet.length, "limit": tweet.limit}
+            for tweet in thread_segments(content)
+        ]
+    elif format in SECTIONED_FORMATS:
+        document = await create_sectioned_document(request, format, content, user.id if user else None)
+        result["documentId"] = document.id
+        result["sections"] = _section_list(document)
+    return result
+
+
+async def _idempotent(
+    scope: str,
+    idempotency_key: Optional[str],
+    user: Optional[UserResponse],
+    response: Response,
+    run,
+    *fingerprint,
+):
+    """Run a generation once per Idempotency-Key; duplicates get the stored response."""
+    result, replayed = await run_idempotent(
+        scope, idempotency_key, user.id if user else None, request_fingerprint(scope, *fingerprint), run
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
 @router.post("/generate")
 async def generate_content(
     request: ContentRequest,
     format: ContentFormat,
-    user: Optional[UserResponse] = Depends(get_current_user)
+    response: Response,
+    user: Optional[UserResponse] = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """Generate content for a specific platform format."""
-    try:
-        content = await generate_platform_content(request, format)
+    async def run():
+        variants = None
+        if request.variants > 1:
+            # One model call for all candidates; the best-ranked one is the result
+            variants = await generate_platform_variants(request, format)
+            content = variants[0][0]
+        else:
+            content = await generate_platform_content(request, format)
+        schedule_prefetch(request, format, content)
         
         # Save to history if user is authenticated
+        saved = None
         if user:
-            await save_content_history(
+            saved = await save_content_history(
                 user_id=user.id,
                 format=format.value,
                 content=content,
                 original_title=request.source_file.name if request.source_file else request.source_text[:50]
             )
         
-        return {"content": content, "format": format.value}
+        result = await _generation_result(request, format, content, user)
+        if saved:
+            result["historyId"] = saved["id"]
+        if variants:
+            result["variants"] = [{"content": text, "score": score} for text, score in variants]
+        return result
+
+    try:
+        return await _idempotent("generate", idempotency_key, user, response, run, format, request)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -59,25 +172,76 @@ async def generate_content(
 @router.post("/generate-batch")
 async def generate_content_batch(
     request: ContentRequest,
-    user: Optional[UserResponse] = Depends(get_current_user)
+    response: Response,
+    user: Optional[UserResponse] = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """Generate content for multiple formats at once."""
-    try:
-        results = []
+    async def run():
+        generated = []
         for format in request.selected_formats:
-            content = await generate_platform_content(request, format)
-            results.append({"format": format.value, "content": content})
-            
-            # Save to history if user is authenticated
+            with model_lane(Lane.BULK):
+                content = await generate_platform_content(request, format)
+            generated.append((format, content))
+        
+        # Saved only once every format succeeded: a failed batch releases its
+        # Idempotency-Key, and the retry must not re-save the formats that worked
+        results = []
+        for format, content in generated:
+            schedule_prefetch(request, format, content)
+            result = await _generation_result(request, format, content, user)
             if user:
-                await save_content_history(
+                saved = await save_content_history(
                     user_id=user.id,
                     format=format.value,
                     content=content,
                     original_title=request.source_file.name if request.source_file else request.source_text[:50]
                 )
+                result["historyId"] = saved["id"]
+            results.append(result)
         
         return {"results": results}
+
+    try:
+        return await _idempotent("generate-batch", idempotency_key, user, response, run, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/regenerate", response_model=RegenerateSectionsResponse)
+async def regenerate_document_sections(
+    request: RegenerateSectionsRequest,
+    user: Optional[UserResponse] = Depends(get_current_user)
+):
+    """Re-run only the marked (or input-affected) sections of a BLOG/NEWSLETTER result."""
+    try:
+        document, regenerated = await regenerate_sections(
+            request.document_id,
+            request.request,
+            request.sections,
+            request.section_instructions,
+            user.id if user else None
+        )
+        
+        if user and regenerated:
+            await save_content_history(
+                user_id=user.id,
+                format=document.format.value,
+                content=document.content,
+                original_title=request.request.source_file.name if request.request.source_file else request.request.source_text[:50]
+            )
+        
+        return RegenerateSectionsResponse(
+            documentId=document.id,
+            format=document.format,
+            content=document.content,
+            sections=_section_list(document),
+            regenerated=regenerated
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -86,56 +250,325 @@ async def generate_content_batch(
 async def modify_content_endpoint(request: ModifyContentRequest):
     """Modify selected content based on instruction."""
     try:
-        result = await modify_content(
-            request.full_context,
-            request.selected_text,
-            request.instruction
-        )
+        with model_lane(Lane.INTERACTIVE):
+            result = await modify_content(
+                request.full_context,
+                request.selected_text,
+                request.instruction
+            )
         return {"content": result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============== EDITOR SESSION ENDPOINTS ==============
+
+@router.post("/sessions", response_model=EditorSessionResponse)
+async def create_session(
+    request: EditorSessionCreate,
+    user: Optional[UserResponse] = Depends(get_current_user)
+):
+    """Store a document server-side for selection edits."""
+    try:
+        session = await create_editor_session(request.content, user.id if user else None)
+        return EditorSessionResponse(sessionId=session.id, version=session.version)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/sessions/{session_id}", response_model=EditorSessionResponse)
+async def get_session(
+    session_id: str,
+    user: Optional[UserResponse] = Depends(get_current_user)
+):
+    """Get the current document and version of an editor session."""
+    session = await get_editor_session(session_id, user.id if user else None)
+    return EditorSessionResponse(
+        sessionId=session.id,
+        version=session.version,
+        content=session.document
+    )
+
+
+@router.post("/sessions/{session_id}/modify", response_model=SessionEditResponse)
+async def modify_in_session(
+    session_id: str,
+    request: SessionEditRequest,
+    user: Optional[UserResponse] = Depends(get_current_user)
+):
+    """Rewrite a selection range of a session document and patch it server-side."""
+    try:
+        with model_lane(Lane.INTERACTIVE):
+            return await apply_session_edit(
+                session_id,
+                request.start,
+                request.end,
+                request.instruction,
+                request.base_version,
+                user.id if user else None
+            )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.delete("/sessions/{session_id}")
+async def delete_session(
+    session_id: str,
+    user: Optional[UserResponse] = Depends(get_current_user)
+):
+    """End an editor session."""
+    await close_editor_session(session_id, user.id if user else None)
+    return {"success": True}
+
+
+@router.websocket("/ws")
+async def editor_channel(websocket: WebSocket):
+    """Multiplexed editor channel: one auth, then id-tagged requests, streamed chunks and cancellation."""
+    await serve_editor_channel(websocket)
+
+
 @router.post("/psychology", response_model=PsychologyAnalysis)
-async def analyze_psychology(request: AnalyzePsychologyRequest):
-    """Analyze content for psychological impact."""
+async def analyze_psychology(
+    request: AnalyzePsychologyRequest,
+    user: Optional[UserResponse] = Depends(get_current_user)
+):
+    """Analyze content for psychological impact, saving the scores on a history item."""
     try:
-        result = await analyze_content_psychology(request.content)
+        result = await get_prefetched("psychology", request.content)
+        if result is None:
+            result = await analyze_content_psychology(request.content)
+        if user and request.history_id:
+            scores = PsychologyAnalysis.model_validate(result).model_dump(by_alias=True)
+            if not await save_content_psychology(user.id, request.history_id, scores):
+                raise HTTPException(status_code=404, detail="Content not found")
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/prefetch/stats", dependencies=[Depends(require_operator)])
+async def prefetch_stats():
+    """Speculative prefetch counters and follow-up hit ratio."""
+    return await get_prefetch_stats()
+
+
+@router.get("/scheduler/stats", dependencies=[Depends(require_operator)])
+async def scheduler_stats():
+    """Model call queue depth, in-flight calls and wait times for this worker."""
+    return get_model_scheduler().stats()
+
+
 @router.post("/strategy", response_model=ContentStrategy)
 async def generate_strategy(request: GenerateStrategyRequest):
     """Generate content strategy for a topic."""
     try:
-        result = await generate_content_strategy(request.topic)
+        topic = await compact_source(request.topic) if request.use_summary else request.topic
+        result = await generate_content_strategy(topic)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/summary", response_model=SourceSummary)
+async def summarize_source(request: SourceSummaryRequest):
+    """Outline and key points of a source, built once per source and cached."""
+    try:
+        text = request.source_text
+        if request.source_file:
+            extracted = await extract_source(request.source_file)
+            if extracted is None:
+                raise HTTPException(status_code=422, detail="Only text, PDF, HTML, DOCX and Markdown sources can be summarized")
+            text = extracted.text
+        if not text.strip():
+            raise HTTPException(status_code=422, detail="The source is empty")
+        return await get_source_summary(text)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/image")
 async def generate_image(request: GenerateImageRequest):
     """Generate a marketing image."""
     try:
-        image_url = await generate_marketing_image(request.prompt)
+        with model_lane(Lane.BULK):
+            image_url = await generate_marketing_image(request.prompt)
         return {"imageUrl": image_url}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ============== CONTENT HISTORY ENDPOINTS ==============
 
+async def _history_etag(user_id: str, *variant) -> str:
+    """Weak ETag from the user's history version plus the request variant."""
+    version = await get_history_version(user_id)
+    digest = hashlib.sha1(repr(variant).encode()).hexdigest()[:12]
+    return f'W/"h{version:x}-{digest}"'
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client's If-None-Match already covers etag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
 @router.get("/history", response_model=List[ContentHistoryResponse])
-async def get_history(user: UserResponse = Depends(require_auth)):
-    """Get user's content generation history."""
+async def get_history(
+    request: Request,
+    response: Response,
+    include_content: bool = False,
+    user: UserResponse = Depends(require_auth)
+):
+    """Get user's content generation history (previews; full bodies via /history/{id})."""
+    etag = await _history_etag(user.id, "list", include_content)
+    cached = _not_modified(request, etag)
+    if cached:
+        return cached
     try:
-        history = await get_content_history(user.id)
+        history = await get_content_history(user.id, include_content=include_content)
+        _set_etag(response, etag)
         return history
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats", response_model=UsageStats)
+async def get_stats(
+    request: Request,
+    response: Response,
+    days: int = Query(default=7, ge=1, le=90),
+    user: UserResponse = Depends(require_auth)
+):
+    """Lifetime totals, per-format counts, average psychology scores and daily activity."""
+    # Daily buckets roll over at midnight even when the history does not change
+    etag = await _history_etag(user.id, "stats", days, date.today().isoformat())
+    cached = _not_modified(request, etag)
+    if cached:
+        return cached
+    try:
+        stats = await get_usage_stats(user.id, days)
+        _set_etag(response, etag)
+        return stats
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/history/export")
+async def export_history(
+    format: str = Query(default="ndjson", pattern="^(ndjson|markdown)$"),
+    cursor: Optional[str] = None,
+    user: UserResponse = Depends(require_auth)
+):
+    """Stream the user's whole history, newest first, as NDJSON or a zip of Markdown files.
+    
+    Pass the `cursor` of the last item received to resume after it.
+    """
+    if cursor:
+        decode_cursor(cursor)
+    stamp = date.today().isoformat()
+    if format == "markdown":
+        return StreamingResponse(
+            export_markdown_zip(user.id, cursor),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="contant-history-{stamp}.zip"'},
+        )
+    return StreamingResponse(
+        export_ndjson(user.id, cursor),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="contant-history-{stamp}.ndjson"'},
+    )
+
+
+@router.get("/history/search", response_model=HistorySearchResponse)
+async def search_history(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1),
+    format: Optional[List[ContentFormat]] = Query(default=None),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=20, ge=1, le=100),
+    user: UserResponse = Depends(require_auth)
+):
+    """Full-text search over the user's content history."""
+    etag = await _history_etag(user.id, "search", str(request.query_params))
+    cached = _not_modified(request, etag)
+    if cached:
+        return cached
+    try:
+        found = await search_content_history(
+            user.id,
+            q,
+            formats=[f.value for f in format] if format else None,
+            date_from=date_from,
+            date_to=date_to,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+        )
+        _set_etag(response, etag)
+        return HistorySearchResponse(
+            results=found["results"],
+            total=found["total"],
+            page=page,
+            page_size=page_size,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/history/{content_id}", response_model=ContentHistoryResponse)
+async def get_history_item(
+    content_id: str,
+    request: Request,
+    response: Response,
+    user: UserResponse = Depends(require_auth)
+):
+    """Get a single content history item with its full body."""
+    etag = await _history_etag(user.id, "item", content_id)
+    cached = _not_modified(request, etag)
+    if cached:
+        return cached
+    try:
+        item = await get_content_history_item(user.id, content_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Content not found")
+        _set_etag(response, etag)
+        return item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -25,6 +25,8 @@ from ..services import (
     analyze_competitor_gap,
     generate_backlink_strategy,
     generate_local_seo_audit,
+    get_prefetched,
+    compact_source,
 )
 
 router = APIRouter(prefix="/api/seo", tags=["SEO Tools"])
@@ -36,6 +38,8 @@ async def generate_keywords(request: SEOKeywordRequest):
     try:
         result = await generate_seo_keywords(request.topic, request.region)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -46,6 +50,8 @@ async def audit_content(request: SEOAuditRequest):
     try:
         result = await perform_seo_audit(request.content, request.target_keyword)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -54,8 +60,14 @@ async def audit_content(request: SEOAuditRequest):
 async def generate_meta(request: SEOMetaRequest):
     """Generate SEO meta tags."""
     try:
-        result = await generate_seo_meta_tags(request.content, request.keyword)
+        prefetched = await get_prefetched("seo_meta", request.content, request.keyword)
+        if prefetched is not None:
+            return prefetched
+        content = await compact_source(request.content) if request.use_summary else request.content
+        result = await generate_seo_meta_tags(content, request.keyword)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -66,6 +78,8 @@ async def analyze_gap(request: SEOGapRequest):
     try:
         result = await analyze_competitor_gap(request.my_content, request.competitor_content)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -76,6 +90,8 @@ async def generate_backlinks(request: BacklinkRequest):
     try:
         result = await generate_backlink_strategy(request.domain, request.niche)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -90,5 +106,7 @@ async def generate_local_seo(request: LocalSEORequest):
             request.type
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
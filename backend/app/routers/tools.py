@@ -24,6 +24,8 @@ from ..services import (
     generate_brand_lore,
     resurrect_idea,
     analyze_why_it_works,
+    get_prefetched,
+    compact_source,
 )
 
 router = APIRouter(prefix="/api/tools", tags=["Power Tools"])
@@ -33,12 +35,20 @@ router = APIRouter(prefix="/api/tools", tags=["Power Tools"])
 async def generate_hooks(request: HookRequest):
     """Generate contextual viral hooks."""
     try:
+        if request.variants is None:
+            prefetched = await get_prefetched("hooks", request.context, request.platform)
+            if prefetched is not None:
+                return prefetched
+        context = await compact_source(request.context) if request.use_summary else request.context
         result = await generate_contextual_hooks(
-            request.context,
+            context,
             request.platform,
-            request.frameworks
+            request.frameworks,
+            request.variants
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -56,6 +66,8 @@ async def generate_emotional(request: EmotionalContentRequest):
             request.audience
         )
         return {"content": result}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -66,6 +78,8 @@ async def analyze_narrative(request: NarrativeRequest):
     try:
         result = await analyze_narrative_physics(request.content)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -80,6 +94,8 @@ async def generate_lore(request: BrandLoreRequest):
             request.style
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -90,6 +106,8 @@ async def resurrect_content(request: ResurrectionRequest):
     try:
         result = await resurrect_idea(request.content, request.pivot_angle)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -100,5 +118,7 @@ async def analyze_content(request: AnalyzeWhyItWorksRequest):
     try:
         result = await analyze_why_it_works(request.content, request.audience_persona)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
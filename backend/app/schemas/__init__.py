@@ -6,9 +6,18 @@ from .content import (
     ContentRequest,
     GenerateContentRequest,
     ModifyContentRequest,
+    EditorSessionCreate,
+    EditorSessionResponse,
+    SessionEditRequest,
+    SessionEditResponse,
+    DocumentSection,
+    RegenerateSectionsRequest,
+    RegenerateSectionsResponse,
     AnalyzePsychologyRequest,
     GenerateStrategyRequest,
     GenerateImageRequest,
+    SourceSummaryRequest,
+    SourceSummary,
     PsychologyAnalysis,
     ContentStrategy,
     HookRequest,
@@ -37,6 +46,11 @@ from .content import (
     LocalSEO,
     ContentHistoryCreate,
     ContentHistoryResponse,
+    HistorySearchResult,
+    HistorySearchResponse,
+    FormatUsage,
+    DailyUsage,
+    UsageStats,
     UserResponse,
 )
 
@@ -48,9 +62,18 @@ __all__ = [
     "ContentRequest",
     "GenerateContentRequest",
     "ModifyContentRequest",
+    "EditorSessionCreate",
+    "EditorSessionResponse",
+    "SessionEditRequest",
+    "SessionEditResponse",
+    "DocumentSection",
+    "RegenerateSectionsRequest",
+    "RegenerateSectionsResponse",
     "AnalyzePsychologyRequest",
     "GenerateStrategyRequest",
     "GenerateImageRequest",
+    "SourceSummaryRequest",
+    "SourceSummary",
     "PsychologyAnalysis",
     "ContentStrategy",
     "HookRequest",
@@ -79,5 +102,10 @@ __all__ = [
     "LocalSEO",
     "ContentHistoryCreate",
     "ContentHistoryResponse",
+    "HistorySearchResult",
+    "HistorySearchResponse",
+    "FormatUsage",
+    "DailyUsage",
+    "UsageStats",
     "UserResponse",
 ]
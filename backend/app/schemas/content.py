@@ -47,6 +47,11 @@ class ContentRequest(BaseModel):
     custom_instructions: Optional[str] = Field(default=None, alias="customInstructions")
     seo_keywords: Optional[List[str]] = Field(default=None, alias="seoKeywords")
     tone_override: Optional[str] = Field(default=None, alias="toneOverride")
+    # Work from the cached outline and key points of a long source instead of its full text
+    use_summary: bool = Field(default=False, alias="useSummary")
+    # Alternatives sampled in one model call, deduplicated and ranked (/generate only;
+    # /generate-batch always samples one per format)
+    variants: int = Field(default=1, ge=1, le=4)
     
     class Config:
         populate_by_name = True
@@ -66,12 +71,97 @@ class ModifyContentRequest(BaseModel):
         populate_by_name = True
 
 
+class EditorSessionCreate(BaseModel):
+    content: str
+
+
+class EditorSessionResponse(BaseModel):
+    session_id: str = Field(alias="sessionId")
+    version: int
+    content: Optional[str] = None
+    
+    class Config:
+        populate_by_name = True
+
+
+class SessionEditRequest(BaseModel):
+    start: int
+    end: int
+    instruction: str
+    base_version: int = Field(alias="baseVersion")
+    
+    class Config:
+        populate_by_name = True
+
+
+class SessionEditResponse(BaseModel):
+    replacement: str
+    start: int
+    end: int
+    version: int
+
+
+class DocumentSection(BaseModel):
+    index: int
+    heading: str
+    fingerprint: str
+
+
+class RegenerateSectionsRequest(BaseModel):
+    document_id: str = Field(alias="documentId")
+    request: ContentRequest
+    sections: Optional[List[int]] = None
+    section_instructions: Optional[Dict[int, str]] = Field(default=None, alias="sectionInstructions")
+    
+    class Config:
+        populate_by_name = True
+
+
+class RegenerateSectionsResponse(BaseModel):
+    document_id: str = Field(alias="documentId")
+    format: ContentFormat
+    content: str
+    sections: List[DocumentSection]
+    regenerated: List[int]
+    
+    class Config:
+        populate_by_name = True
+
+
 class AnalyzePsychologyRequest(BaseModel):
     content: str
+    # History item the scores are saved against (signed-in users only)
+    history_id: Optional[str] = Field(default=None, alias="historyId")
+    
+    class Config:
+        populate_by_name = True
 
 
 class GenerateStrategyRequest(BaseModel):
     topic: str
+    use_summary: bool = Field(default=False, alias="useSummary")
+    
+    class Config:
+        populate_by_name = True
+
+
+class SourceSummaryRequest(BaseModel):
+    source_text: str = Field(default="", alias="sourceText")
+    source_file: Optional[SourceFile] = Field(default=None, alias="sourceFile")
+    
+    class Config:
+        populate_by_name = True
+
+
+class SourceSummary(BaseModel):
+    source_key: str = Field(alias="sourceKey")
+    outline: List[str]
+    key_points: List[str] = Field(alias="keyPoints")
+    source_tokens: int = Field(alias="sourceTokens")
+    tokens: int
+    
+    class Config:
+        populate_by_name = True
 
 
 class GenerateImageRequest(BaseModel):
@@ -108,6 +198,12 @@ class HookRequest(BaseModel):
     context: str
     platform: str
     frameworks: List[str] = []
+    use_summary: bool = Field(default=False, alias="useSummary")
+    # Number of hooks to return, deduplicated and ranked (5 when unset)
+    variants: Optional[int] = Field(default=None, ge=1, le=10)
+    
+    class Config:
+        populate_by_name = True
 
 
 class HookSuggestion(BaseModel):
@@ -245,6 +341,10 @@ class SEOAudit(BaseModel):
 class SEOMetaRequest(BaseModel):
     content: str
     keyword: str
+    use_summary: bool = Field(default=False, alias="useSummary")
+    
+    class Config:
+        populate_by_name = True
 
 
 class SEOMeta(BaseModel):
@@ -335,13 +435,53 @@ class ContentHistoryResponse(BaseModel):
     id: str
     user_id: str
     format: ContentFormat
-    content: str
+    content: Optional[str]
+    preview: Optional[str] = None
     original_title: Optional[str]
     psychology: Optional[Dict[str, Any]]
     image_url: Optional[str]
     created_at: str
 
 
+class HistorySearchResult(BaseModel):
+    id: str
+    format: ContentFormat
+    original_title: Optional[str]
+    snippet: str
+    rank: float
+    created_at: str
+
+
+class HistorySearchResponse(BaseModel):
+    results: List[HistorySearchResult]
+    total: int
+    page: int
+    page_size: int
+
+
+class FormatUsage(BaseModel):
+    format: ContentFormat
+    count: int
+    words: int
+
+
+class DailyUsage(BaseModel):
+    date: str
+    count: int
+    words: int
+
+
+class UsageStats(BaseModel):
+    total_generations: int = Field(alias="totalGenerations")
+    total_words: int = Field(alias="totalWords")
+    formats: List[FormatUsage]
+    average_psychology: Optional[Dict[str, float]] = Field(default=None, alias="averagePsychology")
+    daily: List[DailyUsage]
+    
+    class Config:
+        populate_by_name = True
+
+
 # ============== AUTH ==============
 
 class UserResponse(BaseModel):
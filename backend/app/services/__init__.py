@@ -1,5 +1,6 @@
 from .gemini import (
     generate_platform_content,
+    generate_platform_variants,
     modify_content,
     analyze_content_psychology,
     generate_content_strategy,
@@ -16,21 +17,64 @@ from .gemini import (
     analyze_competitor_gap,
     generate_backlink_strategy,
     generate_local_seo_audit,
+    warm_up_client,
 )
 
+from .llm import LLMProvider, get_provider
+
 from .auth import (
     get_supabase_client,
     get_supabase_admin_client,
     get_current_user,
     require_auth,
+    require_operator,
     save_content_history,
+    save_content_psychology,
     get_content_history,
+    get_content_history_item,
     delete_content_history,
+    warm_up_supabase,
+)
+
+from .search import search_content_history
+
+from .text_limits import thread_segments
+
+from .budget import count_tokens, trim_to_tokens
+
+from .extraction import extract_source, source_report
+
+from .summaries import get_source_summary, compact_source
+
+from .history_version import get_history_version, bump_history_version
+
+from .usage_stats import get_usage_stats
+
+from .editor import (
+    create_editor_session,
+    get_editor_session,
+    close_editor_session,
+    apply_session_edit,
+)
+
+from .editor_channel import serve_editor_channel
+
+from .scheduler import Lane, model_lane, get_model_scheduler
+
+from .prefetch import schedule_prefetch, get_prefetched, get_prefetch_stats
+from .idempotency import run_idempotent, request_fingerprint
+from .export import export_ndjson, export_markdown_zip, decode_cursor
+
+from .sections import (
+    SECTIONED_FORMATS,
+    create_sectioned_document,
+    regenerate_sections,
 )
 
 __all__ = [
     # Gemini
     "generate_platform_content",
+    "generate_platform_variants",
     "modify_content",
     "analyze_content_psychology",
     "generate_content_strategy",
@@ -47,12 +91,64 @@ __all__ = [
     "analyze_competitor_gap",
     "generate_backlink_strategy",
     "generate_local_seo_audit",
+    "warm_up_client",
+    # LLM providers
+    "LLMProvider",
+    "get_provider",
     # Auth
     "get_supabase_client",
     "get_supabase_admin_client",
     "get_current_user",
     "require_auth",
+    "require_operator",
     "save_content_history",
+    "save_content_psychology",
     "get_content_history",
+    "get_content_history_item",
     "delete_content_history",
+    "warm_up_supabase",
+    # Search
+    "search_content_history",
+    # Text limits
+    "thread_segments",
+    # Prompt budgets
+    "count_tokens",
+    "trim_to_tokens",
+    # Source extraction
+    "extract_source",
+    "source_report",
+    # Source summaries
+    "get_source_summary",
+    "compact_source",
+    # History version
+    "get_history_version",
+    "bump_history_version",
+    # Usage stats
+    "get_usage_stats",
+    # Editor sessions
+    "create_editor_session",
+    "get_editor_session",
+    "close_editor_session",
+    "apply_session_edit",
+    # Editor channel
+    "serve_editor_channel",
+    # Scheduler
+    "Lane",
+    "model_lane",
+    "get_model_scheduler",
+    # Prefetch
+    "schedule_prefetch",
+    "get_prefetched",
+    "get_prefetch_stats",
+    # Idempotency keys
+    "run_idempotent",
+    "request_fingerprint",
+    # History export
+    "export_ndjson",
+    "export_markdown_zip",
+    "decode_cursor",
+    # Sectioned documents
+    "SECTIONED_FORMATS",
+    "create_sectioned_document",
+    "regenerate_sections",
 ]
@@ -1,27 +1,62 @@
 """
 Supabase Auth Service - Handles user authentication and session management.
 """
-from typing import Optional
-from fastapi import HTTPException, Request, Depends
+import hmac
+import inspect
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Optional
+from fastapi import HTTPException, Header, Request, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
 
 from ..config import get_settings
+from ..lazy import lazy_import
+from ..timing import phase
+from ..tracing import span
 from ..schemas import UserResponse
+from .blobs import store_blob, make_preview, hydrate_history_rows, release_blobs
+from .history_store import get_history_store
+from .history_version import bump_history_version
+from .scheduler import set_model_tenant
+from .search import index_content_history, remove_from_search_index
+from .usage_stats import forget_usage, record_usage, rescore_usage
+
+if TYPE_CHECKING:
+    from supabase import Client
+else:
+    # Imported on first use to keep cold starts short
+    supabase_sdk = lazy_import("supabase")
 
 security = HTTPBearer(auto_error=False)
 
 
-def get_supabase_client() -> Client:
-    """Get Supabase client instance."""
+@lru_cache()
+def get_supabase_client() -> "Client":
+    """Get the shared Supabase client instance."""
     settings = get_settings()
-    return create_client(settings.supabase_url, settings.supabase_anon_key)
+    return supabase_sdk.create_client(settings.supabase_url, settings.supabase_anon_key)
 
 
-def get_supabase_admin_client() -> Client:
-    """Get Supabase admin client with service role key."""
+@lru_cache()
+def get_supabase_admin_client() -> "Client":
+    """Get the shared Supabase admin client with service role key."""
     settings = get_settings()
-    return create_client(settings.supabase_url, settings.supabase_service_key)
+    return supabase_sdk.create_client(settings.supabase_url, settings.supabase_service_key)
+
+
+def supabase_span(operation: str, table: Optional[str] = None):
+    """Tracing span for one Supabase operation."""
+    attributes = {"db.system": "supabase", "db.operation": operation}
+    if table:
+        attributes["db.sql.table"] = table
+    return span(f"supabase.{operation}" + (f" {table}" if table else ""), **attributes)
+
+
+def warm_up_supabase() -> None:
+    """Import the SDK and build both clients ahead of the first request."""
+    if get_settings().supabase_enabled:
+        get_supabase_client()
+        get_supabase_admin_client()
 
 
 async def get_current_user(
@@ -32,16 +67,31 @@ async def get_current_user(
     Returns None if no token is provided (for optional auth).
     """
     if not credentials:
+        return local_user()
+    return await authenticate_token(credentials.credentials)
+
+
+def local_user() -> Optional[UserResponse]:
+    """The single local user of a self-hosted setup without Supabase auth, if configured."""
+    settings = get_settings()
+    if not settings.local_user_id or settings.supabase_enabled:
         return None
-    
+    set_model_tenant(settings.local_user_id)
+    return UserResponse(id=settings.local_user_id, email="", created_at=None)
+
+
+async def authenticate_token(token: str) -> Optional[UserResponse]:
+    """Verify a Supabase JWT. Returns None if it is invalid."""
     try:
-        token = credentials.credentials
         supabase = get_supabase_client()
         
         # Verify the JWT token with Supabase
-        user_response = supabase.auth.get_user(token)
+        with phase("auth"), supabase_span("auth.get_user"):
+            user_response = supabase.auth.get_user(token)
         
         if user_response and user_response.user:
+            # Model calls of this request queue fairly under this user
+            set_model_tenant(user_response.user.id)
             return UserResponse(
                 id=user_response.user.id,
                 email=user_response.user.email or "",
@@ -60,16 +110,25 @@ async def require_auth(
     Require authentication - raises 401 if not authenticated.
     Use this as a dependency for protected routes.
     """
-    if not credentials:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    
     user = await get_current_user(credentials)
+    if not user and not credentials:
+        raise HTTPException(status_code=401, detail="Authentication required")
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
     return user
 
 
+async def require_operator(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Guard for operational endpoints (stats): X-Admin-Token must equal PROFILE_TOKEN.
+    They are closed entirely while no PROFILE_TOKEN is configured.
+    """
+    token = get_settings().profile_token
+    if not token or not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Operator token required")
+
+
 # ============== CONTENT HISTORY DATABASE OPERATIONS ==============
 
 async def save_content_history(
@@ -81,46 +140,112 @@ async def save_content_history(
     image_url: Optional[str] = None
 ) -> dict:
     """Save generated content to user's history."""
-    supabase = get_supabase_admin_client()
-    
-    data = {
-        "user_id": user_id,
-        "format": format,
-        "content": content,
-        "original_title": original_title,
-        "psychology": psychology,
-        "image_url": image_url
-    }
-    
-    result = supabase.table("content_history").insert(data).execute()
-    
-    if result.data:
-        return result.data[0]
-    raise HTTPException(status_code=500, detail="Failed to save content history")
+    with phase("history"):
+        settings = get_settings()
+        
+        data = {
+            "user_id": user_id,
+            "format": format,
+            "original_title": original_title,
+            "psychology": psychology,
+        }
+        
+        if settings.blob_storage_enabled:
+            # Bodies are deduplicated and compressed; the row only keeps references
+            data.update({
+                "content": None,
+                "content_hash": await store_blob(content),
+                "preview": make_preview(content),
+                "image_url": None,
+                "image_hash": await store_blob(image_url) if image_url else None,
+            })
+        else:
+            data.update({"content": content, "image_url": image_url})
+        
+        try:
+            saved = await get_history_store().insert_history(data)
+        except Exception as e:
+            if not settings.blob_storage_enabled:
+                raise
+            # A concurrent delete may have collected an identical blob between
+            # store_blob and the insert (the foreign key refuses the row); store it again
+            print(f"History insert failed, re-storing blobs and retrying: {e}")
+            await store_blob(content)
+            if image_url:
+                await store_blob(image_url)
+            saved = await get_history_store().insert_history(data)
+        
+        if saved:
+            row = {**saved, "content": content, "image_url": image_url}
+            # The row is committed: a failure below must not turn the save into an
+            # error (a retry would save it twice). The search backfill and the usage
+            # rebuild repair what is missed.
+            await _after_history_change("search indexing", index_content_history, row)
+            await _after_history_change("usage stats", record_usage, row)
+            # Bump last, so a client revalidating on the new version sees the updated stats
+            await _after_history_change("history version", bump_history_version, user_id)
+            return row
+        raise HTTPException(status_code=500, detail="Failed to save content history")
+
+
+async def _after_history_change(step: str, func: Callable, *args) -> None:
+    """Run a secondary step of a committed save or delete, logging its failure."""
+    try:
+        result = func(*args)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        print(f"History {step} failed after commit: {e}")
 
 
-async def get_content_history(user_id: str, limit: int = 50) -> list:
-    """Get user's content history."""
-    supabase = get_supabase_admin_client()
+async def get_content_history(user_id: str, limit: int = 50, include_content: bool = False) -> list:
+    """Get user's content history.
     
-    result = supabase.table("content_history") \
-        .select("*") \
-        .eq("user_id", user_id) \
-        .order("created_at", desc=True) \
-        .limit(limit) \
-        .execute()
+    By default only previews are returned and no blob is read; full bodies come
+    from get_content_history_item (or include_content=True).
+    """
+    rows = await get_history_store().list_history(user_id, limit)
+    if include_content:
+        return await hydrate_history_rows(rows)
     
-    return result.data or []
+    for row in rows:
+        row["preview"] = row.get("preview") or make_preview(row.get("content") or "")
+        row["content"] = None
+    return rows
+
+
+async def get_content_history_item(user_id: str, content_id: str) -> Optional[dict]:
+    """Get a single history item with its full body."""
+    row = await get_history_store().get_history(user_id, content_id)
+    if row is None:
+        return None
+    rows = await hydrate_history_rows([row])
+    return rows[0]
+
+
+async def save_content_psychology(user_id: str, content_id: str, psychology: dict) -> bool:
+    """Attach /psychology scores to a history item; False when it does not exist."""
+    row = await get_history_store().get_history(user_id, content_id)
+    if row is None:
+        return False
+    scored_at = time.time()
+    if await get_history_store().update_psychology(user_id, content_id, psychology):
+        await _after_history_change("usage stats", rescore_usage, row, psychology, scored_at)
+        await _after_history_change("history version", bump_history_version, user_id)
+        return True
+    return False
 
 
 async def delete_content_history(user_id: str, content_id: str) -> bool:
     """Delete a content history item."""
-    supabase = get_supabase_admin_client()
-    
-    result = supabase.table("content_history") \
-        .delete() \
-        .eq("id", content_id) \
-        .eq("user_id", user_id) \
-        .execute()
-    
-    return len(result.data) > 0 if result.data else False
+    # Read first: the usage counts need the deleted row's format, words and date
+    row = await get_content_history_item(user_id, content_id)
+    if row is None:
+        return False
+    if await get_history_store().delete_history(user_id, content_id):
+        await _after_history_change("search removal", remove_from_search_index, user_id, content_id)
+        await _after_history_change("usage stats", forget_usage, row)
+        await _after_history_change("history version", bump_history_version, user_id)
+        await _after_history_change("blob release", release_blobs, [row.get("content_hash"), row.get("image_hash")])
+        return True
+    return False
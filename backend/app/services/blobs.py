@@ -0,0 +1,110 @@
+"""
+Blob Storage Service - Content-addressed, compressed storage for history bodies.
+
+Generated content and image data URLs are stored once per SHA-256 hash in the
+`content_blobs` table of the history store, compressed with zstd (zlib when `zstandard` is not
+installed). History rows only hold the hash, and bodies are decompressed on demand:
+list views return previews and only single-item reads load the blob.
+
+Blobs are shared by identical generations, so deleting a row only deletes the
+blobs no other row still references (one conditional statement in the store).
+"""
+import base64
+import hashlib
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+from ..config import get_settings
+from .history_store import get_history_store
+
+PREVIEW_CHARS = 280
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest used as the blob key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_preview(text: str) -> str:
+    """Short plain prefix kept on the history row for list views."""
+    if len(text) <= PREVIEW_CHARS:
+        return text
+    return text[:PREVIEW_CHARS].rsplit(" ", 1)[0] + "…"
+
+
+def compress(text: str, level: Optional[int] = None) -> Tuple[str, str]:
+    """Compress text, returning (codec, base64 payload)."""
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        level = level if level is not None else get_settings().blob_compression_level
+        packed = zstandard.ZstdCompressor(level=level).compress(raw)
+        codec = "zstd"
+    else:
+        packed = zlib.compress(raw, 6)
+        codec = "zlib"
+    return codec, base64.b64encode(packed).decode("ascii")
+
+
+def decompress(codec: str, payload: str) -> str:
+    """Inverse of compress()."""
+    packed = base64.b64decode(payload)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd blobs")
+        raw = zstandard.ZstdDecompressor().decompress(packed)
+    elif codec == "zlib":
+        raw = zlib.decompress(packed)
+    else:
+        raise ValueError(f"Unknown blob codec: {codec}")
+    return raw.decode("utf-8")
+
+
+# ============== DATABASE OPERATIONS ==============
+
+async def store_blob(text: str) -> str:
+    """Store a body once and return its hash. Existing blobs are left untouched."""
+    digest = content_hash(text)
+    codec, payload = compress(text)
+    await get_history_store().put_blob(digest, codec, payload, len(text.encode("utf-8")))
+    return digest
+
+
+async def load_blobs(hashes: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Fetch and decompress the given blobs in a single query."""
+    wanted = sorted({h for h in hashes if h})
+    if not wanted:
+        return {}
+    rows = await get_history_store().get_blobs(wanted)
+    return {row["hash"]: decompress(row["codec"], row["data"]) for row in rows}
+
+
+async def release_blobs(hashes: Iterable[Optional[str]]) -> None:
+    """Delete the given blobs unless another history row still references them."""
+    wanted = sorted({h for h in hashes if h})
+    if wanted:
+        await get_history_store().delete_unreferenced_blobs(wanted)
+
+
+async def hydrate_history_rows(rows: list) -> list:
+    """Fill `content` / `image_url` on history rows that only carry blob references.
+
+    Rows written before blob storage existed already hold their bodies inline.
+    """
+    needed = []
+    for row in rows:
+        if row.get("content") is None:
+            needed.append(row.get("content_hash"))
+        if row.get("image_url") is None:
+            needed.append(row.get("image_hash"))
+    bodies = await load_blobs(needed)
+    for row in rows:
+        if row.get("content") is None:
+            row["content"] = bodies.get(row.get("content_hash"), "")
+        if row.get("image_url") is None and row.get("image_hash"):
+            row["image_url"] = bodies.get(row["image_hash"])
+    return rows
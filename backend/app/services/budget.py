@@ -0,0 +1,194 @@
+"""
+Prompt Budget - Token-aware prompt assembly and per-task output limits.
+
+Counts are estimated locally (no tokenizer download, no model round-trip): ASCII
+words cost one token per ~4 characters, numbers one per ~3 digits and every other
+symbol or non-Latin character one each. That stays close to SentencePiece/BPE counts
+for English prose and errs high on code and non-Latin scripts. Counts for large
+texts are cached, since the same document is usually analysed by several tools.
+
+Variable prompt inputs (the article, the competitor page, the source material)
+are fitted to a per-task input budget. When several inputs compete, each keeps
+at least its `share` of the budget and the lowest-priority input is trimmed
+first; trimming happens at paragraph, then sentence, then word boundaries.
+
+Budgets and output limits can be overridden with PROMPT_TOKEN_BUDGETS and
+OUTPUT_TOKEN_LIMITS, e.g. "psychology=4000,seo_audit=6000".
+"""
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from ..config import get_settings
+
+# Input tokens for the variable part of each task's prompt
+PROMPT_TOKEN_BUDGETS: Dict[str, int] = {
+    "generate": 200_000,
+    "style_reference": 120,
+    "modify": 30_000,
+    "psychology": 2_000,
+    "hooks": 1_500,
+    "narrative": 1_200,
+    "lore": 1_500,
+    "resurrect": 3_000,
+    "analyze": 4_000,
+    "seo_audit": 4_000,
+    "seo_meta": 600,
+    "seo_gap": 4_000,
+    "summarize": 6_000,
+}
+
+# Output tokens per task; JSON limits leave headroom so responses are never cut mid-object
+OUTPUT_TOKEN_LIMITS: Dict[str, int] = {
+    "generate": 8_192,
+    "shorten": 2_048,
+    "modify": 2_048,
+    "psychology": 1_024,
+    "strategy": 1_024,
+    "hooks": 1_024,
+    "emotional": 2_048,
+    "narrative": 1_024,
+    "lore": 2_048,
+    "resurrect": 3_072,
+    "analyze": 1_536,
+    "seo_keywords": 1_024,
+    "seo_audit": 1_536,
+    "seo_meta": 512,
+    "seo_gap": 1_024,
+    "backlinks": 2_048,
+    "local_seo": 1_024,
+    "summarize": 1_024,
+}
+
+TRIM_MARKER = " [...]"
+
+_PIECE = re.compile(r"[A-Za-z]+|\d+|\S")
+_PARAGRAPH = re.compile(r"(\n\s*\n)")
+_SENTENCE = re.compile(r"(?<=[.!?…])([\"')\]]*\s+)")
+_WORD = re.compile(r"(\s+)")
+
+# Texts shorter than this are cheaper to count than to look up
+_CACHE_MIN_CHARS = 256
+_CACHE_SIZE = 1024
+_counts: "OrderedDict[tuple, int]" = OrderedDict()
+
+
+def _count(text: str) -> int:
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        if len(piece) == 1:
+            tokens += 1
+        elif piece.isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += (len(piece) + 3) // 4
+    return tokens
+
+
+def count_tokens(text: str) -> int:
+    """Estimated model tokens in `text`."""
+    if len(text) < _CACHE_MIN_CHARS:
+        return _count(text)
+    key = (hash(text), len(text))
+    if key in _counts:
+        _counts.move_to_end(key)
+        return _counts[key]
+    tokens = _count(text)
+    _counts[key] = tokens
+    if len(_counts) > _CACHE_SIZE:
+        _counts.popitem(last=False)
+    return tokens
+
+
+def _take(pieces: List[str], max_tokens: int) -> str:
+    """The longest run of leading pieces (separators included) within max_tokens."""
+    kept = []
+    used = 0
+    for piece in pieces:
+        cost = count_tokens(piece)
+        if used + cost > max_tokens:
+            break
+        kept.append(piece)
+        used += cost
+    return "".join(kept)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to max_tokens at the last paragraph, sentence or word boundary that fits."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max(max_tokens - count_tokens(TRIM_MARKER), 0)
+    kept, rest = "", text
+    for splitter in (_PARAGRAPH, _SENTENCE):
+        head = _take(splitter.split(rest), budget - count_tokens(kept))
+        kept, rest = kept + head, rest[len(head):]
+    if not kept.strip():
+        # A single sentence longer than the budget
+        kept = _take(_WORD.split(rest), budget)
+    kept = kept.rstrip()
+    return kept + TRIM_MARKER if kept else ""
+
+
+def split_to_tokens(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most max_tokens at paragraph, then sentence boundaries."""
+    def units(piece: str, splitters: tuple):
+        if count_tokens(piece) <= max_tokens or not splitters:
+            yield piece
+            return
+        for sub in splitters[0].split(piece):
+            yield from units(sub, splitters[1:])
+
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for unit in units(text, (_PARAGRAPH, _SENTENCE, _WORD)):
+        cost = count_tokens(unit)
+        if current and used + cost > max_tokens:
+            chunks.append("".join(current).strip())
+            current, used = [], 0
+        current.append(unit)
+        used += cost
+    chunks.append("".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+@dataclass
+class PromptPart:
+    """One variable input of a prompt."""
+    text: str
+    # Minimum fraction of the budget kept when parts compete (normalised across parts)
+    share: float = 1.0
+    # Lower priorities are trimmed first
+    priority: int = 0
+
+
+def fit_parts(parts: List[PromptPart], budget: int) -> List[str]:
+    """Trim parts to fit `budget` tokens together; returns their texts in order."""
+    needs = [count_tokens(p.text) for p in parts]
+    overflow = sum(needs) - budget
+    if overflow <= 0:
+        return [p.text for p in parts]
+
+    total_share = sum(p.share for p in parts) or 1.0
+    allowed = list(needs)
+    # Walk from the lowest priority up, cutting each part down towards its floor
+    for i in sorted(range(len(parts)), key=lambda i: parts[i].priority):
+        floor = int(budget * parts[i].share / total_share)
+        cut = min(max(needs[i] - floor, 0), overflow)
+        allowed[i] -= cut
+        overflow -= cut
+        if overflow <= 0:
+            break
+    return [p.text if allowed[i] >= needs[i] else trim_to_tokens(p.text, allowed[i]) for i, p in enumerate(parts)]
+
+
+def input_budget(task: str) -> int:
+    """Input token budget for the variable part of a task's prompt."""
+    settings = get_settings()
+    return settings.prompt_token_budgets_map.get(task, PROMPT_TOKEN_BUDGETS.get(task, settings.prompt_token_budget))
+
+
+def output_limit(task: str) -> Optional[int]:
+    """max_output_tokens for a task, or None to leave it to the model."""
+    return get_settings().output_token_limits_map.get(task, OUTPUT_TOKEN_LIMITS.get(task))
@@ -0,0 +1,188 @@
+"""
+Editor Session Service - Server-side documents for the inline editor.
+
+The article is uploaded once per session. Each edit then sends only a selection
+range and an instruction; the model's replacement is applied as a patch and the
+session version is bumped so stale clients get a conflict instead of clobbering
+newer text. Large documents are also cached as model context so repeated edits
+don't resend the article upstream.
+"""
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+
+from ..config import get_settings
+from .gemini import (
+    create_editor_context_cache,
+    delete_editor_context_cache,
+    modify_selection,
+)
+from .shared_state import get_async_shared_store
+
+EDIT_SUMMARY_CHARS = 200
+_NAMESPACE = "editor_session"
+
+
+@dataclass
+class EditorSession:
+    id: str
+    user_id: Optional[str]
+    document: str
+    version: int = 0
+    context_cache: Optional[str] = None
+    edits_since_cache: List[str] = field(default_factory=list)
+
+    def to_state(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "document": self.document,
+            "context_cache": self.context_cache,
+            "edits_since_cache": self.edits_since_cache,
+        }
+
+
+# Sessions live in the shared store so every worker process sees the same document
+# and version; concurrent edits are resolved by compare-and-swap on the version.
+
+def _summarize_edit(old: str, new: str) -> str:
+    def clip(text: str) -> str:
+        return text if len(text) <= EDIT_SUMMARY_CHARS else text[:EDIT_SUMMARY_CHARS] + "…"
+    return f'"{clip(old)}" -> "{clip(new)}"'
+
+
+async def _drop(session_id: str) -> None:
+    store = get_async_shared_store()
+    entry = await store.get(_NAMESPACE, session_id)
+    await store.delete(_NAMESPACE, session_id)
+    if entry and entry.value.get("context_cache"):
+        await asyncio.to_thread(delete_editor_context_cache, entry.value["context_cache"])
+
+
+def _needs_context_cache(session: EditorSession) -> bool:
+    """Whether the cached model context should be (re)built: the document is large
+    enough and either has no cache yet or has drifted too far from it."""
+    settings = get_settings()
+    if len(session.document) < settings.editor_cache_min_chars:
+        return False
+    return not session.context_cache or len(session.edits_since_cache) >= settings.editor_cache_rebuild_edits
+
+
+async def _build_context_cache(document: str) -> Optional[str]:
+    return await asyncio.to_thread(
+        create_editor_context_cache, document, get_settings().editor_session_ttl_seconds
+    )
+
+
+async def _swap_context_cache(session: EditorSession) -> None:
+    """Rebuild the context cache of a saved session and CAS the new name in.
+
+    The old cache is only deleted once the new one is stored; if another edit
+    landed in between, the new cache is discarded and the session keeps the old one.
+    """
+    old_cache = session.context_cache
+    new_cache = await _build_context_cache(session.document)
+    state = dict(session.to_state(), context_cache=new_cache, edits_since_cache=[])
+    if await get_async_shared_store().replace(
+        _NAMESPACE, session.id, state, session.version, get_settings().editor_session_ttl_seconds
+    ):
+        session.context_cache, session.edits_since_cache = new_cache, []
+        session.version += 1
+        if old_cache:
+            await asyncio.to_thread(delete_editor_context_cache, old_cache)
+    elif new_cache:
+        await asyncio.to_thread(delete_editor_context_cache, new_cache)
+
+
+async def _get_owned(session_id: str, user_id: Optional[str]) -> EditorSession:
+    entry = await get_async_shared_store().get(_NAMESPACE, session_id)
+    if not entry or entry.value["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Editor session not found")
+    return EditorSession(id=session_id, version=entry.version, **entry.value)
+
+
+async def create_editor_session(document: str, user_id: Optional[str] = None) -> EditorSession:
+    """Store a document server-side and return its session."""
+    settings = get_settings()
+    store = get_async_shared_store()
+    overflow = await store.count(_NAMESPACE) - settings.editor_max_sessions + 1
+    if overflow > 0:
+        for session_id in await store.oldest_keys(_NAMESPACE, overflow):
+            await _drop(session_id)
+    session = EditorSession(id=uuid.uuid4().hex, user_id=user_id, document=document)
+    if _needs_context_cache(session):
+        session.context_cache = await _build_context_cache(document)
+    session.version = await store.set(
+        _NAMESPACE, session.id, session.to_state(), settings.editor_session_ttl_seconds
+    )
+    return session
+
+
+async def get_editor_session(session_id: str, user_id: Optional[str] = None) -> EditorSession:
+    """Get a live session owned by the caller."""
+    return await _get_owned(session_id, user_id)
+
+
+async def close_editor_session(session_id: str, user_id: Optional[str] = None) -> None:
+    """End a session and release its cached model context."""
+    await _get_owned(session_id, user_id)
+    await _drop(session_id)
+
+
+async def apply_session_edit(
+    session_id: str,
+    start: int,
+    end: int,
+    instruction: str,
+    base_version: int,
+    user_id: Optional[str] = None,
+    on_chunk: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> dict:
+    """Rewrite document[start:end] per the instruction and patch it in place.
+
+    Raises 409 when base_version is not the session's current version, including
+    when another edit lands while this one is waiting on the model. `on_chunk`
+    receives the replacement as it streams in.
+    """
+    session = await _get_owned(session_id, user_id)
+    if base_version != session.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Version conflict: session is at version {session.version}",
+        )
+    if not 0 <= start < end <= len(session.document):
+        raise HTTPException(status_code=422, detail="Selection is outside the document")
+
+    selected = session.document[start:end]
+    replacement = await modify_selection(
+        selected,
+        instruction,
+        context_cache=session.context_cache,
+        full_context=None if session.context_cache else session.document,
+        edits_since_cache=list(session.edits_since_cache),
+        on_chunk=on_chunk,
+    )
+
+    session.document = session.document[:start] + replacement + session.document[end:]
+    if session.context_cache:
+        session.edits_since_cache.append(_summarize_edit(selected, replacement))
+
+    saved = await get_async_shared_store().replace(
+        _NAMESPACE, session_id, session.to_state(), base_version,
+        get_settings().editor_session_ttl_seconds,
+    )
+    if not saved:
+        raise HTTPException(status_code=409, detail="Version conflict: session was modified concurrently")
+    session.version = base_version + 1
+    # Only a committed edit may touch the context cache (the swap bumps the version again)
+    if _needs_context_cache(session):
+        await _swap_context_cache(session)
+
+    return {
+        "replacement": replacement,
+        "start": start,
+        "end": start + len(replacement),
+        "version": session.version,
+    }
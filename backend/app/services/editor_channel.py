@@ -0,0 +1,250 @@
+"""
+Editor Channel Service - One WebSocket per editor, multiplexing its requests.
+
+The editor authenticates once when the socket opens instead of on every call,
+uploads its document once (an editor session) and then sends request frames
+tagged with an id. Responses come back on the same socket, in any order:
+
+    client  {"type": "auth", "token": "<supabase jwt>"}          (first frame)
+    server  {"type": "ready", "user": "<id>" | null}
+    client  {"type": "request", "id": "7", "op": "modify", "params": {...},
+             "key": "selection", "stream": true}
+    server  {"type": "chunk", "id": "7", "text": "..."}          (streamed ops)
+    server  {"type": "result", "id": "7", "data": {...}}
+    server  {"type": "error", "id": "7", "status": 409, "detail": "..."}
+    client  {"type": "cancel", "id": "7"}
+    server  {"type": "cancelled", "id": "7"}
+
+A request carrying a `key` supersedes any in-flight request with the same key,
+so an editor that keeps typing can reuse one key and only the latest call runs.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+
+from ..config import get_settings
+from ..schemas import (
+    AnalyzePsychologyRequest,
+    EditorSessionCreate,
+    ModifyContentRequest,
+    NarrativeRequest,
+    SEOAuditRequest,
+    SessionEditRequest,
+)
+from .auth import authenticate_token, local_user
+from .editor import apply_session_edit, close_editor_session, create_editor_session, get_editor_session
+from .gemini import analyze_content_psychology, analyze_narrative_physics, modify_selection, perform_seo_audit
+from .prefetch import get_prefetched
+from .scheduler import Lane, model_lane, set_model_tenant
+
+Send = Callable[[str], Awaitable[None]]
+
+
+class EditorChannel:
+    """State of one editor socket: the user, the document session and running requests."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.user_id: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.keys: Dict[str, str] = {}
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, frame: dict) -> None:
+        if self.closed:
+            return
+        async with self._send_lock:
+            await self.websocket.send_json(frame)
+
+    # ============== OPERATIONS ==============
+
+    async def _document(self, params: dict) -> dict:
+        """Fill `content` from the channel's document session when it is omitted."""
+        if "content" not in params and self.session_id:
+            params = {**params, "content": (await get_editor_session(self.session_id, self.user_id)).document}
+        return params
+
+    async def _op_document(self, params: dict, on_chunk: Optional[Send]) -> Any:
+        request = EditorSessionCreate(**params)
+        session = await create_editor_session(request.content, self.user_id)
+        # A channel edits one document at a time; the one it replaces is closed
+        previous, self.session_id = self.session_id, session.id
+        await self._close_session(previous)
+        return {"sessionId": session.id, "version": session.version}
+
+    async def _op_modify(self, params: dict, on_chunk: Optional[Send]) -> Any:
+        with model_lane(Lane.INTERACTIVE):
+            if "selectedText" in params or "selected_text" in params:
+                request = ModifyContentRequest(**params)
+                content = await modify_selection(
+                    request.selected_text,
+                    request.instruction,
+                    full_context=request.full_context,
+                    on_chunk=on_chunk,
+                )
+                return {"content": content}
+            if not self.session_id:
+                raise HTTPException(status_code=409, detail="No document open on this channel")
+            request = SessionEditRequest(**params)
+            return await apply_session_edit(
+                self.session_id,
+                request.start,
+                request.end,
+                request.instruction,
+                request.base_version,
+                self.user_id,
+                on_chunk=on_chunk,
+            )
+
+    async def _op_psychology(self, params: dict, on_chunk: Optional[Send]) -> Any:
+        request = AnalyzePsychologyRequest(**(await self._document(params)))
+        prefetched = await get_prefetched("psychology", request.content)
+        if prefetched is not None:
+            return prefetched
+        return await analyze_content_psychology(request.content)
+
+    async def _op_narrative(self, params: dict, on_chunk: Optional[Send]) -> Any:
+        request = NarrativeRequest(**(await self._document(params)))
+        return await analyze_narrative_physics(request.content)
+
+    async def _op_seo_audit(self, params: dict, on_chunk: Optional[Send]) -> Any:
+        request = SEOAuditRequest(**(await self._document(params)))
+        return await perform_seo_audit(request.content, request.target_keyword)
+
+    # ============== DISPATCH ==============
+
+    async def _run(self, request_id: str, op: str, params: dict, stream: bool) -> None:
+        handler = getattr(self, f"_op_{op}", None)
+
+        async def on_chunk(text: str) -> None:
+            await self.send({"type": "chunk", "id": request_id, "text": text})
+
+        try:
+            if handler is None:
+                raise HTTPException(status_code=404, detail=f"Unknown op: {op}")
+            data = await handler(params, on_chunk if stream else None)
+            await self.send({"type": "result", "id": request_id, "data": jsonable_encoder(data)})
+        except asyncio.CancelledError:
+            await self.send({"type": "cancelled", "id": request_id})
+            raise
+        except HTTPException as e:
+            await self.send({"type": "error", "id": request_id, "status": e.status_code, "detail": e.detail})
+        except ValidationError as e:
+            await self.send({"type": "error", "id": request_id, "status": 422, "detail": jsonable_encoder(e.errors())})
+        except Exception as e:
+            await self.send({"type": "error", "id": request_id, "status": 500, "detail": str(e)})
+        finally:
+            self.tasks.pop(request_id, None)
+            for key in [k for k, rid in self.keys.items() if rid == request_id]:
+                del self.keys[key]
+
+    def cancel(self, request_id: str) -> None:
+        task = self.tasks.get(request_id)
+        if task:
+            task.cancel()
+
+    async def submit(self, frame: dict) -> None:
+        request_id = str(frame.get("id") or "")
+        if not request_id or request_id in self.tasks:
+            await self.send({"type": "error", "id": request_id or None, "status": 400,
+                             "detail": "Request frames need an id that is not already in flight"})
+            return
+        key = frame.get("key")
+        params = frame.get("params") or {}
+        if not isinstance(params, dict) or not isinstance(key, (str, type(None))):
+            await self.send({"type": "error", "id": request_id, "status": 400,
+                             "detail": "params must be an object and key a string"})
+            return
+        if key and key in self.keys:
+            # Superseded: stop it now and don't count it against the in-flight limit
+            superseded = self.tasks.pop(self.keys[key], None)
+            if superseded:
+                superseded.cancel()
+        if len(self.tasks) >= get_settings().editor_channel_max_inflight:
+            await self.send({"type": "error", "id": request_id, "status": 429,
+                             "detail": "Too many requests in flight on this channel"})
+            return
+        if key:
+            self.keys[key] = request_id
+        self.tasks[request_id] = asyncio.create_task(
+            self._run(request_id, str(frame.get("op", "")), params, bool(frame.get("stream")))
+        )
+
+    async def close(self) -> None:
+        self.closed = True
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._close_session(self.session_id)
+
+    async def _close_session(self, session_id: Optional[str]) -> None:
+        if not session_id:
+            return
+        try:
+            await close_editor_session(session_id, self.user_id)
+        except HTTPException:
+            pass  # Already expired or evicted
+
+
+async def _authenticate(websocket: WebSocket) -> Optional[str]:
+    """Read the auth frame. Returns the user id (None for anonymous use)."""
+    frame = await asyncio.wait_for(websocket.receive_json(), get_settings().editor_channel_auth_timeout_seconds)
+    if not isinstance(frame, dict):
+        raise ValueError("The auth frame must be a JSON object")
+    if frame.get("type") != "auth":
+        raise HTTPException(status_code=401, detail="The first frame must be an auth frame")
+    if not frame.get("token"):
+        user = local_user()
+        return user.id if user else None
+    user = await authenticate_token(frame["token"])
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return user.id
+
+
+async def serve_editor_channel(websocket: WebSocket) -> None:
+    """Run one editor socket until the client disconnects."""
+    await websocket.accept()
+    channel = EditorChannel(websocket)
+    try:
+        try:
+            channel.user_id = await _authenticate(websocket)
+        except (HTTPException, asyncio.TimeoutError) as e:
+            detail = e.detail if isinstance(e, HTTPException) else "Authentication timed out"
+            await channel.send({"type": "error", "id": None, "status": 401, "detail": detail})
+            await websocket.close(code=4401)
+            return
+        except ValueError:
+            # Not JSON, or JSON that is not an object
+            await channel.send({"type": "error", "id": None, "status": 400, "detail": "The auth frame is malformed"})
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        # Tasks created from here on inherit the user for fair queuing
+        set_model_tenant(channel.user_id)
+        await channel.send({"type": "ready", "user": channel.user_id})
+
+        while True:
+            try:
+                frame = await websocket.receive_json()
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                await channel.send({"type": "error", "id": None, "status": 400, "detail": "Frames must be JSON objects"})
+                continue
+            if frame.get("type") == "request":
+                await channel.submit(frame)
+            elif frame.get("type") == "cancel":
+                channel.cancel(str(frame.get("id")))
+            else:
+                await channel.send({"type": "error", "id": frame.get("id"), "status": 400,
+                                    "detail": f"Unknown frame type: {frame.get('type')}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await channel.close()
@@ -0,0 +1,143 @@
+"""
+History Export Service - Streams a user's whole history as NDJSON or a zip of Markdown files.
+
+Rows are read with keyset pagination on (created_at, id), newest first, one page
+of HISTORY_EXPORT_PAGE_SIZE at a time, and their bodies are loaded per page. Each
+item is written out before the next page is read, so memory stays flat however
+long the history is (a zip additionally keeps its central directory, about 100
+bytes per file, until the end).
+
+Every exported item carries a cursor. Passing the cursor of the last item received
+resumes the export right after it; items saved since then are not included.
+"""
+import base64
+import json
+import re
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from ..config import get_settings
+from .blobs import hydrate_history_rows
+from .history_store import get_history_store
+
+EXPORT_FIELDS = ("id", "format", "original_title", "content", "psychology", "image_url", "created_at")
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, content_id = json.loads(raw)
+        return str(created_at), str(content_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid export cursor")
+
+
+async def iter_history(user_id: str, cursor: Optional[str] = None) -> AsyncIterator[List[dict]]:
+    """Pages of the user's rows with bodies filled in, starting after `cursor`."""
+    store = get_history_store()
+    page_size = get_settings().history_export_page_size
+    after = decode_cursor(cursor) if cursor else None
+    while True:
+        rows = await store.page_history(user_id, page_size, after)
+        if not rows:
+            return
+        yield await hydrate_history_rows(rows)
+        if len(rows) < page_size:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+def _item(row: dict) -> dict:
+    item = {field: row.get(field) for field in EXPORT_FIELDS}
+    item["cursor"] = encode_cursor(row)
+    return item
+
+
+async def export_ndjson(user_id: str, cursor: Optional[str] = None) -> AsyncIterator[bytes]:
+    """One JSON object per line, shaped like /history items plus `cursor`."""
+    async for rows in iter_history(user_id, cursor):
+        yield "".join(json.dumps(_item(row), ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+
+# ============== MARKDOWN ZIP ==============
+
+class _ZipBuffer:
+    """Write-only sink for ZipFile. It has no seek(), so ZipFile writes data
+    descriptors and never goes back, and the bytes can be drained after each file."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _slug(text: str, limit: int = 40) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:limit].rstrip("-") or "untitled"
+
+
+def _yaml(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def markdown_file(row: dict) -> Tuple[str, str]:
+    """File name and Markdown (front matter + body) of one history row."""
+    created_at = str(row["created_at"])
+    name = f"{created_at[:10]}-{str(row['format']).lower()}-{_slug(row.get('original_title') or '')}-{str(row['id'])[:8]}.md"
+    front = [
+        f"id: {_yaml(row['id'])}",
+        f"format: {_yaml(row['format'])}",
+        f"title: {_yaml(row.get('original_title') or '')}",
+        f"created_at: {_yaml(created_at)}",
+        f"cursor: {_yaml(encode_cursor(row))}",
+    ]
+    if row.get("image_url"):
+        front.append(f"image_url: {_yaml(row['image_url'])}")
+    if row.get("psychology"):
+        front.append(f"psychology: {_yaml(row['psychology'])}")
+    return name, "---\n" + "\n".join(front) + "\n---\n\n" + (row.get("content") or "") + "\n"
+
+
+def _zip_time(created_at: str) -> tuple:
+    try:
+        stamp = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        return (max(stamp.year, 1980), stamp.month, stamp.day, stamp.hour, stamp.minute, stamp.second)
+    except ValueError:
+        return (1980, 1, 1, 0, 0, 0)
+
+
+async def export_markdown_zip(user_id: str, cursor: Optional[str] = None) -> AsyncIterator[bytes]:
+    """A zip with one Markdown file per item, streamed as it is built."""
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for rows in iter_history(user_id, cursor):
+            for row in rows:
+                name, text = markdown_file(row)
+                info = zipfile.ZipInfo(name, date_time=_zip_time(str(row["created_at"])))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, text)
+            yield buffer.drain()
+    yield buffer.drain()
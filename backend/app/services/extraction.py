@@ -0,0 +1,416 @@
+"""
+Source Extraction Service - Local text extraction for uploaded source files.
+
+PDF, HTML, DOCX, Markdown and plain-text uploads are reduced to clean text
+before generation instead of being sent upstream as raw bytes:
+
+- PDF:  text per page (pypdf), with headers, footers and page numbers that repeat
+        across pages dropped and wrapped lines re-joined
+- HTML: the <main>/<article> text when there is one, without scripts, styles,
+        navigation, headers, footers, sidebars, forms or cookie banners
+- DOCX: body paragraphs (page headers and footers live in separate parts)
+- Markdown/text: front matter, comments, images and link targets removed
+
+Whitespace is normalized everywhere. Extraction runs in a process pool
+(EXTRACTION_WORKERS) so large documents never block the event loop, and results
+are cached by content hash so a batch extracts each upload once. Other file
+types (images, audio) are still sent as-is.
+
+Token counts use the local estimate from budget.py; the raw count is what
+the upload would have cost as-is (258 tokens per PDF page, the text size otherwise).
+Whichever of the two is cheaper is sent: a scanned or dense PDF whose text costs
+more than its pages goes upstream as the file.
+"""
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import re
+import unicodedata
+import zipfile
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from xml.etree import ElementTree
+
+from ..config import get_settings
+from ..schemas import SourceFile
+from ..timing import phase
+from ..tracing import span
+from .budget import count_tokens
+
+PDF_PAGE_TOKENS = 258
+PDF_SUPPORTED = importlib.util.find_spec("pypdf") is not None
+
+_EXTENSIONS = {
+    "pdf": "pdf", "html": "html", "htm": "html", "docx": "docx",
+    "md": "markdown", "markdown": "markdown", "txt": "text",
+}
+_MIME_TYPES = {
+    "application/pdf": "pdf",
+    "text/html": "html",
+    "application/xhtml+xml": "html",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "text/markdown": "markdown",
+    "text/x-markdown": "markdown",
+    "text/plain": "text",
+}
+
+
+@dataclass
+class ExtractedSource:
+    kind: str
+    text: str
+    raw_tokens: int
+    tokens: int
+
+    @property
+    def sends_text(self) -> bool:
+        """Whether the extracted text is cheaper than the file as-is."""
+        return not self.raw_tokens or self.tokens <= self.raw_tokens
+
+    def report(self) -> dict:
+        # Negative when the text costs more than the file (which is then sent instead)
+        saved = 1 - self.tokens / self.raw_tokens if self.raw_tokens else 0.0
+        return {
+            "kind": self.kind,
+            "rawTokens": self.raw_tokens,
+            "tokens": self.tokens,
+            "reduction": round(saved, 4),
+            "sentAs": "text" if self.sends_text else "file",
+        }
+
+
+def document_kind(mime_type: str, name: str = "") -> Optional[str]:
+    """The extractor for an upload, or None to send it upstream unchanged."""
+    kind = _MIME_TYPES.get((mime_type or "").split(";")[0].strip().lower())
+    if kind is None and "." in name:
+        kind = _EXTENSIONS.get(name.rsplit(".", 1)[1].lower())
+    if kind == "pdf" and not PDF_SUPPORTED:
+        return None
+    return kind
+
+
+# ============== NORMALIZATION ==============
+
+_INVISIBLE = re.compile("[\u200b\u200c\u200d\u2060\ufeff\u00ad]")
+_SPACES = re.compile("[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+
+
+def normalize_whitespace(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text.replace("\r\n", "\n").replace("\r", "\n"))
+    text = _INVISIBLE.sub("", text)
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _drop_repeated_lines(text: str, min_count: int = 3, max_chars: int = 80) -> str:
+    """Drop short lines that recur verbatim, e.g. "Share this article" or "Back to top"."""
+    lines = text.split("\n")
+    counts = Counter(line for line in lines if line and len(line) <= max_chars)
+    return "\n".join(line for line in lines if counts.get(line, 0) < min_count)
+
+
+# ============== PDF ==============
+
+EDGE_LINES = 2
+
+
+def _strip_page_furniture(pages: List[List[str]]) -> List[List[str]]:
+    """Remove header/footer lines repeated across pages (digits ignored) and page numbers."""
+    def key(line: str) -> str:
+        return _DIGITS.sub("#", line.lower())
+
+    edges = Counter()
+    for lines in pages:
+        edges.update({key(line) for line in lines[:EDGE_LINES] + lines[-EDGE_LINES:]})
+    threshold = max(2, len(pages) // 2)
+    repeated = {k for k, count in edges.items() if count >= threshold} if len(pages) > 2 else set()
+
+    cleaned = []
+    for lines in pages:
+        keep = []
+        for i, line in enumerate(lines):
+            at_edge = i < EDGE_LINES or i >= len(lines) - EDGE_LINES
+            if at_edge and (key(line) in repeated or _PAGE_NUMBER.match(line)):
+                continue
+            keep.append(line)
+        cleaned.append(keep)
+    return cleaned
+
+
+def _join_wrapped_lines(lines: List[str]) -> str:
+    """Re-join visual lines into paragraphs: a short line ending a sentence ends a paragraph."""
+    if not lines:
+        return ""
+    typical = sorted(len(line) for line in lines)[len(lines) // 2]
+    paragraphs, current = [], ""
+    for line in lines:
+        if current.endswith("-") and line[:1].islower():
+            current = current[:-1] + line
+        else:
+            current = f"{current} {line}" if current else line
+        if line[-1:] in '.!?:"”' and len(line) < 0.8 * typical:
+            paragraphs.append(current)
+            current = ""
+    if current:
+        paragraphs.append(current)
+    return "\n\n".join(paragraphs)
+
+
+def _extract_pdf(data: bytes) -> tuple:
+    import pypdf
+
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    pages = []
+    for page in reader.pages:
+        text = normalize_whitespace(page.extract_text() or "")
+        pages.append([line for line in text.split("\n") if line])
+    pages = _strip_page_furniture(pages)
+    text = "\n\n".join(_join_wrapped_lines(lines) for lines in pages if lines)
+    return text, len(reader.pages) * PDF_PAGE_TOKENS
+
+
+# ============== HTML ==============
+
+_VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_SKIP = {
+    "script", "style", "noscript", "template", "svg", "canvas", "head", "nav", "header", "footer",
+    "aside", "form", "iframe", "button", "select", "dialog",
+}
+_BLOCK = {
+    "p", "div", "section", "article", "main", "ul", "ol", "table", "tr", "blockquote", "pre",
+    "figure", "figcaption", "dl", "dt", "dd",
+}
+_BOILERPLATE = re.compile(
+    r"\b(nav|navbar|menu|breadcrumbs?|footer|sidebar|cookie|consent|banner|advert|ads?|promo|share|"
+    r"social|subscribe|signup|related|comments?|popup|modal)\b",
+    re.IGNORECASE,
+)
+
+
+class _HTMLText(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[tuple] = []
+        self.skip = 0
+        self.main = 0
+        self.all_parts: List[str] = []
+        self.main_parts: List[str] = []
+
+    def _emit(self, text: str) -> None:
+        self.all_parts.append(text)
+        if self.main:
+            self.main_parts.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID:
+            if tag in ("br", "hr") and not self.skip:
+                self._emit("\n")
+            return
+        attrs = dict(attrs)
+        marker = " ".join(filter(None, (attrs.get("id"), attrs.get("class"), attrs.get("role"))))
+        skip = tag in _SKIP or bool(marker and _BOILERPLATE.search(marker.replace("-", " ").replace("_", " ")))
+        main = tag in ("main", "article")
+        self.stack.append((tag, skip, main))
+        self.skip += skip
+        self.main += main
+        if self.skip:
+            return
+        if tag in _BLOCK:
+            self._emit("\n\n")
+        elif re.fullmatch(r"h[1-6]", tag):
+            self._emit("\n\n" + "#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self._emit("\n- ")
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, skip, main = self.stack.pop()
+            self.skip -= skip
+            self.main -= main
+            if open_tag == tag:
+                break
+        if not self.skip and (tag in _BLOCK or re.fullmatch(r"h[1-6]", tag)):
+            self._emit("\n\n")
+
+    def handle_data(self, data):
+        if not self.skip:
+            self._emit(data.replace("\n", " "))
+
+
+def _extract_html(data: bytes) -> tuple:
+    raw = data.decode("utf-8", errors="replace")
+    parser = _HTMLText()
+    parser.feed(raw)
+    parser.close()
+    main = normalize_whitespace("".join(parser.main_parts))
+    text = main if len(main) >= 200 else normalize_whitespace("".join(parser.all_parts))
+    return _drop_repeated_lines(text), count_tokens(raw)
+
+
+# ============== DOCX ==============
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _extract_docx(data: bytes) -> tuple:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{_W}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{_W}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_W}br", f"{_W}cr"):
+                parts.append("\n")
+        text = "".join(parts).strip()
+        if not text:
+            continue
+        style = paragraph.find(f"{_W}pPr/{_W}pStyle")
+        level = re.match(r"Heading(\d)", style.get(f"{_W}val", "")) if style is not None else None
+        paragraphs.append(f"{'#' * int(level.group(1))} {text}" if level else text)
+    raw = "\n\n".join(paragraphs)
+    return normalize_whitespace(raw), count_tokens(raw)
+
+
+# ============== MARKDOWN / TEXT ==============
+
+_FRONT_MATTER = re.compile(r"\A---\n.*?\n---\n", re.DOTALL)
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_LINK_DEFINITION = re.compile(r"^\s*\[[^\]]+\]:\s*\S+.*$", re.MULTILINE)
+_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+
+
+def _extract_markdown(data: bytes) -> tuple:
+    raw = data.decode("utf-8", errors="replace")
+    text = _FRONT_MATTER.sub("", raw.replace("\r\n", "\n"))
+    text = _HTML_COMMENT.sub("", text)
+    text = _IMAGE.sub("", text)
+    text = _LINK.sub(r"\1", text)
+    text = _LINK_DEFINITION.sub("", text)
+    text = _TAG.sub("", text)
+    return normalize_whitespace(text), count_tokens(raw)
+
+
+def _extract_text(data: bytes) -> tuple:
+    raw = data.decode("utf-8", errors="replace")
+    return normalize_whitespace(raw), count_tokens(raw)
+
+
+_EXTRACTORS = {
+    "pdf": _extract_pdf,
+    "html": _extract_html,
+    "docx": _extract_docx,
+    "markdown": _extract_markdown,
+    "text": _extract_text,
+}
+
+
+def extract_document(data: bytes, kind: str) -> ExtractedSource:
+    """Extract and clean one document (runs in a pool process)."""
+    text, raw_tokens = _EXTRACTORS[kind](data)
+    return ExtractedSource(kind=kind, text=text, raw_tokens=raw_tokens, tokens=count_tokens(text))
+
+
+# ============== POOL & CACHE ==============
+
+_pool: Optional[ProcessPoolExecutor] = None
+_cache: "OrderedDict[str, ExtractedSource]" = OrderedDict()
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=get_settings().extraction_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _source_key(source: SourceFile) -> str:
+    return hashlib.sha256(source.data.encode("utf-8")).hexdigest()
+
+
+def _remember(key: str, extracted: ExtractedSource) -> None:
+    _cache[key] = extracted
+    _cache.move_to_end(key)
+    while len(_cache) > get_settings().extraction_cache_size:
+        _cache.popitem(last=False)
+
+
+async def _extract(source: SourceFile, kind: str, key: str) -> Optional[ExtractedSource]:
+    settings = get_settings()
+    try:
+        with phase("extract"), span("extract.document", **{"extract.kind": kind}) as extract_span:
+            data = base64.b64decode(source.data)
+            extracted = await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(_get_pool(), extract_document, data, kind),
+                settings.extraction_timeout_seconds,
+            )
+            extract_span.set_attribute("extract.raw_tokens", extracted.raw_tokens)
+            extract_span.set_attribute("extract.tokens", extracted.tokens)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            shutdown_extraction_pool()
+        print(f"Source extraction failed for {source.name} ({kind}), sending the file as-is: {e}")
+        return None
+    finally:
+        _inflight.pop(key, None)
+    if not extracted.text:
+        return None
+    _remember(key, extracted)
+    report = extracted.report()
+    print(f"Source extraction: {source.name} ({kind}) {report['rawTokens']} -> {report['tokens']} tokens "
+          f"({-report['reduction']:+.0%}), sending the {report['sentAs']}")
+    return extracted
+
+
+async def extract_source(source: SourceFile) -> Optional[ExtractedSource]:
+    """Clean text for an uploaded file, or None when it cannot be extracted.
+
+    Check `sends_text` before using it in place of the file.
+    """
+    kind = document_kind(source.mime_type, source.name)
+    if kind is None or not get_settings().extraction_enabled:
+        return None
+    key = _source_key(source)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    if key not in _inflight:
+        _inflight[key] = asyncio.ensure_future(_extract(source, kind, key))
+    return await asyncio.shield(_inflight[key])
+
+
+def source_report(source: Optional[SourceFile]) -> Optional[dict]:
+    """Token report for an upload already extracted in this process."""
+    if source is None:
+        return None
+    extracted = _cache.get(_source_key(source))
+    return extracted.report() if extracted else None
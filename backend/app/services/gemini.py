@@ -1,12 +1,52 @@
 """
 Gemini AI Service - Handles all AI content generation and analysis.
+
+Each task asks `get_provider(<task>)` for its backend (see llm.py); the Gemini
+transport and its provider live here.
 """
+import asyncio
 import json
-from typing import List, Optional
-from google import genai
-from google.genai import types
+import math
+import time
+from contextlib import aclosing
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
 
 from ..config import get_settings
+from ..lazy import lazy_import
+from ..timing import phase
+from ..tracing import span
+from .text_limits import (
+    LINKEDIN_MAX_CHARS,
+    META_DESCRIPTION_MAX_CHARS,
+    META_TITLE_MAX_CHARS,
+    Segment,
+    find_meta_description,
+    join_thread,
+    replace_meta_description,
+    thread_segments,
+    trim_to_limits,
+    truncate_to_limit,
+    twitter_length,
+)
+from .budget import PromptPart, count_tokens, fit_parts, input_budget, output_limit, trim_to_tokens
+from .extraction import extract_source
+from .llm import Contents, LLMProvider, get_provider
+from .narrative import describe_beat, score_beats, top_beats
+from .scheduler import get_model_scheduler
+from .summaries import compact_source
+from .upstream import is_quota_error, record_quota_error
+from .variants import opening_score, rank_variants, score_content
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+else:
+    # Imported on first use to keep cold starts short
+    genai = lazy_import("google.genai")
+    types = lazy_import("google.genai.types")
 from ..schemas import (
     ContentFormat,
     InputType,
@@ -54,7 +94,7 @@ FORMAT_PROMPTS = {
     - The Story/Insight: Personal or professional narrative related to the content.
     - The Lesson: Concrete takeaways.
     - The Engagement Question: Ask the audience something specific.
-    - Formatting: Use plenty of whitespace (line breaks). Use Markdown for bolding key points.""",
+    - Formatting: Use plenty of whitespace (line breaks). Use Markdown for bolding key points. Stay under 3,000 characters.""",
 
     ContentFormat.NEWSLETTER: """Create a personal, direct-response style newsletter entry.
     Structure:
@@ -68,16 +108,221 @@ FORMAT_PROMPTS = {
 }
 
 
-def _get_client() -> genai.Client:
-    """Get Gemini AI client."""
+@lru_cache()
+def _get_client() -> "genai.Client":
+    """Get the shared Gemini AI client."""
     settings = get_settings()
     return genai.Client(api_key=settings.gemini_api_key)
 
 
-async def generate_platform_content(request: ContentRequest, format: ContentFormat) -> str:
-    """Generate content for a specific platform format."""
-    client = _get_client()
+async def _admit(scheduler) -> None:
+    retry_after = await scheduler.admission_delay()
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=503,
+            detail="The AI model is at capacity, please retry shortly",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+async def _quota_exhausted(scheduler) -> HTTPException:
+    scheduler.on_quota_error()
+    backoff = await record_quota_error()
+    return HTTPException(
+        status_code=503,
+        detail="The AI model quota is exhausted, please retry shortly",
+        headers={"Retry-After": str(math.ceil(backoff))},
+    )
+
+
+def _span_attributes(kwargs: dict, extra: Optional[dict]) -> dict:
+    attributes = {"gen_ai.system": "gemini", "gen_ai.request.model": kwargs.get("model")}
+    if extra:
+        attributes.update(extra)
+    return attributes
+
+
+def _record_usage(model_span, response) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        model_span.set_attribute("gen_ai.usage.input_tokens", usage.prompt_token_count)
+        model_span.set_attribute("gen_ai.usage.output_tokens", usage.candidates_token_count)
+        model_span.set_attribute("gen_ai.cache_hit", bool(usage.cached_content_token_count))
+
+
+async def _generate(span_attributes: Optional[dict] = None, **kwargs):
+    """Every text/JSON/image model call goes through here.
+
+    Calls wait for a scheduler slot in the request's lane, then run on the async
+    client so a slow upstream never blocks the event loop. Overload and upstream
+    quota errors surface as 503 with Retry-After.
+    """
+    scheduler = get_model_scheduler()
+    await _admit(scheduler)
+    with phase("queue"):
+        await scheduler.acquire()
+    try:
+        with phase("model"), span("gemini.generate_content", **_span_attributes(kwargs, span_attributes)) as model_span:
+            started = time.monotonic()
+            try:
+                response = await _get_client().aio.models.generate_content(**kwargs)
+            except Exception as e:
+                if is_quota_error(e):
+                    raise await _quota_exhausted(scheduler) from e
+                raise
+            scheduler.on_success(time.monotonic() - started)
+            _record_usage(model_span, response)
+            return response
+    finally:
+        scheduler.release()
+
+
+async def _generate_stream(span_attributes: Optional[dict] = None, **kwargs) -> AsyncIterator[str]:
+    """Streaming variant of _generate: yields text chunks as they arrive."""
+    scheduler = get_model_scheduler()
+    await _admit(scheduler)
+    with phase("queue"):
+        await scheduler.acquire()
+    try:
+        with phase("model"), span("gemini.generate_content_stream", **_span_attributes(kwargs, span_attributes)) as model_span:
+            started = time.monotonic()
+            chunk = None
+            try:
+                async for chunk in await _get_client().aio.models.generate_content_stream(**kwargs):
+                    if chunk.text:
+                        yield chunk.text
+            except Exception as e:
+                if is_quota_error(e):
+                    raise await _quota_exhausted(scheduler) from e
+                raise
+            scheduler.on_success(time.monotonic() - started)
+            if chunk is not None:
+                _record_usage(model_span, chunk)
+    finally:
+        scheduler.release()
+
+
+class GeminiProvider(LLMProvider):
+    """google-genai backend: the scheduler, quota back-off and context caching apply."""
+    
+    name = "gemini"
+    supports_context_cache = True
+    
+    @staticmethod
+    def _config(system_instruction, temperature, cached_content=None, max_output_tokens=None, **options):
+        return types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            temperature=temperature,
+            cached_content=cached_content,
+            max_output_tokens=max_output_tokens,
+            **options,
+        )
     
+    async def generate_text(
+        self,
+        contents: Contents,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        cached_content: Optional[str] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> str:
+        response = await _generate(
+            model=TEXT_MODEL,
+            contents=contents,
+            config=self._config(system_instruction, temperature, cached_content, max_output_tokens),
+            span_attributes=span_attributes,
+        )
+        return response.text or ""
+    
+    async def generate_json(
+        self,
+        contents: Contents,
+        schema: dict,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> Optional[Any]:
+        response = await _generate(
+            model=TEXT_MODEL,
+            contents=contents,
+            config=self._config(
+                system_instruction, temperature, max_output_tokens=max_output_tokens,
+                response_mime_type="application/json", response_schema=schema,
+            ),
+            span_attributes=span_attributes,
+        )
+        if not response.text:
+            return None
+        with phase("parse"):
+            return json.loads(response.text)
+    
+    async def generate_candidates(
+        self,
+        contents: Contents,
+        count: int,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> List[str]:
+        response = await _generate(
+            model=TEXT_MODEL,
+            contents=contents,
+            config=self._config(
+                system_instruction, temperature, max_output_tokens=max_output_tokens, candidate_count=count,
+            ),
+            span_attributes={**(span_attributes or {}), "gen_ai.request.candidates": count},
+        )
+        texts = []
+        for candidate in response.candidates or []:
+            parts = candidate.content.parts if candidate.content else None
+            text = "".join(part.text for part in parts or [] if getattr(part, "text", None))
+            if text:
+                texts.append(text)
+        return texts
+    
+    async def stream_text(
+        self,
+        contents: Contents,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        cached_content: Optional[str] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        # aclosing: a consumer that stops early releases the scheduler slot right away
+        async with aclosing(_generate_stream(
+            model=TEXT_MODEL,
+            contents=contents,
+            config=self._config(system_instruction, temperature, cached_content, max_output_tokens),
+            span_attributes=span_attributes,
+        )) as stream:
+            async for text in stream:
+                yield text
+    
+    async def generate_image(self, prompt: str, span_attributes: Optional[dict] = None) -> Optional[str]:
+        response = await _generate(
+            model=IMAGE_MODEL,
+            contents=prompt,
+            config=types.GenerateContentConfig(response_modalities=["image", "text"]),
+            span_attributes=span_attributes,
+        )
+        if response.candidates and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'inline_data') and part.inline_data:
+                    return f"data:{part.inline_data.mime_type};base64,{part.inline_data.data}"
+        return None
+
+
+def warm_up_client() -> None:
+    """Import the SDK, build the client and open a connection ahead of the first request."""
+    client = _get_client()
+    client.models.get(model=TEXT_MODEL)
+
+
+def _platform_system_instruction(request: ContentRequest, format: ContentFormat) -> str:
     active_tone = request.tone_override or request.brand_voice.tone
     
     brand_voice_instruction = f"""
@@ -85,21 +330,21 @@ async def generate_platform_content(request: ContentRequest, format: ContentForm
     - Tone: {active_tone}
     - Target Audience: {request.brand_voice.audience}
     - Keywords to weave in: {', '.join(request.brand_voice.keywords)}
-    {f'- Style Reference: "{request.brand_voice.example_text[:300]}..."' if request.brand_voice.example_text else ''}
+    {f'- Style Reference: "{trim_to_tokens(request.brand_voice.example_text, input_budget("style_reference"))}"' if request.brand_voice.example_text else ''}
     """
     
     specific_instruction = FORMAT_PROMPTS[format]
     
     if format == ContentFormat.BLOG and request.seo_keywords:
         specific_instruction += f"""
-        
+    
         IMPORTANT SEO INSTRUCTIONS:
         1. Primary Keywords to target: {', '.join(request.seo_keywords)}
         2. Optimize the Title (H1) and Subheaders (H2/H3) with these keywords naturally.
         3. Include a "Meta Description" block at the very top of the response (max 160 characters), labeled "**Meta Description:**".
         """
     
-    system_instruction = f"""
+    return f"""
     You are ContANT AI, an expert content strategist and copywriter.
     Your goal is to repurpose source material into a high-quality {format.value} format.
     
@@ -110,34 +355,199 @@ async def generate_platform_content(request: ContentRequest, format: ContentForm
 
     {f'Additional User Instructions: {request.custom_instructions}' if request.custom_instructions else ''}
     """
-    
-    # Build content parts
+
+
+async def _source_contents(request: ContentRequest) -> list:
+    """Content parts carrying the source material: inline text, the cleaned text of an
+    uploaded document when it is cheaper than the file, or the attached file itself. Text is fitted to
+    the "generate" input budget, or replaced by its cached summary with `use_summary`."""
     contents = []
+    budget = input_budget("generate")
     if request.input_type == InputType.FILE and request.source_file:
+        extracted = await extract_source(request.source_file)
+        if extracted is not None and extracted.sends_text:
+            text = await compact_source(extracted.text) if request.use_summary else extracted.text
+            contents.append(f"Source Material (extracted from {request.source_file.name}):\n{trim_to_tokens(text, budget)}")
+            return contents
         contents.append(types.Part.from_bytes(
             data=request.source_file.data.encode(),
             mime_type=request.source_file.mime_type
         ))
         contents.append("Source Material (see attached file above).")
     else:
-        contents.append(f"Source Material:\n{request.source_text}")
+        text = await compact_source(request.source_text) if request.use_summary else request.source_text
+        contents.append(f"Source Material:\n{trim_to_tokens(text or '', budget)}")
+    return contents
+
+
+async def generate_platform_content(request: ContentRequest, format: ContentFormat) -> str:
+    """Generate content for a specific platform format (one sample; see generate_platform_variants)."""
+    contents = await _source_contents(request)
+    with phase("prompt"):
+        system_instruction = _platform_system_instruction(request, format)
+        
+    text = await get_provider("generate").generate_text(
+        contents,
+        system_instruction=system_instruction,
+        temperature=0.7,
+        span_attributes={"content.format": format.value},
+        max_output_tokens=output_limit("generate")
+    )
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=contents,
-        config=types.GenerateContentConfig(
-            system_instruction=system_instruction,
-            temperature=0.7,
-        )
+    if not text:
+        return "Error: No content generated."
+    return await enforce_length_limits(format, text)
+
+
+async def generate_platform_variants(request: ContentRequest, format: ContentFormat) -> List[Tuple[str, float]]:
+    """Up to `request.variants` alternatives from one model call, deduplicated and
+    ranked best first, as (content, score) pairs.
+
+    Ranking already penalises running over the limits, so only the winner gets the
+    model rewrite of enforce_length_limits; the others are truncated locally.
+    """
+    contents = await _source_contents(request)
+    with phase("prompt"):
+        system_instruction = _platform_system_instruction(request, format)
+    
+    texts = await get_provider("generate").generate_candidates(
+        contents,
+        request.variants,
+        system_instruction=system_instruction,
+        temperature=0.9,
+        span_attributes={"content.format": format.value},
+        max_output_tokens=output_limit("generate")
+    )
+    
+    with phase("rank"):
+        ranked = rank_variants(texts, text=lambda text: text, score=lambda text: score_content(text, format))
+    if not ranked:
+        return [("Error: No content generated.", 0.0)]
+    (best, best_score), others = ranked[0], ranked[1:]
+    return [(await enforce_length_limits(format, best), best_score)] + [
+        (trim_to_limits(format, text), score) for text, score in others
+    ]
+
+
+async def regenerate_section(
+    request: ContentRequest,
+    format: ContentFormat,
+    outline: List[str],
+    section: str,
+    section_instruction: Optional[str] = None,
+) -> str:
+    """Rewrite one H2 section of a long-form document under the current inputs."""
+    contents = await _source_contents(request)
+    with phase("prompt"):
+        system_instruction = _platform_system_instruction(request, format)
+        contents.append("Outline of the full document:\n" + "\n".join(f"- {h}" for h in outline))
+        contents.append(f"""Section to rewrite:
+        {section}
+        
+        TASK: Rewrite ONLY this section of the {format.value} for the settings above, keeping its place in
+        the outline. Keep the section's own heading line (a leading "## " heading, or the title and
+        meta description block for the opening section). Output only the section's Markdown.
+        {f'Instruction for this section: {section_instruction}' if section_instruction else ''}
+        """)
+    
+    text = await get_provider("generate").generate_text(
+        contents,
+        system_instruction=system_instruction,
+        temperature=0.7,
+        span_attributes={"content.format": format.value, "content.section": section.split("\n", 1)[0][:80]},
+        max_output_tokens=output_limit("generate")
+    )
+    
+    return text.strip() if text else section
+
+
+# ============== LENGTH LIMITS ==============
+
+async def shorten_segments(segments: List[Segment], label: str, counter=len) -> Dict[int, str]:
+    """Rewrite only the segments over their limit, all in one small model call.
+
+    Returns the replacement text by segment index. Anything still too long after
+    the rewrite is trimmed at a word boundary.
+    """
+    offenders = [s for s in segments if s.over_limit]
+    if not offenders:
+        return {}
+    
+    items = "\n".join(
+        json.dumps({"index": s.index, "length": s.length, "limit": s.limit, "text": s.text}, ensure_ascii=False)
+        for s in offenders
     )
+    prompt = f"""Each {label} below is longer than its limit. Shorten each one to fit within "limit"
+    characters ("length" is the current count). Keep the meaning, voice, hashtags and emojis and do not
+    add anything new. {"URLs count as 23 characters and each emoji as 2." if counter is twitter_length else ""}
+    
+    {items}
+    """
     
-    return response.text or "Error: No content generated."
+    rewrites: Dict[int, str] = {}
+    try:
+        data = await get_provider("shorten").generate_json(
+            prompt,
+            schema={
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "integer"},
+                        "text": {"type": "string"}
+                    },
+                    "required": ["index", "text"]
+                }
+            },
+            temperature=0.3,
+            span_attributes={"content.rewrite": label, "content.rewrite_count": len(offenders)},
+            max_output_tokens=output_limit("shorten")
+        )
+        for item in data or []:
+            rewrites[int(item["index"])] = item["text"].strip()
+    except Exception as e:
+        print(f"Length rewrite failed, trimming instead: {e}")
+    
+    return {
+        s.index: truncate_to_limit(rewrites.get(s.index) or s.text, s.limit, counter)
+        for s in offenders
+    }
+
+
+async def enforce_length_limits(format: ContentFormat, content: str) -> str:
+    """Bring generated content within the platform's limits.
+
+    Twitter threads are checked tweet by tweet (weighted counting), LinkedIn posts
+    as a whole and blog posts by their meta description. Content that already fits
+    is returned unchanged.
+    """
+    if format == ContentFormat.TWITTER:
+        segments = thread_segments(content)
+        fixes = await shorten_segments(segments, "tweet", twitter_length)
+        if not fixes:
+            return content
+        return join_thread([fixes.get(s.index, s.text) for s in segments])
+    
+    if format == ContentFormat.LINKEDIN:
+        segments = [Segment(0, content, len(content), LINKEDIN_MAX_CHARS)]
+        return (await shorten_segments(segments, "LinkedIn post")).get(0, content)
+    
+    if format == ContentFormat.BLOG:
+        match = find_meta_description(content)
+        if match is None:
+            return content
+        description = match.group(2).strip().strip("*").strip()
+        segments = [Segment(0, description, len(description), META_DESCRIPTION_MAX_CHARS)]
+        fixes = await shorten_segments(segments, "meta description")
+        return replace_meta_description(content, fixes[0]) if fixes else content
+    
+    return content
 
 
 async def modify_content(full_context: str, selected_text: str, instruction: str) -> str:
     """Modify selected text based on instruction."""
-    client = _get_client()
-    
+    # The selection is always sent whole; the surrounding article gets what is left
+    full_context = trim_to_tokens(full_context, max(input_budget("modify") - count_tokens(selected_text), 0))
     prompt = f"""
     You are an AI editor assistant.
     
@@ -153,42 +563,118 @@ async def modify_content(full_context: str, selected_text: str, instruction: str
     TASK: Rewrite ONLY the "TEXT SELECTED BY USER" based on the instruction. Output only the replacement text.
     """
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt
+    text = await get_provider("modify").generate_text(prompt, max_output_tokens=output_limit("modify"))
+    
+    return text.strip() if text else selected_text
+
+
+EDITOR_SYSTEM_INSTRUCTION = """You are an AI editor assistant.
+The full article being edited is provided as context. When asked to modify a selection,
+rewrite ONLY the selected text based on the instruction and output only the replacement text."""
+
+
+def create_editor_context_cache(document: str, ttl_seconds: int) -> Optional[str]:
+    """Upload an article once as cached model context. Returns the cache name, or None if
+    the document cannot be cached (e.g. below the model's minimum cacheable size, or
+    editor edits are routed to a provider without context caching)."""
+    if not get_provider("modify").supports_context_cache:
+        return None
+    client = _get_client()
+    try:
+        with span("gemini.caches.create", **{"gen_ai.request.model": TEXT_MODEL}):
+            cache = client.caches.create(
+                model=TEXT_MODEL,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=EDITOR_SYSTEM_INSTRUCTION,
+                    contents=[f"FULL CONTEXT OF THE ARTICLE:\n{document}"],
+                    ttl=f"{ttl_seconds}s",
+                )
+            )
+        return cache.name
+    except Exception as e:
+        print(f"Context cache unavailable: {e}")
+        return None
+
+
+def delete_editor_context_cache(name: str) -> None:
+    """Release a cached editor context."""
+    try:
+        _get_client().caches.delete(name=name)
+    except Exception as e:
+        print(f"Context cache delete failed: {e}")
+
+
+async def modify_selection(
+    selected_text: str,
+    instruction: str,
+    context_cache: Optional[str] = None,
+    full_context: Optional[str] = None,
+    edits_since_cache: Optional[List[str]] = None,
+    on_chunk: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> str:
+    """Modify a selection against either a cached article context or an inline one.
+
+    With a cache only the selection, the instruction and the edits made since the
+    cache was built are sent. With `on_chunk` the replacement is streamed to it as
+    it is generated.
+    """
+    sections = []
+    if context_cache is None:
+        context_budget = max(input_budget("modify") - count_tokens(selected_text), 0)
+        sections.append(f"FULL CONTEXT OF THE ARTICLE:\n{trim_to_tokens(full_context or '', context_budget)}")
+    elif edits_since_cache:
+        sections.append(
+            "EDITS APPLIED TO THE ARTICLE SINCE IT WAS SHARED (old -> new):\n"
+            + "\n".join(edits_since_cache)
+        )
+    sections.append(f"TEXT SELECTED BY USER TO MODIFY:\n{selected_text}")
+    sections.append(f"USER INSTRUCTION:\n{instruction}")
+    
+    provider = get_provider("modify")
+    request = dict(
+        contents="\n\n".join(sections),
+        system_instruction=None if context_cache else EDITOR_SYSTEM_INSTRUCTION,
+        cached_content=context_cache,
+        max_output_tokens=output_limit("modify"),
     )
     
-    return response.text.strip() if response.text else selected_text
+    if on_chunk is not None:
+        parts = []
+        # If on_chunk fails (closed socket) or the task is cancelled, close the stream
+        # now so the scheduler slot / local semaphore is not held until GC
+        async with aclosing(provider.stream_text(**request)) as stream:
+            async for text in stream:
+                parts.append(text)
+                await on_chunk(text)
+        return "".join(parts).strip() or selected_text
+    
+    text = await provider.generate_text(**request)
+    return text.strip() if text else selected_text
 
 
 async def analyze_content_psychology(content: str) -> PsychologyAnalysis:
     """Analyze content for psychological impact."""
-    client = _get_client()
-    
-    prompt = f'Analyze the following content snippet for psychological impact.\n\nCONTENT:\n"{content[:2000]}..."'
-    
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "toneScore": {"type": "number"},
-                    "viralityScore": {"type": "number"},
-                    "readingLevel": {"type": "string"},
-                    "triggers": {"type": "array", "items": {"type": "string"}},
-                    "structuralTension": {"type": "number"},
-                    "explanation": {"type": "string"},
-                },
-                "required": ["toneScore", "viralityScore", "readingLevel", "triggers", "structuralTension", "explanation"]
-            }
-        )
+    content = trim_to_tokens(content, input_budget("psychology"))
+    prompt = f'Analyze the following content snippet for psychological impact.\n\nCONTENT:\n"{content}"'
+    
+    data = await get_provider("psychology").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "toneScore": {"type": "number"},
+                "viralityScore": {"type": "number"},
+                "readingLevel": {"type": "string"},
+                "triggers": {"type": "array", "items": {"type": "string"}},
+                "structuralTension": {"type": "number"},
+                "explanation": {"type": "string"},
+            },
+            "required": ["toneScore", "viralityScore", "readingLevel", "triggers", "structuralTension", "explanation"]
+        },
+        max_output_tokens=output_limit("psychology"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return PsychologyAnalysis(**data)
     
     return PsychologyAnalysis(
@@ -199,30 +685,24 @@ async def analyze_content_psychology(content: str) -> PsychologyAnalysis:
 
 async def generate_content_strategy(topic: str) -> ContentStrategy:
     """Generate content strategy for a topic."""
-    client = _get_client()
-    
     prompt = f'Develop a brief content strategy for the topic: "{topic}".'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "targetAudience": {"type": "string"},
-                    "painPoints": {"type": "array", "items": {"type": "string"}},
-                    "suggestedHooks": {"type": "array", "items": {"type": "string"}},
-                    "contentAngle": {"type": "string"},
-                },
-                "required": ["targetAudience", "painPoints", "suggestedHooks", "contentAngle"]
-            }
-        )
+    data = await get_provider("strategy").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "targetAudience": {"type": "string"},
+                "painPoints": {"type": "array", "items": {"type": "string"}},
+                "suggestedHooks": {"type": "array", "items": {"type": "string"}},
+                "contentAngle": {"type": "string"},
+            },
+            "required": ["targetAudience", "painPoints", "suggestedHooks", "contentAngle"]
+        },
+        max_output_tokens=output_limit("strategy"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return ContentStrategy(**data)
     
     raise ValueError("No strategy returned")
@@ -230,55 +710,66 @@ async def generate_content_strategy(topic: str) -> ContentStrategy:
 
 async def generate_marketing_image(prompt_text: str) -> str:
     """Generate a marketing image and return base64 data URL."""
-    client = _get_client()
-    
-    response = client.models.generate_content(
-        model=IMAGE_MODEL,
-        contents=f"Professional marketing illustration for: {prompt_text}. Style: Modern, minimal, vibrant.",
-        config=types.GenerateContentConfig(
-            response_modalities=["image", "text"]
-        )
+    image = await get_provider("image").generate_image(
+        f"Professional marketing illustration for: {prompt_text}. Style: Modern, minimal, vibrant."
     )
     
-    if response.candidates and response.candidates[0].content.parts:
-        for part in response.candidates[0].content.parts:
-            if hasattr(part, 'inline_data') and part.inline_data:
-                return f"data:{part.inline_data.mime_type};base64,{part.inline_data.data}"
+    if image:
+        return image
     
     raise ValueError("No image generated")
 
 
-async def generate_contextual_hooks(context: str, platform: str, frameworks: List[str]) -> List[HookSuggestion]:
-    """Generate viral hooks for content."""
-    client = _get_client()
-    
-    prompt = f'Generate 5 high-converting content hooks for {platform}. Context: "{context}"'
+def _hook_score(hook: HookSuggestion) -> float:
+    # The model scores virality on 0-10 or 0-100 depending on the run
+    virality = hook.virality_score / (100 if hook.virality_score > 10 else 10)
+    return round(0.6 * min(max(virality, 0.0), 1.0) + 0.4 * opening_score(hook.text), 4)
+
+
+async def generate_contextual_hooks(
+    context: str, platform: str, frameworks: List[str], variants: Optional[int] = None
+) -> List[HookSuggestion]:
+    """Generate viral hooks for content, deduplicated and ranked best first.
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "text": {"type": "string"},
-                        "type": {"type": "string"},
-                        "viralityScore": {"type": "number"},
-                        "explanation": {"type": "string"}
-                    },
-                    "required": ["text", "type", "viralityScore", "explanation"]
-                }
+    `variants` hooks are returned (5 by default); a couple of extra candidates are
+    requested so near-duplicates can be dropped without coming up short.
+    """
+    count = variants or 5
+    requested = count + 2 if variants else count
+    context = trim_to_tokens(context, input_budget("hooks"))
+    prompt = f'Generate {requested} distinct, high-converting content hooks for {platform}. Context: "{context}"'
+    max_output_tokens = output_limit("hooks")
+    if max_output_tokens:
+        max_output_tokens = max_output_tokens * max(requested, 5) // 5
+    
+    data = await get_provider("hooks").generate_json(
+        prompt,
+        schema={
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "text": {"type": "string"},
+                    "type": {"type": "string"},
+                    "viralityScore": {"type": "number"},
+                    "explanation": {"type": "string"}
+                },
+                "required": ["text", "type", "viralityScore", "explanation"]
             }
-        )
+        },
+        max_output_tokens=max_output_tokens,
     )
     
-    if response.text:
-        data = json.loads(response.text)
-        return [HookSuggestion(**item) for item in data]
-    return []
+    if data is None:
+        return []
+    with phase("rank"):
+        ranked = rank_variants(
+            [HookSuggestion(**item) for item in data],
+            text=lambda hook: hook.text,
+            score=_hook_score,
+            limit=count,
+        )
+    return [hook for hook, _ in ranked]
 
 
 async def generate_emotional_content(
@@ -286,78 +777,88 @@ async def generate_emotional_content(
     sensory: List[str], format: str, audience: str
 ) -> str:
     """Generate emotionally-charged content."""
-    client = _get_client()
-    
     prompt = f'Evoke {emotion} (intensity {intensity}/10) about "{topic}" for {audience}. Format: {format}. Sensory details: {", ".join(sensory)}.'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt
-    )
-    
-    return response.text or ""
+    return await get_provider("emotional").generate_text(prompt, max_output_tokens=output_limit("emotional"))
 
 
 async def analyze_narrative_physics(content: str) -> List[NarrativePoint]:
-    """Analyze narrative tension and pacing."""
-    client = _get_client()
-    
-    prompt = f'Analyze narrative beats for tension and pacing. Text: "{content[:3000]}"'
-    
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "index": {"type": "integer"},
-                        "snippet": {"type": "string"},
-                        "tension": {"type": "number"},
-                        "pacing": {"type": "number"},
-                        "insight": {"type": "string"}
-                    },
-                    "required": ["index", "snippet", "tension", "pacing", "insight"]
-                }
-            }
+    """Analyze narrative tension and pacing.
+
+    The curves are computed locally over the whole text; the model only writes the
+    insight for the few most dramatic beats.
+    """
+    settings = get_settings()
+    with phase("narrative"):
+        beats = await asyncio.to_thread(score_beats, content, settings.narrative_max_beats)
+        insights = {beat.index: describe_beat(beat) for beat in beats}
+        highlights = top_beats(beats, settings.narrative_insight_beats)
+    
+    if highlights:
+        per_beat = input_budget("narrative") // len(highlights)
+        items = "\n".join(
+            json.dumps(
+                {"index": b.index, "tension": b.tension, "pacing": b.pacing, "text": trim_to_tokens(b.text, per_beat)},
+                ensure_ascii=False,
+            )
+            for b in highlights
         )
-    )
-    
-    if response.text:
-        data = json.loads(response.text)
-        return [NarrativePoint(**item) for item in data]
-    return []
+        prompt = f"""These are the most dramatic beats of a piece of writing, with tension and pacing
+        scores from 0 to 100. For each beat write one sentence of insight for the writer: what creates the
+        effect and how it serves the reader.
+        
+        {items}
+        """
+        try:
+            data = await get_provider("narrative").generate_json(
+                prompt,
+                schema={
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer"},
+                            "insight": {"type": "string"}
+                        },
+                        "required": ["index", "insight"]
+                    }
+                },
+                span_attributes={"narrative.beats": len(beats)},
+                max_output_tokens=output_limit("narrative")
+            )
+            for item in data or []:
+                if int(item["index"]) in insights and item["insight"].strip():
+                    insights[int(item["index"])] = item["insight"].strip()
+        except Exception as e:
+            print(f"Narrative insights failed, using local descriptions: {e}")
+    
+    return [
+        NarrativePoint(index=b.index, snippet=b.snippet, tension=b.tension, pacing=b.pacing, insight=insights[b.index])
+        for b in beats
+    ]
 
 
 async def generate_brand_lore(brand_info: str, archetype: str, style: str) -> BrandLore:
     """Generate brand mythology."""
-    client = _get_client()
-    
+    brand_info = trim_to_tokens(brand_info, input_budget("lore"))
     prompt = f'Create Brand Lore for: "{brand_info}". Archetype: {archetype}, Style: {style}.'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "originStory": {"type": "string"},
-                    "manifesto": {"type": "string"},
-                    "archetype": {"type": "string"},
-                    "enemy": {"type": "string"}
-                },
-                "required": ["originStory", "manifesto", "archetype", "enemy"]
-            }
-        )
+    data = await get_provider("lore").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "originStory": {"type": "string"},
+                "manifesto": {"type": "string"},
+                "archetype": {"type": "string"},
+                "enemy": {"type": "string"}
+            },
+            "required": ["originStory", "manifesto", "archetype", "enemy"]
+        },
+        max_output_tokens=output_limit("lore"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return BrandLore(**data)
     
     raise ValueError("Failed to generate brand lore")
@@ -365,73 +866,66 @@ async def generate_brand_lore(brand_info: str, archetype: str, style: str) -> Br
 
 async def resurrect_idea(content: str, pivot_angle: str) -> List[ResurrectionVariant]:
     """Resurrect old content with new angles."""
-    client = _get_client()
-    
+    content = trim_to_tokens(content, input_budget("resurrect"))
     prompt = f'Resurrect this idea with pivot angle {pivot_angle}: "{content}"'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "style": {"type": "string"},
-                        "content": {"type": "string"},
-                        "reasoning": {"type": "string"}
-                    },
-                    "required": ["style", "content", "reasoning"]
-                }
+    data = await get_provider("resurrect").generate_json(
+        prompt,
+        schema={
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "style": {"type": "string"},
+                    "content": {"type": "string"},
+                    "reasoning": {"type": "string"}
+                },
+                "required": ["style", "content", "reasoning"]
             }
-        )
+        },
+        max_output_tokens=output_limit("resurrect"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return [ResurrectionVariant(**item) for item in data]
     return []
 
 
 async def analyze_why_it_works(content: str, audience_persona: str) -> DeepAnalysis:
     """Deep psychological analysis of content."""
-    client = _get_client()
-    
+    content, audience_persona = fit_parts(
+        [PromptPart(content, share=0.85), PromptPart(audience_persona, share=0.15, priority=1)],
+        input_budget("analyze"),
+    )
     prompt = f'Analyze why this text works for audience: "{audience_persona}". Text: "{content}"'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "overallScore": {"type": "number"},
-                    "cognitiveBiases": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string"},
-                                "description": {"type": "string"}
-                            },
-                            "required": ["name", "description"]
-                        }
-                    },
-                    "copyTriggers": {"type": "array", "items": {"type": "string"}},
-                    "improvementTips": {"type": "array", "items": {"type": "string"}},
-                    "audienceReaction": {"type": "string"}
+    data = await get_provider("analyze").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "overallScore": {"type": "number"},
+                "cognitiveBiases": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "description": {"type": "string"}
+                        },
+                        "required": ["name", "description"]
+                    }
                 },
-                "required": ["overallScore", "cognitiveBiases", "copyTriggers", "improvementTips", "audienceReaction"]
-            }
-        )
+                "copyTriggers": {"type": "array", "items": {"type": "string"}},
+                "improvementTips": {"type": "array", "items": {"type": "string"}},
+                "audienceReaction": {"type": "string"}
+            },
+            "required": ["overallScore", "cognitiveBiases", "copyTriggers", "improvementTips", "audienceReaction"]
+        },
+        max_output_tokens=output_limit("analyze"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return DeepAnalysis(**data)
     
     raise ValueError("Analysis failed")
@@ -441,77 +935,65 @@ async def analyze_why_it_works(content: str, audience_persona: str) -> DeepAnaly
 
 async def generate_seo_keywords(topic: str, region: str) -> List[SEOKeyword]:
     """Generate SEO keywords for a topic."""
-    client = _get_client()
-    
     prompt = f'Generate 8 SEO keywords for "{topic}" in {region}.'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "term": {"type": "string"},
-                        "intent": {"type": "string"},
-                        "difficulty": {"type": "number"},
-                        "volume": {"type": "string"},
-                        "potential": {"type": "number"},
-                        "trend": {"type": "string"}
-                    },
-                    "required": ["term", "intent", "difficulty", "volume", "potential", "trend"]
-                }
+    data = await get_provider("seo_keywords").generate_json(
+        prompt,
+        schema={
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "term": {"type": "string"},
+                    "intent": {"type": "string"},
+                    "difficulty": {"type": "number"},
+                    "volume": {"type": "string"},
+                    "potential": {"type": "number"},
+                    "trend": {"type": "string"}
+                },
+                "required": ["term", "intent", "difficulty", "volume", "potential", "trend"]
             }
-        )
+        },
+        max_output_tokens=output_limit("seo_keywords"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return [SEOKeyword(**item) for item in data]
     return []
 
 
 async def perform_seo_audit(content: str, target_keyword: str) -> SEOAudit:
     """Perform SEO audit on content."""
-    client = _get_client()
-    
-    prompt = f'Perform SEO Audit for keyword "{target_keyword}". Text: "{content[:3000]}"'
-    
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "score": {"type": "number"},
-                    "breakdown": {
-                        "type": "object",
-                        "properties": {
-                            "technical": {"type": "number"},
-                            "content": {"type": "number"},
-                            "ux": {"type": "number"},
-                            "readability": {"type": "number"}
-                        },
-                        "required": ["technical", "content", "ux", "readability"]
+    prompt = f'Perform SEO Audit for keyword "{target_keyword}". Text: "{trim_to_tokens(content, input_budget("seo_audit"))}"'
+    
+    data = await get_provider("seo_audit").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "score": {"type": "number"},
+                "breakdown": {
+                    "type": "object",
+                    "properties": {
+                        "technical": {"type": "number"},
+                        "content": {"type": "number"},
+                        "ux": {"type": "number"},
+                        "readability": {"type": "number"}
                     },
-                    "keywordDensity": {"type": "number"},
-                    "readabilityScore": {"type": "number"},
-                    "missingLSI": {"type": "array", "items": {"type": "string"}},
-                    "suggestions": {"type": "array", "items": {"type": "string"}},
-                    "sentiment": {"type": "string"}
+                    "required": ["technical", "content", "ux", "readability"]
                 },
-                "required": ["score", "breakdown", "keywordDensity", "readabilityScore", "missingLSI", "suggestions", "sentiment"]
-            }
-        )
+                "keywordDensity": {"type": "number"},
+                "readabilityScore": {"type": "number"},
+                "missingLSI": {"type": "array", "items": {"type": "string"}},
+                "suggestions": {"type": "array", "items": {"type": "string"}},
+                "sentiment": {"type": "string"}
+            },
+            "required": ["score", "breakdown", "keywordDensity", "readabilityScore", "missingLSI", "suggestions", "sentiment"]
+        },
+        max_output_tokens=output_limit("seo_audit"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return SEOAudit(**data)
     
     raise ValueError("SEO Audit failed")
@@ -519,62 +1001,66 @@ async def perform_seo_audit(content: str, target_keyword: str) -> SEOAudit:
 
 async def generate_seo_meta_tags(content: str, keyword: str) -> List[SEOMeta]:
     """Generate SEO meta tags."""
-    client = _get_client()
-    
-    prompt = f'Generate 3 SEO Meta Tags for "{keyword}". Context: "{content[:500]}"'
+    prompt = f'Generate 3 SEO Meta Tags for "{keyword}". Context: "{trim_to_tokens(content, input_budget("seo_meta"))}"'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "description": {"type": "string"},
-                        "type": {"type": "string"}
-                    },
-                    "required": ["title", "description", "type"]
-                }
+    data = await get_provider("seo_meta").generate_json(
+        prompt,
+        schema={
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "type": {"type": "string"}
+                },
+                "required": ["title", "description", "type"]
             }
-        )
+        },
+        max_output_tokens=output_limit("seo_meta"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
-        return [SEOMeta(**item) for item in data]
+    if data is not None:
+        tags = [SEOMeta(**item) for item in data]
+        
+        # Titles take even indexes and descriptions odd ones, fixed in a single call
+        segments = []
+        for i, tag in enumerate(tags):
+            segments.append(Segment(2 * i, tag.title, len(tag.title), META_TITLE_MAX_CHARS))
+            segments.append(Segment(2 * i + 1, tag.description, len(tag.description), META_DESCRIPTION_MAX_CHARS))
+        fixes = await shorten_segments(segments, "SEO meta title or description")
+        for i, tag in enumerate(tags):
+            tag.title = fixes.get(2 * i, tag.title)
+            tag.description = fixes.get(2 * i + 1, tag.description)
+        return tags
     return []
 
 
 async def analyze_competitor_gap(my_content: str, competitor_content: str) -> SEOGapAnalysis:
     """Analyze content gap with competitor."""
-    client = _get_client()
-    
-    prompt = f'Perform SEO Gap Analysis. Mine: "{my_content[:1500]}". Theirs: "{competitor_content[:1500]}"'
-    
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "missingTopics": {"type": "array", "items": {"type": "string"}},
-                    "competitorStrengths": {"type": "array", "items": {"type": "string"}},
-                    "yourOpportunities": {"type": "array", "items": {"type": "string"}},
-                    "strategicAdvice": {"type": "string"}
-                },
-                "required": ["missingTopics", "competitorStrengths", "yourOpportunities", "strategicAdvice"]
-            }
-        )
+    # Each side keeps at least half the budget; the competitor's page is trimmed first
+    my_content, competitor_content = fit_parts(
+        [PromptPart(my_content, share=0.5, priority=1), PromptPart(competitor_content, share=0.5)],
+        input_budget("seo_gap"),
+    )
+    prompt = f'Perform SEO Gap Analysis. Mine: "{my_content}". Theirs: "{competitor_content}"'
+    
+    data = await get_provider("seo_gap").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "missingTopics": {"type": "array", "items": {"type": "string"}},
+                "competitorStrengths": {"type": "array", "items": {"type": "string"}},
+                "yourOpportunities": {"type": "array", "items": {"type": "string"}},
+                "strategicAdvice": {"type": "string"}
+            },
+            "required": ["missingTopics", "competitorStrengths", "yourOpportunities", "strategicAdvice"]
+        },
+        max_output_tokens=output_limit("seo_gap"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return SEOGapAnalysis(**data)
     
     raise ValueError("Gap Analysis failed")
@@ -582,57 +1068,51 @@ async def analyze_competitor_gap(my_content: str, competitor_content: str) -> SE
 
 async def generate_backlink_strategy(domain: str, niche: str) -> BacklinkStrategy:
     """Generate backlink strategy."""
-    client = _get_client()
-    
     prompt = f'Backlink strategy for {domain} in {niche}.'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "linkableAssets": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "title": {"type": "string"},
-                                "type": {"type": "string"},
-                                "description": {"type": "string"}
-                            },
-                            "required": ["title", "type", "description"]
-                        }
-                    },
-                    "outreachTargets": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "type": {"type": "string"},
-                                "reason": {"type": "string"}
-                            },
-                            "required": ["type", "reason"]
-                        }
-                    },
-                    "emailTemplate": {
+    data = await get_provider("backlinks").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "linkableAssets": {
+                    "type": "array",
+                    "items": {
                         "type": "object",
                         "properties": {
-                            "subject": {"type": "string"},
-                            "body": {"type": "string"}
+                            "title": {"type": "string"},
+                            "type": {"type": "string"},
+                            "description": {"type": "string"}
                         },
-                        "required": ["subject", "body"]
+                        "required": ["title", "type", "description"]
                     }
                 },
-                "required": ["linkableAssets", "outreachTargets", "emailTemplate"]
-            }
-        )
+                "outreachTargets": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "type": {"type": "string"},
+                            "reason": {"type": "string"}
+                        },
+                        "required": ["type", "reason"]
+                    }
+                },
+                "emailTemplate": {
+                    "type": "object",
+                    "properties": {
+                        "subject": {"type": "string"},
+                        "body": {"type": "string"}
+                    },
+                    "required": ["subject", "body"]
+                }
+            },
+            "required": ["linkableAssets", "outreachTargets", "emailTemplate"]
+        },
+        max_output_tokens=output_limit("backlinks"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return BacklinkStrategy(**data)
     
     raise ValueError("Backlink strategy failed")
@@ -640,31 +1120,25 @@ async def generate_backlink_strategy(domain: str, niche: str) -> BacklinkStrateg
 
 async def generate_local_seo_audit(business_name: str, location: str, business_type: str) -> LocalSEO:
     """Generate local SEO recommendations."""
-    client = _get_client()
-    
     prompt = f'Local SEO for {business_name} in {location} ({business_type}).'
     
-    response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {
-                    "gmbTitle": {"type": "string"},
-                    "categories": {"type": "array", "items": {"type": "string"}},
-                    "description": {"type": "string"},
-                    "citationOpportunities": {"type": "array", "items": {"type": "string"}},
-                    "postsIdeas": {"type": "array", "items": {"type": "string"}}
-                },
-                "required": ["gmbTitle", "categories", "description", "citationOpportunities", "postsIdeas"]
-            }
-        )
+    data = await get_provider("local_seo").generate_json(
+        prompt,
+        schema={
+            "type": "object",
+            "properties": {
+                "gmbTitle": {"type": "string"},
+                "categories": {"type": "array", "items": {"type": "string"}},
+                "description": {"type": "string"},
+                "citationOpportunities": {"type": "array", "items": {"type": "string"}},
+                "postsIdeas": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["gmbTitle", "categories", "description", "citationOpportunities", "postsIdeas"]
+        },
+        max_output_tokens=output_limit("local_seo"),
     )
     
-    if response.text:
-        data = json.loads(response.text)
+    if data is not None:
         return LocalSEO(**data)
     
     raise ValueError("Local SEO failed")
@@ -0,0 +1,441 @@
+"""
+History Store - Storage backends for content history rows and their blobs.
+
+HISTORY_BACKEND picks where saved content lives:
+- "supabase": the `content_history` and `content_blobs` tables (default)
+- "sqlite":   a local database at HISTORY_DB_PATH, for air-gapped self-hosting and
+              load tests without a Supabase project
+
+The SQLite store runs in WAL mode with an index on (user_id, created_at). Reads
+run on a small thread pool with one connection per thread. Writes are queued to a
+single writer thread that commits everything waiting in one transaction (up to
+HISTORY_DB_BATCH_SIZE), so concurrent saves share an fsync instead of queueing
+on the write lock. Pair it with SEARCH_BACKEND=sqlite for a fully local setup.
+The Supabase store runs each blocking supabase-py request in a worker thread.
+"""
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+from ..config import get_settings
+
+
+class HistoryStore(ABC):
+    """Interface behind the history and blob functions in auth.py and blobs.py.
+
+    Rows are plain dicts shaped like ContentHistoryResponse plus the blob columns
+    (`content_hash`, `preview`, `image_hash`).
+    """
+
+    name = "store"
+
+    @abstractmethod
+    async def insert_history(self, data: dict) -> Optional[dict]:
+        """Insert a row; returns it with `id` and `created_at` filled in."""
+
+    @abstractmethod
+    async def list_history(self, user_id: str, limit: int) -> List[dict]:
+        """A user's newest rows first."""
+
+    @abstractmethod
+    async def page_history(
+        self, user_id: str, limit: int, after: Optional[Tuple[str, str]] = None
+    ) -> List[dict]:
+        """Keyset page of a user's rows, newest first by (created_at, id), strictly
+        after the `(created_at, id)` of the previous page's last row."""
+
+    @abstractmethod
+    async def get_history(self, user_id: str, content_id: str) -> Optional[dict]:
+        """One of the user's rows, or None."""
+
+    @abstractmethod
+    async def delete_history(self, user_id: str, content_id: str) -> bool:
+        """Delete one of the user's rows; False when there was none."""
+
+    @abstractmethod
+    async def update_psychology(self, user_id: str, content_id: str, psychology: dict) -> bool:
+        """Attach psychology scores to a row; False when the user has no such row."""
+
+    @abstractmethod
+    async def put_blob(self, digest: str, codec: str, payload: str, raw_size: int) -> None:
+        """Store a blob unless one with this hash exists."""
+
+    @abstractmethod
+    async def get_blobs(self, hashes: List[str]) -> List[dict]:
+        """Rows of `hash`, `codec` and `data` for the given hashes."""
+
+    @abstractmethod
+    async def delete_unreferenced_blobs(self, hashes: List[str]) -> int:
+        """Delete those of the given blobs no history row points at; returns how many."""
+
+    def close(self) -> None:
+        pass
+
+
+# ============== SUPABASE ==============
+
+class SupabaseHistoryStore(HistoryStore):
+    name = "supabase"
+
+    @staticmethod
+    def _client():
+        from .auth import get_supabase_admin_client
+        return get_supabase_admin_client()
+
+    @staticmethod
+    async def _execute(operation: str, table: str, query):
+        """Run a built supabase-py query; its HTTP call blocks, so it runs in a worker thread."""
+        from .auth import supabase_span
+        with supabase_span(operation, table):
+            return await asyncio.to_thread(query.execute)
+
+    async def insert_history(self, data: dict) -> Optional[dict]:
+        result = await self._execute(
+            "insert", "content_history", self._client().table("content_history").insert(data)
+        )
+        return result.data[0] if result.data else None
+
+    async def list_history(self, user_id: str, limit: int) -> List[dict]:
+        query = self._client().table("content_history") \
+            .select("*") \
+            .eq("user_id", user_id) \
+            .order("created_at", desc=True) \
+            .limit(limit)
+        result = await self._execute("select", "content_history", query)
+        return result.data or []
+
+    async def page_history(
+        self, user_id: str, limit: int, after: Optional[Tuple[str, str]] = None
+    ) -> List[dict]:
+        query = self._client().table("content_history") \
+            .select("*") \
+            .eq("user_id", user_id)
+        if after:
+            created_at, content_id = after
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{content_id})'
+            )
+        query = query \
+            .order("created_at", desc=True) \
+            .order("id", desc=True) \
+            .limit(limit)
+        result = await self._execute("select", "content_history", query)
+        return result.data or []
+
+    async def get_history(self, user_id: str, content_id: str) -> Optional[dict]:
+        query = self._client().table("content_history") \
+            .select("*") \
+            .eq("id", content_id) \
+            .eq("user_id", user_id) \
+            .limit(1)
+        result = await self._execute("select", "content_history", query)
+        return result.data[0] if result.data else None
+
+    async def delete_history(self, user_id: str, content_id: str) -> bool:
+        query = self._client().table("content_history") \
+            .delete() \
+            .eq("id", content_id) \
+            .eq("user_id", user_id)
+        result = await self._execute("delete", "content_history", query)
+        return bool(result.data)
+
+    async def update_psychology(self, user_id: str, content_id: str, psychology: dict) -> bool:
+        query = self._client().table("content_history") \
+            .update({"psychology": psychology}) \
+            .eq("id", content_id) \
+            .eq("user_id", user_id)
+        result = await self._execute("update", "content_history", query)
+        return bool(result.data)
+
+    async def put_blob(self, digest: str, codec: str, payload: str, raw_size: int) -> None:
+        query = self._client().table("content_blobs").upsert(
+            {"hash": digest, "codec": codec, "data": payload, "raw_size": raw_size},
+            on_conflict="hash",
+            ignore_duplicates=True,
+        )
+        await self._execute("upsert", "content_blobs", query)
+
+    async def get_blobs(self, hashes: List[str]) -> List[dict]:
+        query = self._client().table("content_blobs") \
+            .select("hash, codec, data") \
+            .in_("hash", hashes)
+        result = await self._execute("select", "content_blobs", query)
+        return result.data or []
+
+    async def delete_unreferenced_blobs(self, hashes: List[str]) -> int:
+        # One statement in Postgres (see README), so a concurrent save cannot slip in between
+        query = self._client().rpc("delete_unreferenced_blobs", {"p_hashes": hashes})
+        result = await self._execute("rpc", "content_blobs", query)
+        return result.data or 0
+
+
+# ============== SQLITE ==============
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_history (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    format TEXT NOT NULL,
+    original_title TEXT,
+    content TEXT,
+    content_hash TEXT REFERENCES content_blobs(hash),
+    preview TEXT,
+    image_url TEXT,
+    image_hash TEXT REFERENCES content_blobs(hash),
+    psychology TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_content_history_user_created
+    ON content_history(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_content_history_content_hash ON content_history(content_hash);
+CREATE INDEX IF NOT EXISTS idx_content_history_image_hash ON content_history(image_hash);
+CREATE TABLE IF NOT EXISTS content_blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    data TEXT NOT NULL,
+    raw_size INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = (
+    "id", "user_id", "format", "original_title", "content", "content_hash",
+    "preview", "image_url", "image_hash", "psychology", "created_at",
+)
+
+_Write = Callable[[sqlite3.Connection], object]
+
+
+def _row(cursor: sqlite3.Cursor, values: tuple) -> dict:
+    row = {column[0]: value for column, value in zip(cursor.description, values)}
+    if row.get("psychology") is not None:
+        row["psychology"] = json.loads(row["psychology"])
+    return row
+
+
+class SQLiteHistoryStore(HistoryStore):
+    name = "sqlite"
+
+    def __init__(self, path: str, readers: int = 4, batch_size: int = 64, busy_timeout: float = 10):
+        self.path = path
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="history-read")
+        self._writes: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="history-write", daemon=True)
+        self._writer.start()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # Writes: one thread, one transaction per batch of whatever is queued
+
+    def _write_loop(self) -> None:
+        conn = self._conn()
+        while True:
+            item = self._writes.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._writes.put(None)
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+
+    @staticmethod
+    def _commit(conn: sqlite3.Connection, batch: List[tuple]) -> None:
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for write, future in batch:
+                # A savepoint per write, so one failing statement does not undo the batch
+                conn.execute("SAVEPOINT write")
+                try:
+                    results.append((future, write(conn), None))
+                    conn.execute("RELEASE write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN (database locked past the busy timeout), a write or COMMIT failed:
+            # fail the whole batch but keep the writer thread alive for the next one
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception:
+                    pass
+            results = [(future, None, e) for _, future in batch]
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def _write(self, write: _Write):
+        future: Future = Future()
+        self._writes.put((write, future))
+        return await asyncio.wrap_future(future)
+
+    async def _read(self, read: Callable[[sqlite3.Connection], object]):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: read(self._conn()))
+
+    async def insert_history(self, data: dict) -> Optional[dict]:
+        row = {column: data.get(column) for column in _COLUMNS}
+        row["id"] = str(uuid.uuid4())
+        row["created_at"] = datetime.now(timezone.utc).isoformat()
+        values = dict(row, psychology=json.dumps(row["psychology"]) if row["psychology"] is not None else None)
+
+        def write(conn: sqlite3.Connection):
+            conn.execute(
+                f"INSERT INTO content_history ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join(':' + c for c in _COLUMNS)})",
+                values,
+            )
+        await self._write(write)
+        return row
+
+    async def list_history(self, user_id: str, limit: int) -> List[dict]:
+        def read(conn: sqlite3.Connection):
+            cursor = conn.execute(
+                "SELECT * FROM content_history WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, limit),
+            )
+            return [_row(cursor, values) for values in cursor.fetchall()]
+        return await self._read(read)
+
+    async def page_history(
+        self, user_id: str, limit: int, after: Optional[Tuple[str, str]] = None
+    ) -> List[dict]:
+        def read(conn: sqlite3.Connection):
+            if after:
+                cursor = conn.execute(
+                    "SELECT * FROM content_history WHERE user_id = ? AND (created_at, id) < (?, ?) "
+                    "ORDER BY created_at DESC, id DESC LIMIT ?",
+                    (user_id, after[0], after[1], limit),
+                )
+            else:
+                cursor = conn.execute(
+                    "SELECT * FROM content_history WHERE user_id = ? "
+                    "ORDER BY created_at DESC, id DESC LIMIT ?",
+                    (user_id, limit),
+                )
+            return [_row(cursor, values) for values in cursor.fetchall()]
+        return await self._read(read)
+
+    async def get_history(self, user_id: str, content_id: str) -> Optional[dict]:
+        def read(conn: sqlite3.Connection):
+            cursor = conn.execute(
+                "SELECT * FROM content_history WHERE id = ? AND user_id = ?", (content_id, user_id)
+            )
+            values = cursor.fetchone()
+            return _row(cursor, values) if values else None
+        return await self._read(read)
+
+    async def delete_history(self, user_id: str, content_id: str) -> bool:
+        def write(conn: sqlite3.Connection):
+            return conn.execute(
+                "DELETE FROM content_history WHERE id = ? AND user_id = ?", (content_id, user_id)
+            ).rowcount == 1
+        return await self._write(write)
+
+    async def update_psychology(self, user_id: str, content_id: str, psychology: dict) -> bool:
+        def write(conn: sqlite3.Connection):
+            return conn.execute(
+                "UPDATE content_history SET psychology = ? WHERE id = ? AND user_id = ?",
+                (json.dumps(psychology), content_id, user_id),
+            ).rowcount == 1
+        return await self._write(write)
+
+    async def put_blob(self, digest: str, codec: str, payload: str, raw_size: int) -> None:
+        def write(conn: sqlite3.Connection):
+            conn.execute(
+                "INSERT OR IGNORE INTO content_blobs (hash, codec, data, raw_size) VALUES (?, ?, ?, ?)",
+                (digest, codec, payload, raw_size),
+            )
+        await self._write(write)
+
+    async def get_blobs(self, hashes: List[str]) -> List[dict]:
+        def read(conn: sqlite3.Connection):
+            cursor = conn.execute(
+                f"SELECT hash, codec, data FROM content_blobs WHERE hash IN ({', '.join('?' for _ in hashes)})",
+                hashes,
+            )
+            return [_row(cursor, values) for values in cursor.fetchall()]
+        return await self._read(read)
+
+    async def delete_unreferenced_blobs(self, hashes: List[str]) -> int:
+        marks = ", ".join("?" for _ in hashes)
+
+        def write(conn: sqlite3.Connection):
+            return conn.execute(
+                f"DELETE FROM content_blobs WHERE hash IN ({marks}) AND NOT EXISTS ("
+                "SELECT 1 FROM content_history h "
+                "WHERE h.content_hash = content_blobs.hash OR h.image_hash = content_blobs.hash)",
+                hashes,
+            ).rowcount
+        return await self._write(write)
+
+    def close(self) -> None:
+        """Commit whatever is queued, then stop the writer and readers."""
+        self._writes.put(None)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """The configured history backend (one per process)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                if settings.history_backend == "sqlite":
+                    _store = SQLiteHistoryStore(
+                        settings.history_db_path,
+                        readers=settings.history_db_readers,
+                        batch_size=settings.history_db_batch_size,
+                    )
+                elif settings.history_backend == "supabase":
+                    _store = SupabaseHistoryStore()
+                else:
+                    raise ValueError(f"Unknown history backend: {settings.history_backend}")
+    return _store
+
+
+def close_history_store() -> None:
+    """Flush and close the history backend on shutdown."""
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
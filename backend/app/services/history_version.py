@@ -0,0 +1,28 @@
+"""
+History Version Service - Cheap per-user change counter for history caches.
+
+Every save or delete bumps the user's version, so HTTP ETags and other cache layers
+can tell whether a user's history changed without querying Supabase. Counters live
+in the shared state store and start from a random base, so a reset store never
+reissues a version a client may still hold.
+"""
+import secrets
+
+from .shared_state import get_async_shared_store
+
+_NAMESPACE = "history_version"
+
+
+async def _ensure(user_id: str) -> int:
+    return (await get_async_shared_store().setdefault(_NAMESPACE, user_id, secrets.randbits(48))).value
+
+
+async def get_history_version(user_id: str) -> int:
+    """Current history version for a user."""
+    return await _ensure(user_id)
+
+
+async def bump_history_version(user_id: str) -> int:
+    """Mark a user's history as changed; returns the new version."""
+    await _ensure(user_id)
+    return await get_async_shared_store().incr(_NAMESPACE, user_id)
@@ -0,0 +1,138 @@
+"""
+Idempotency Service - Replay-safe generation requests (Idempotency-Key header).
+
+A client that retries a timed-out /generate or /generate-batch with the same
+Idempotency-Key gets the first run's response instead of a second generation
+and a duplicate history row:
+
+- the first request claims the key in the shared store and runs
+- a duplicate that arrives while it runs waits for it (on the same worker it
+  awaits the running task, on another worker it polls the store)
+- a later duplicate is answered from the stored response for IDEMPOTENCY_TTL_SECONDS
+  (at most IDEMPOTENCY_MAX_ENTRIES responses are kept; the oldest finished ones go
+  first, a running claim is never evicted)
+
+Keys are scoped to the user and endpoint. Reusing a key with a different request
+body is rejected with 422. A failed run releases its key so the client can retry;
+a claim whose worker died expires after IDEMPOTENCY_PENDING_SECONDS.
+"""
+import asyncio
+import hashlib
+import json
+import secrets
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from ..config import get_settings
+from .shared_state import AsyncSharedStore, get_async_shared_store
+
+_NAMESPACE = "idempotency"
+MAX_KEY_LENGTH = 255
+
+# Per-worker: runs in progress, so same-worker duplicates await them instead of polling
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Hash of everything that defines a request, to detect a key reused for another one."""
+    payload = json.dumps(jsonable_encoder(parts), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _store_key(scope: str, user_id: Optional[str], key: str) -> str:
+    return hashlib.sha256(f"{user_id or ''}\0{scope}\0{key}".encode("utf-8")).hexdigest()
+
+
+async def _evict(store: AsyncSharedStore, store_key: str, overflow: int) -> None:
+    """Delete the `overflow` oldest finished responses. Pending claims are kept:
+    deleting one would let a retry run the request a second time."""
+    kept = 0
+    while overflow > 0:
+        keys = await store.oldest_keys(_NAMESPACE, overflow, kept)
+        if not keys:
+            return
+        for old_key in keys:
+            if old_key == store_key:
+                kept += 1
+                continue
+            entry = await store.get(_NAMESPACE, old_key)
+            if entry is not None and entry.value["state"] != "done":
+                kept += 1
+                continue
+            # Expired entries are dropped too, but they were not counted
+            await store.delete(_NAMESPACE, old_key)
+            if entry is not None:
+                overflow -= 1
+
+
+async def _own(store_key: str, fingerprint: str, run: Callable[[], Awaitable[Any]]) -> Any:
+    settings = get_settings()
+    store = get_async_shared_store()
+    try:
+        value = jsonable_encoder(await run())
+    except BaseException:
+        # Let the client retry a failed (or cancelled) run with the same key
+        await store.delete(_NAMESPACE, store_key)
+        raise
+    await _evict(store, store_key, await store.count(_NAMESPACE) - settings.idempotency_max_entries + 1)
+    await store.set(
+        _NAMESPACE, store_key,
+        {"state": "done", "fingerprint": fingerprint, "response": value},
+        settings.idempotency_ttl_seconds,
+    )
+    return value
+
+
+async def run_idempotent(
+    scope: str,
+    key: Optional[str],
+    user_id: Optional[str],
+    fingerprint: str,
+    run: Callable[[], Awaitable[Any]],
+) -> Tuple[Any, bool]:
+    """Run `run()` at most once per key; returns (response, replayed)."""
+    if not key:
+        return await run(), False
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key is longer than {MAX_KEY_LENGTH} characters")
+
+    settings = get_settings()
+    store = get_async_shared_store()
+    store_key = _store_key(scope, user_id, key)
+    deadline = time.monotonic() + settings.idempotency_pending_seconds
+    while True:
+        claim = secrets.token_hex(8)
+        entry = await store.setdefault(
+            _NAMESPACE, store_key,
+            {"state": "pending", "fingerprint": fingerprint, "claim": claim},
+            settings.idempotency_pending_seconds,
+        )
+        if entry is None:
+            # Released between the insert and the read; claim again
+            continue
+        record = entry.value
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if record["state"] == "done":
+            return record["response"], True
+        if record.get("claim") == claim:
+            task = asyncio.ensure_future(_own(store_key, fingerprint, run))
+            _inflight[store_key] = task
+            task.add_done_callback(lambda _: _inflight.pop(store_key, None))
+            return await asyncio.shield(task), False
+
+        task = _inflight.get(store_key)
+        if task is not None:
+            try:
+                return await asyncio.shield(task), True
+            except HTTPException:
+                raise
+            except Exception:
+                # The first run failed and released the key; this duplicate runs it again
+                continue
+        if time.monotonic() > deadline:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(settings.idempotency_poll_seconds)
@@ -0,0 +1,82 @@
+"""
+Adaptive Concurrency Limit - AIMD control of concurrent model calls.
+
+The scheduler's in-flight cap follows this limit instead of a fixed number:
+
+- additive increase: each call that completes near the baseline latency adds
+  1/limit, so the limit grows by about one per window of calls
+- multiplicative decrease: a latency spike (short-term average above
+  MODEL_LATENCY_SPIKE_FACTOR x baseline) cuts the limit by 10%, an upstream
+  429 halves it; cuts are spaced at least one smoothed latency apart so one
+  burst of failures counts once
+
+The baseline is a slow-moving estimate of the no-load latency. It drops at once
+to faster samples and creeps up otherwise, so it follows genuine shifts in
+response size without absorbing the queueing delay it is meant to detect.
+"""
+import time
+from typing import Optional
+
+
+class AdaptiveLimit:
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        spike_factor: float = 3.0,
+        enabled: bool = True,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.spike_factor = spike_factor
+        self.enabled = enabled
+        self.limit = float(initial if enabled else max_limit)
+        self.baseline: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.quota_errors = 0
+        self.spikes = 0
+        self._last_cut = 0.0
+
+    @property
+    def value(self) -> int:
+        return max(1, int(self.limit))
+
+    def _cut(self, factor: float) -> bool:
+        now = time.monotonic()
+        if now - self._last_cut < (self.latency or 0.0):
+            return False
+        self._last_cut = now
+        self.limit = max(self.min_limit, self.limit * factor)
+        return True
+
+    def on_success(self, latency: float) -> None:
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            self.baseline += 0.01 * (latency - self.baseline)
+        if not self.enabled:
+            return
+        if self.latency > self.baseline * self.spike_factor:
+            if self._cut(0.9):
+                self.spikes += 1
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_quota_error(self) -> None:
+        self.quota_errors += 1
+        if self.enabled:
+            self._cut(0.5)
+
+    def stats(self) -> dict:
+        return {
+            "adaptive": self.enabled,
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "baseline_ms": round(self.baseline * 1000, 1) if self.baseline is not None else None,
+            "latency_spikes": self.spikes,
+            "quota_errors": self.quota_errors,
+        }
@@ -0,0 +1,127 @@
+"""
+LLM Provider Layer - Pluggable model backends, routed per task.
+
+Every model call names the task it serves ("generate", "modify", "seo_meta", ...)
+and asks `get_provider(task)` for a backend. LLM_ROUTES maps tasks to providers,
+e.g. "seo_meta=local,hooks=local,shorten=local"; unlisted tasks go to
+LLM_DEFAULT_PROVIDER. Provider names:
+
+- gemini:       google-genai (see gemini.py)
+- local:        an OpenAI-compatible model server such as llama.cpp, Ollama or
+                vLLM at LOCAL_LLM_URL (see local_llm.py)
+- module:Class: any LLMProvider subclass, e.g. an in-process model
+
+Tasks: generate, shorten, modify, psychology, strategy, image, hooks, emotional,
+narrative, lore, resurrect, analyze, seo_keywords, seo_audit, seo_meta, seo_gap,
+backlinks, local_seo, summarize.
+"""
+import asyncio
+import importlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from fastapi import HTTPException
+
+from ..config import get_settings
+
+# A prompt, or a list of prompt parts (strings or SDK parts such as attached files)
+Contents = Union[str, List[Any]]
+
+
+class LLMProvider:
+    """Interface for text, structured-JSON, streaming and image calls.
+
+    Subclasses implement generate_text and generate_json; streaming falls back to
+    one chunk and images are unsupported unless overridden. `max_output_tokens`
+    comes from budget.output_limit(task).
+    """
+
+    name = "provider"
+    # Whether `cached_content` names from create_editor_context_cache are understood
+    supports_context_cache = False
+
+    async def generate_text(
+        self,
+        contents: Contents,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        cached_content: Optional[str] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> str:
+        raise NotImplementedError
+
+    async def generate_json(
+        self,
+        contents: Contents,
+        schema: dict,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> Optional[Any]:
+        """Parsed JSON matching `schema`, or None when the model returned nothing."""
+        raise NotImplementedError
+
+    async def generate_candidates(
+        self,
+        contents: Contents,
+        count: int,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> List[str]:
+        """Up to `count` alternative completions of one prompt.
+
+        Providers that can sample several candidates per request override this;
+        the fallback makes `count` concurrent generate_text calls.
+        """
+        texts = await asyncio.gather(*(
+            self.generate_text(contents, system_instruction, temperature, None, span_attributes, max_output_tokens)
+            for _ in range(count)
+        ))
+        return [text for text in texts if text]
+
+    async def stream_text(
+        self,
+        contents: Contents,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        cached_content: Optional[str] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        text = await self.generate_text(
+            contents, system_instruction, temperature, cached_content, span_attributes, max_output_tokens
+        )
+        if text:
+            yield text
+
+    async def generate_image(self, prompt: str, span_attributes: Optional[dict] = None) -> Optional[str]:
+        """A base64 data URL, or None when no image came back."""
+        raise HTTPException(status_code=501, detail=f"The {self.name} provider does not generate images")
+
+
+_providers: Dict[str, LLMProvider] = {}
+
+
+def _build(spec: str) -> LLMProvider:
+    if spec == "gemini":
+        from .gemini import GeminiProvider
+        return GeminiProvider()
+    if spec == "local":
+        from .local_llm import LocalProvider
+        return LocalProvider()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown LLM provider: {spec}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def get_provider(task: str) -> LLMProvider:
+    """The provider configured for a task (one shared instance per provider)."""
+    settings = get_settings()
+    spec = settings.llm_routes_map.get(task, settings.llm_default_provider)
+    if spec not in _providers:
+        _providers[spec] = _build(spec)
+    return _providers[spec]
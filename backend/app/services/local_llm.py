@@ -0,0 +1,174 @@
+"""
+Local LLM Provider - OpenAI-compatible model server on CPU (llama.cpp, Ollama, vLLM).
+
+Small, latency-sensitive tasks (meta tags, hook ideas, length rewrites) can be
+routed here with LLM_ROUTES to skip the round-trip to Gemini. Calls are capped
+at LOCAL_LLM_CONCURRENCY per worker so a CPU-bound server is not oversubscribed;
+they do not go through the Gemini scheduler or its quota back-off.
+"""
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, AsyncIterator, List, Optional
+
+from fastapi import HTTPException
+
+from ..config import get_settings
+from ..lazy import lazy_import
+from ..timing import phase
+from ..tracing import span
+from .llm import Contents, LLMProvider
+
+if TYPE_CHECKING:
+    import httpx
+else:
+    httpx = lazy_import("httpx")
+
+
+def _text(contents: Contents) -> str:
+    """Flatten prompt parts to text; attached text files are inlined, binary ones refused."""
+    if isinstance(contents, str):
+        return contents
+    parts: List[str] = []
+    for part in contents:
+        if isinstance(part, str):
+            parts.append(part)
+            continue
+        blob = getattr(part, "inline_data", None)
+        if blob is None or not (blob.mime_type or "").startswith("text/"):
+            raise HTTPException(status_code=422, detail="The local model provider only accepts text sources")
+        parts.append(blob.data.decode("utf-8", errors="replace"))
+    return "\n\n".join(parts)
+
+
+class LocalProvider(LLMProvider):
+    name = "local"
+
+    def __init__(self):
+        settings = get_settings()
+        self.model = settings.local_llm_model
+        self._client = httpx.AsyncClient(
+            base_url=settings.local_llm_url.rstrip("/"),
+            timeout=settings.local_llm_timeout_seconds,
+        )
+        self._semaphore = asyncio.Semaphore(settings.local_llm_concurrency)
+
+    def _body(
+        self,
+        contents: Contents,
+        system_instruction: Optional[str],
+        temperature: Optional[float],
+        max_output_tokens: Optional[int],
+        **extra,
+    ) -> dict:
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": _text(contents)})
+        body = {"model": self.model, "messages": messages, **extra}
+        if temperature is not None:
+            body["temperature"] = temperature
+        if max_output_tokens is not None:
+            body["max_tokens"] = max_output_tokens
+        return body
+
+    def _span(self, span_attributes: Optional[dict]):
+        attributes = {"gen_ai.system": "local", "gen_ai.request.model": self.model}
+        if span_attributes:
+            attributes.update(span_attributes)
+        return span("local_llm.chat", **attributes)
+
+    async def _complete(self, body: dict, span_attributes: Optional[dict]) -> str:
+        return (await self._choices(body, span_attributes))[0]
+
+    async def _choices(self, body: dict, span_attributes: Optional[dict]) -> List[str]:
+        async with self._semaphore:
+            with phase("model"), self._span(span_attributes) as model_span:
+                try:
+                    response = await self._client.post("/chat/completions", json=body)
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    raise HTTPException(status_code=502, detail=f"Local model server error: {e}") from e
+                data = response.json()
+                usage = data.get("usage") or {}
+                model_span.set_attribute("gen_ai.usage.input_tokens", usage.get("prompt_tokens"))
+                model_span.set_attribute("gen_ai.usage.output_tokens", usage.get("completion_tokens"))
+                return [choice["message"].get("content") or "" for choice in data["choices"]] or [""]
+
+    async def generate_text(
+        self,
+        contents: Contents,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        cached_content: Optional[str] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> str:
+        return await self._complete(self._body(contents, system_instruction, temperature, max_output_tokens), span_attributes)
+
+    async def generate_json(
+        self,
+        contents: Contents,
+        schema: dict,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> Optional[Any]:
+        body = self._body(
+            contents, system_instruction, temperature, max_output_tokens,
+            response_format={"type": "json_schema", "json_schema": {"name": "response", "schema": schema}},
+        )
+        text = await self._complete(body, span_attributes)
+        if not text:
+            return None
+        with phase("parse"):
+            try:
+                return json.loads(text)
+            except ValueError as e:
+                raise HTTPException(status_code=502, detail="Local model returned invalid JSON") from e
+
+    async def generate_candidates(
+        self,
+        contents: Contents,
+        count: int,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> List[str]:
+        body = self._body(contents, system_instruction, temperature, max_output_tokens, n=count)
+        texts = [text for text in await self._choices(body, span_attributes) if text]
+        if len(texts) < count:
+            # Servers without `n` support (llama.cpp) answer with a single choice
+            texts += await super().generate_candidates(
+                contents, count - len(texts), system_instruction, temperature, span_attributes, max_output_tokens
+            )
+        return texts
+
+    async def stream_text(
+        self,
+        contents: Contents,
+        system_instruction: Optional[str] = None,
+        temperature: Optional[float] = None,
+        cached_content: Optional[str] = None,
+        span_attributes: Optional[dict] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        body = self._body(contents, system_instruction, temperature, max_output_tokens, stream=True)
+        async with self._semaphore:
+            with phase("model"), self._span(span_attributes):
+                try:
+                    async with self._client.stream("POST", "/chat/completions", json=body) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            payload = line[len("data:"):].strip()
+                            if payload == "[DONE]":
+                                break
+                            choices = json.loads(payload).get("choices") or [{}]
+                            text = (choices[0].get("delta") or {}).get("content")
+                            if text:
+                                yield text
+                except httpx.HTTPError as e:
+                    raise HTTPException(status_code=502, detail=f"Local model server error: {e}") from e
@@ -0,0 +1,195 @@
+"""
+Narrative Engine - Local tension and pacing curves for the Physics Engine tool.
+
+The whole text is split into beats (paragraphs, long ones cut into runs of a few
+sentences, merged down to NARRATIVE_MAX_BEATS). Per-sentence features are
+computed once and summed per beat with NumPy:
+
+- pacing (0-100): short sentences, short paragraphs and varied sentence length
+  read fast; long, even sentences read slow
+- tension (0-100): charged and negative words from a small lexicon, question,
+  exclamation and suspense punctuation density, lightly smoothed across
+  neighbouring beats
+
+Only the written `insight` for the most dramatic beats needs the model (see
+analyze_narrative_physics); every other beat gets a short local description.
+"""
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List
+
+from ..lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = lazy_import("numpy")
+
+BEAT_SENTENCES = 4
+SNIPPET_CHARS = 80
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_SENTENCE = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+_WORD = re.compile(r"[a-z']+")
+_MARKDOWN = re.compile(r"[*_`>#]+")
+
+# Words that raise the stakes (conflict, danger, urgency, surprise)
+_AROUSAL = frozenset("""
+    suddenly secret danger dangerous risk risky threat crisis urgent urgently now never
+    must last deadline warning shock shocking struggle fight battle war attack chaos
+    collapse desperate panic race trapped hidden truth mistake wrong but however until
+    unless nobody everything nothing finally breaking explode exploded critical
+""".split())
+_NEGATIVE = frozenset("""
+    fail failed failure lose lost loss pain painful fear afraid scared worst bad broke
+    broken hate angry anger problem problems death dead die dying hurt alone sad
+    terrible awful disaster wrong crash crashed fired debt sick worry worried doubt
+    regret hard impossible stuck ruin ruined
+""".split())
+_POSITIVE = frozenset("""
+    good great love happy easy calm peace simple success win won joy best better
+    relief safe comfortable glad enjoy beautiful wonderful grateful thanks smooth
+""".split())
+
+
+@dataclass
+class Beat:
+    index: int
+    text: str
+    tension: float
+    pacing: float
+    dominant: str
+
+    @property
+    def snippet(self) -> str:
+        text = " ".join(self.text.split())
+        if len(text) <= SNIPPET_CHARS:
+            return text
+        return text[:SNIPPET_CHARS].rsplit(" ", 1)[0]
+
+
+def _segment(text: str, max_beats: int):
+    """Sentences with their paragraph and beat numbers."""
+    sentences: List[str] = []
+    paragraph_of: List[int] = []
+    beat_of: List[int] = []
+    beat = -1
+    for p, paragraph in enumerate(_PARAGRAPH.split(text)):
+        lines = [l for l in paragraph.strip().splitlines() if not l.lstrip().startswith("#")]
+        paragraph = _MARKDOWN.sub("", " ".join(lines)).strip()
+        if not paragraph:
+            continue
+        for i, sentence in enumerate(s for s in _SENTENCE.split(paragraph) if s.strip()):
+            if i % BEAT_SENTENCES == 0:
+                beat += 1
+            sentences.append(sentence.strip())
+            paragraph_of.append(p)
+            beat_of.append(beat)
+
+    beat_of = np.asarray(beat_of, dtype=np.int64)
+    if beat + 1 > max_beats:
+        # Merge neighbouring beats into max_beats roughly equal runs
+        beat_of = (beat_of * max_beats) // (beat + 1)
+    return sentences, np.asarray(paragraph_of, dtype=np.int64), beat_of
+
+
+def _smooth(values: "np.ndarray") -> "np.ndarray":
+    if len(values) < 3:
+        return values
+    padded = np.pad(values, 1, mode="edge")
+    return np.convolve(padded, [0.15, 0.7, 0.15], mode="valid")
+
+
+def score_beats(text: str, max_beats: int = 48) -> List[Beat]:
+    """Split text into beats and score each for tension and pacing (0-100)."""
+    sentences, paragraph_of, beat_of = _segment(text, max_beats)
+    if not sentences:
+        return []
+    n_beats = int(beat_of[-1]) + 1
+
+    # Token-level lexicon hits, summed per sentence
+    tokens: List[str] = []
+    sentence_of_token: List[int] = []
+    for i, sentence in enumerate(sentences):
+        words = _WORD.findall(sentence.lower())
+        tokens.extend(words)
+        sentence_of_token.extend([i] * len(words))
+    tokens_arr = np.asarray(tokens)
+    token_sentence = np.asarray(sentence_of_token, dtype=np.int64)
+    n_sentences = len(sentences)
+
+    def per_sentence(lexicon: frozenset) -> "np.ndarray":
+        if not tokens:
+            return np.zeros(n_sentences)
+        hits = np.isin(tokens_arr, list(lexicon)).astype(float)
+        return np.bincount(token_sentence, weights=hits, minlength=n_sentences)
+
+    words = np.bincount(token_sentence, minlength=n_sentences).astype(float) if tokens else np.zeros(n_sentences)
+    arousal = per_sentence(_AROUSAL)
+    negative = per_sentence(_NEGATIVE)
+    positive = per_sentence(_POSITIVE)
+    questions = np.array([s.count("?") for s in sentences], dtype=float)
+    exclamations = np.array([s.count("!") for s in sentences], dtype=float)
+    suspense = np.array([s.count("...") + s.count("…") + s.count("—") + s.count(" - ") for s in sentences], dtype=float)
+
+    paragraph_words = np.bincount(paragraph_of, weights=words)[paragraph_of]
+
+    def per_beat(values: "np.ndarray") -> "np.ndarray":
+        return np.bincount(beat_of, weights=values, minlength=n_beats)
+
+    beat_sentences = np.maximum(per_beat(np.ones(n_sentences)), 1)
+    beat_words = np.maximum(per_beat(words), 1)
+    mean_words = beat_words / beat_sentences
+    spread = np.sqrt(np.maximum(per_beat(words ** 2) / beat_sentences - mean_words ** 2, 0))
+    mean_paragraph = per_beat(paragraph_words) / beat_sentences
+
+    sentence_speed = np.clip((28 - mean_words) / 22, 0, 1)
+    paragraph_speed = np.clip((160 - mean_paragraph) / 140, 0, 1)
+    variety = np.clip(spread / np.maximum(mean_words, 1), 0, 1)
+    pacing = 100 * (0.5 * sentence_speed + 0.3 * paragraph_speed + 0.2 * variety)
+
+    charged = (3.0 * per_beat(negative) + 2.5 * per_beat(arousal) - 1.5 * per_beat(positive)) / beat_words
+    marks = np.stack([
+        0.35 * per_beat(questions),
+        0.25 * per_beat(exclamations),
+        0.2 * per_beat(suspense),
+    ]) / beat_sentences
+    raw = np.maximum(charged, 0) + marks.sum(axis=0)
+    tension = _smooth(100 * np.tanh(2.5 * raw))
+
+    drivers = np.stack([np.maximum(charged, 0), marks[0], marks[1], marks[2]])
+    labels = ("charged wording", "questions", "exclamations", "suspense punctuation")
+    dominant = drivers.argmax(axis=0)
+
+    beat_text = [[] for _ in range(n_beats)]
+    for sentence, beat in zip(sentences, beat_of.tolist()):
+        beat_text[beat].append(sentence)
+    return [
+        Beat(i, " ".join(beat_text[i]), round(float(tension[i]), 1), round(float(pacing[i]), 1), labels[dominant[i]])
+        for i in range(n_beats)
+    ]
+
+
+def describe_beat(beat: Beat) -> str:
+    """A short local insight for beats the model is not asked about."""
+    if beat.pacing >= 65:
+        pace = "Fast pacing from short sentences"
+    elif beat.pacing <= 35:
+        pace = "Slow, expository pacing"
+    else:
+        pace = "Steady pacing"
+    if beat.tension >= 60:
+        return f"{pace}; high tension driven by {beat.dominant}."
+    if beat.tension >= 25:
+        return f"{pace}; tension building through {beat.dominant}."
+    return f"{pace}; a low-tension breather."
+
+
+def top_beats(beats: List[Beat], count: int) -> List[Beat]:
+    """The most dramatic beats: high tension or the sharpest change from the previous beat."""
+    if not beats or count <= 0:
+        return []
+    tension = np.array([b.tension for b in beats])
+    change = np.abs(np.diff(tension, prepend=tension[0]))
+    order = np.argsort(-(tension + change), kind="stable")[:count]
+    return [beats[i] for i in sorted(order.tolist())]
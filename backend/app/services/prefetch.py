@@ -0,0 +1,171 @@
+"""
+Prefetch Service - Speculative follow-up analyses after content generation.
+
+Once /generate returns, the UI usually asks next for /psychology, /tools/hooks or
+/seo/meta on the same content. With PREFETCH_ENABLED those calls are started in
+the background at low priority (the scheduler's bulk lane plus a small
+concurrency cap, skipped entirely while the upstream quota is backing off) and their results are kept in the shared store
+for PREFETCH_TTL_SECONDS, so the follow-up request is answered from cache.
+Hits, misses and skips are counted for the hit-ratio report: in memory per worker,
+added to the shared counters off the event loop every PREFETCH_STATS_FLUSH_SECONDS.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from ..config import get_settings
+from ..schemas import ContentFormat, ContentRequest
+from .gemini import analyze_content_psychology, generate_contextual_hooks, generate_seo_meta_tags
+from .scheduler import Lane, model_lane
+from .shared_state import get_async_shared_store, get_shared_store
+from .upstream import quota_backoff_remaining
+
+_NAMESPACE = "prefetch"
+_STATS_NAMESPACE = "prefetch_stats"
+_STATS = ("scheduled", "completed", "failed", "skipped_backoff", "hits", "misses")
+
+# Hook platform the Tools page would pick for each generated format
+HOOK_PLATFORMS = {ContentFormat.TWITTER: "Twitter/X", ContentFormat.LINKEDIN: "LinkedIn"}
+
+_TARGETS = {
+    "psychology": analyze_content_psychology,
+    # The hook prompt does not use frameworks, so they are not part of the key
+    "hooks": lambda context, platform: generate_contextual_hooks(context, platform, []),
+    "seo_meta": generate_seo_meta_tags,
+}
+
+# Per-worker: running prefetches (a follow-up may await one) and the low-priority cap
+_inflight: Dict[str, asyncio.Task] = {}
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# Per-worker: counts not yet added to the shared counters
+_pending: Dict[str, int] = {}
+_last_flush = time.monotonic()
+_flushing: Optional[asyncio.Task] = None
+
+
+def prefetch_key(kind: str, *args) -> str:
+    return hashlib.sha256(json.dumps([kind, *args], default=str).encode("utf-8")).hexdigest()
+
+
+def _write_counts(counts: Dict[str, int]) -> None:
+    store = get_shared_store()
+    for stat, amount in counts.items():
+        store.incr(_STATS_NAMESPACE, stat, amount)
+
+
+async def _flush() -> None:
+    global _flushing
+    counts = dict(_pending)
+    _pending.clear()
+    try:
+        await asyncio.to_thread(_write_counts, counts)
+    except Exception as e:
+        print(f"Prefetch stats flush failed: {e}")
+    finally:
+        _flushing = None
+
+
+def _count(stat: str) -> None:
+    global _last_flush, _flushing
+    _pending[stat] = _pending.get(stat, 0) + 1
+    now = time.monotonic()
+    if _flushing is None and now - _last_flush >= get_settings().prefetch_stats_flush_seconds:
+        _last_flush = now
+        _flushing = asyncio.create_task(_flush())
+
+
+def flush_prefetch_stats() -> None:
+    """Write this worker's pending counts now (at shutdown)."""
+    counts = dict(_pending)
+    _pending.clear()
+    _write_counts(counts)
+
+
+async def _run(kind: str, key: str, args: tuple) -> Any:
+    global _semaphore
+    settings = get_settings()
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.prefetch_concurrency)
+    store = get_async_shared_store()
+    try:
+        entry = await store.get(_NAMESPACE, key)
+        if entry:
+            # Already prefetched (possibly by another worker)
+            return entry.value
+        _count("scheduled")
+        async with _semaphore:
+            if await quota_backoff_remaining() > 0:
+                _count("skipped_backoff")
+                return None
+            with model_lane(Lane.BULK):
+                result = await _TARGETS[kind](*args)
+        value = jsonable_encoder(result)
+        await store.set(_NAMESPACE, key, value, settings.prefetch_ttl_seconds)
+        _count("completed")
+        return value
+    except Exception as e:
+        _count("failed")
+        print(f"Prefetch {kind} failed: {e}")
+        return None
+    finally:
+        _inflight.pop(key, None)
+
+
+def _schedule(kind: str, *args) -> None:
+    key = prefetch_key(kind, *args)
+    if key in _inflight:
+        return
+    # Registered before any I/O, so a follow-up arriving right away finds the task
+    _inflight[key] = asyncio.create_task(_run(kind, key, args))
+
+
+def schedule_prefetch(request: ContentRequest, format: ContentFormat, content: str) -> None:
+    """Start the likely follow-up analyses of freshly generated content (opt-in).
+
+    Cached results and the quota back-off are checked in the background tasks.
+    """
+    if not get_settings().prefetch_enabled:
+        return
+    _schedule("psychology", content)
+    _schedule("hooks", content, HOOK_PLATFORMS.get(format, "Twitter/X"))
+    if request.seo_keywords:
+        _schedule("seo_meta", content, request.seo_keywords[0])
+
+
+async def get_prefetched(kind: str, *args) -> Optional[Any]:
+    """A prefetched result (JSON-ready) for this call, waiting on one still running.
+
+    Returns None on a miss, or when prefetching is disabled.
+    """
+    if not get_settings().prefetch_enabled:
+        return None
+    key = prefetch_key(kind, *args)
+    task = _inflight.get(key)
+    value = await asyncio.shield(task) if task else None
+    if value is None:
+        entry = await get_async_shared_store().get(_NAMESPACE, key)
+        value = entry.value if entry else None
+    _count("hits" if value is not None else "misses")
+    return value
+
+
+async def get_prefetch_stats() -> dict:
+    """Counters across all workers plus the follow-up hit ratio.
+
+    Other workers' counts from the last PREFETCH_STATS_FLUSH_SECONDS are not in yet.
+    """
+    store = get_async_shared_store()
+    stats = {}
+    for stat in _STATS:
+        entry = await store.get(_STATS_NAMESPACE, stat)
+        stats[stat] = (int(entry.value) if entry else 0) + _pending.get(stat, 0)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else None
+    stats["enabled"] = get_settings().prefetch_enabled
+    stats["quota_backoff_seconds"] = round(await quota_backoff_remaining(), 1)
+    return stats
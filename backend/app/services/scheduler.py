@@ -0,0 +1,226 @@
+"""
+Model Call Scheduler - Priority lanes and per-user fair queuing for Gemini calls.
+
+Every model call waits here for a slot (per worker).
+Free slots go to the highest-priority lane with waiters:
+
+- interactive: a user is waiting on the result (inline editor)
+- standard:    single generations and analyses (the default)
+- bulk:        batches, image generation and speculative prefetch
+
+Within a lane, users are served by start-time fair queuing: each call is tagged
+with max(lane virtual time, the user's previous finish tag), so a tenant with
+many queued calls takes turns with everyone else instead of running ahead.
+Routes pick a lane with `model_lane(...)`; the user comes from authentication.
+
+The slot count follows an adaptive limit (see limiter.py). When the expected
+wait for a new call exceeds MODEL_MAX_QUEUE_WAIT_SECONDS, or a bulk call arrives
+while the upstream quota is backing off, the call is shed up front with a 503
+and a Retry-After hint instead of piling onto a saturated upstream.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional
+
+from ..config import get_settings
+from .limiter import AdaptiveLimit
+from .upstream import quota_backoff_remaining
+
+
+class Lane(str, Enum):
+    INTERACTIVE = "interactive"
+    STANDARD = "standard"
+    BULK = "bulk"
+
+
+LANE_ORDER = (Lane.INTERACTIVE, Lane.STANDARD, Lane.BULK)
+ANONYMOUS = "anonymous"
+
+_lane: ContextVar[Lane] = ContextVar("model_lane", default=Lane.STANDARD)
+_tenant: ContextVar[str] = ContextVar("model_tenant", default=ANONYMOUS)
+
+
+@contextmanager
+def model_lane(lane: Lane):
+    """Run the model calls made inside the block in the given lane."""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def set_model_tenant(user_id: Optional[str]) -> None:
+    """Attribute the current request's model calls to a user for fair queuing."""
+    _tenant.set(user_id or ANONYMOUS)
+
+
+@dataclass(order=True)
+class _Waiter:
+    start_tag: float
+    seq: int
+    user: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+@dataclass
+class _LaneStats:
+    dispatched: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def record(self, wait: float) -> None:
+        self.dispatched += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+
+class ModelScheduler:
+    """Per-process slot allocator. All methods run on the event loop."""
+
+    def __init__(self, limit: AdaptiveLimit, max_queue_wait: float):
+        self.limit = limit
+        self.max_queue_wait = max_queue_wait
+        self.inflight = 0
+        self._shed: Dict[Lane, int] = {lane: 0 for lane in Lane}
+        self._queues: Dict[Lane, List[_Waiter]] = {lane: [] for lane in Lane}
+        self._virtual_time: Dict[Lane, float] = {lane: 0.0 for lane in Lane}
+        self._user_finish: Dict[Lane, Dict[str, float]] = {lane: {} for lane in Lane}
+        self._stats: Dict[Lane, _LaneStats] = {lane: _LaneStats() for lane in Lane}
+        self._seq = itertools.count()
+
+    @property
+    def max_inflight(self) -> int:
+        return self.limit.value
+
+    def _queued(self, lane: Lane) -> int:
+        return sum(1 for w in self._queues[lane] if not w.future.done())
+
+    def _has_waiters(self) -> bool:
+        return any(self._queued(lane) for lane in Lane)
+
+    async def acquire(self, lane: Optional[Lane] = None, user: Optional[str] = None) -> None:
+        """Wait for a slot in the caller's lane (defaults come from the request context)."""
+        lane = lane or _lane.get()
+        user = user or _tenant.get()
+        if self.inflight < self.max_inflight and not self._has_waiters():
+            self.inflight += 1
+            self._stats[lane].record(0.0)
+            return
+
+        start_tag = max(self._virtual_time[lane], self._user_finish[lane].get(user, 0.0))
+        self._user_finish[lane][user] = start_tag + 1.0
+        waiter = _Waiter(start_tag, next(self._seq), user, asyncio.get_running_loop().create_future(), time.monotonic())
+        heapq.heappush(self._queues[lane], waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted a slot just as the caller went away
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self._dispatch()
+
+    def on_success(self, latency: float) -> None:
+        self.limit.on_success(latency)
+        self._dispatch()
+
+    def on_quota_error(self) -> None:
+        self.limit.on_quota_error()
+
+    async def admission_delay(self, lane: Optional[Lane] = None) -> Optional[int]:
+        """Seconds the caller should back off for, or None to admit the call."""
+        lane = lane or _lane.get()
+        retry_after = None
+        backoff = await quota_backoff_remaining() if lane == Lane.BULK else 0.0
+        if backoff > 0:
+            retry_after = math.ceil(backoff)
+        else:
+            ahead = sum(self._queued(l) for l in LANE_ORDER[:LANE_ORDER.index(lane) + 1])
+            if ahead or self.inflight >= self.max_inflight:
+                estimate = (ahead + 1) / self.max_inflight * (self.limit.latency or 0.0)
+                if estimate > self.max_queue_wait:
+                    retry_after = max(1, math.ceil(estimate))
+        if retry_after is not None:
+            self._shed[lane] += 1
+        return retry_after
+
+    def _dispatch(self) -> None:
+        while self.inflight < self.max_inflight:
+            waiter, lane = self._pop_next()
+            if waiter is None:
+                return
+            self.inflight += 1
+            self._virtual_time[lane] = waiter.start_tag
+            self._stats[lane].record(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+            self._prune(lane)
+
+    def _pop_next(self):
+        for lane in LANE_ORDER:
+            queue = self._queues[lane]
+            while queue:
+                waiter = heapq.heappop(queue)
+                if not waiter.future.done():
+                    return waiter, lane
+        return None, None
+
+    def _prune(self, lane: Lane) -> None:
+        """Forget users whose finish tags are already behind the lane's virtual time."""
+        finishes = self._user_finish[lane]
+        if len(finishes) > 1000:
+            vt = self._virtual_time[lane]
+            for user in [u for u, f in finishes.items() if f <= vt]:
+                del finishes[user]
+
+    def stats(self) -> dict:
+        lanes = {}
+        for lane in LANE_ORDER:
+            queue = [w for w in self._queues[lane] if not w.future.done()]
+            s = self._stats[lane]
+            now = time.monotonic()
+            lanes[lane.value] = {
+                "queued": len(queue),
+                "queued_users": len({w.user for w in queue}),
+                "oldest_wait_ms": round(max((now - w.enqueued_at for w in queue), default=0.0) * 1000, 1),
+                "dispatched": s.dispatched,
+                "avg_wait_ms": round(s.wait_total / s.dispatched * 1000, 1) if s.dispatched else 0.0,
+                "max_wait_ms": round(s.wait_max * 1000, 1),
+                "shed": self._shed[lane],
+            }
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "limiter": self.limit.stats(),
+            "lanes": lanes,
+        }
+
+
+_scheduler: Optional[ModelScheduler] = None
+
+
+def get_model_scheduler() -> ModelScheduler:
+    """Get this worker's scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        limit = AdaptiveLimit(
+            initial=settings.model_initial_inflight,
+            min_limit=settings.model_min_inflight,
+            max_limit=settings.model_max_inflight,
+            spike_factor=settings.model_latency_spike_factor,
+            enabled=settings.adaptive_concurrency,
+        )
+        _scheduler = ModelScheduler(limit, settings.model_max_queue_wait_seconds)
+    return _scheduler
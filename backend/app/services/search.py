@@ -0,0 +1,318 @@
+"""
+History Search Service - Full-text search over a user's content history.
+
+Two index backends are supported:
+- "postgres": the `search_vector` tsvector column on Supabase, filled through the
+  `set_content_history_search_vector` RPC and queried through the
+  `search_content_history` RPC (see README for the SQL).
+- "sqlite": a local FTS5 index for self-hosted setups. It is also used whenever
+  history is not stored on Supabase, since the tsvector lives on that table.
+
+Both are kept up to date incrementally from the history save/delete path. The
+SQLite index also backfills each user once, on their first search, by paging
+through the stored history like the export does, so rows saved before the index
+was enabled are found too.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..config import get_settings
+from .blobs import hydrate_history_rows
+from .export import iter_history
+
+SNIPPET_TOKENS = 24
+_FTS_TABLE = "content_history_fts"
+_BACKFILL_TABLE = "search_backfilled_users"
+
+_connection: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+# Per-worker: backfills in progress, so concurrent searches share one
+_backfills: Dict[str, asyncio.Task] = {}
+
+
+def _use_sqlite() -> bool:
+    settings = get_settings()
+    return settings.search_backend == "sqlite" or settings.history_backend != "supabase"
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Open (once) the local FTS5 index."""
+    global _connection
+    if _connection is None:
+        path = get_settings().search_index_path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {_FTS_TABLE} USING fts5(
+                content_id UNINDEXED,
+                user_id UNINDEXED,
+                format UNINDEXED,
+                created_at UNINDEXED,
+                original_title,
+                content,
+                tokenize = 'porter unicode61'
+            )
+        """)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_BACKFILL_TABLE} (user_id TEXT PRIMARY KEY)")
+        _connection = conn
+    return _connection
+
+
+def _to_match_query(query: str) -> str:
+    """Quote every term so user input can never break FTS5 query syntax."""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+def _highlight(text: str, query: str, width: int = SNIPPET_TOKENS) -> str:
+    """Build a <mark>-highlighted snippet around the first matching word.
+
+    Used when the body lives in blob storage and Postgres cannot headline it.
+    """
+    terms = [t.lower() for t in re.findall(r"\w+", query)]
+    words = text.split()
+
+    def matches(word: str) -> bool:
+        word = re.sub(r"\W+", "", word).lower()
+        return bool(word) and any(word.startswith(t) or t.startswith(word) for t in terms)
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, first - width // 3)
+    window = words[start:start + width]
+    snippet = " ".join(f"<mark>{w}</mark>" if matches(w) else w for w in window)
+    if start > 0:
+        snippet = "…" + snippet
+    if start + width < len(words):
+        snippet += "…"
+    return snippet
+
+
+# ============== INDEXING ==============
+
+def _index_rows(rows: List[dict]) -> None:
+    with _lock:
+        conn = _get_connection()
+        for row in rows:
+            conn.execute(f"DELETE FROM {_FTS_TABLE} WHERE content_id = ?", (str(row["id"]),))
+            conn.execute(
+                f"INSERT INTO {_FTS_TABLE} (content_id, user_id, format, created_at, original_title, content) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    str(row["id"]),
+                    str(row["user_id"]),
+                    row["format"],
+                    str(row.get("created_at") or datetime.utcnow().isoformat()),
+                    row.get("original_title") or "",
+                    row.get("content") or "",
+                ),
+            )
+        conn.commit()
+
+
+def _index_row(row: dict) -> None:
+    _index_rows([row])
+
+
+def _is_backfilled(user_id: str) -> bool:
+    with _lock:
+        row = _get_connection().execute(
+            f"SELECT 1 FROM {_BACKFILL_TABLE} WHERE user_id = ?", (user_id,)
+        ).fetchone()
+    return row is not None
+
+
+def _mark_backfilled(user_id: str) -> None:
+    with _lock:
+        conn = _get_connection()
+        conn.execute(f"INSERT OR IGNORE INTO {_BACKFILL_TABLE} (user_id) VALUES (?)", (user_id,))
+        conn.commit()
+
+
+async def _backfill(user_id: str) -> None:
+    indexed = 0
+    try:
+        async for rows in iter_history(user_id):
+            await asyncio.to_thread(_index_rows, rows)
+            indexed += len(rows)
+        await asyncio.to_thread(_mark_backfilled, user_id)
+        print(f"Search index: backfilled {indexed} history rows for {user_id}")
+    finally:
+        _backfills.pop(user_id, None)
+
+
+async def ensure_search_backfill(user_id: str) -> None:
+    """Index the user's existing history once (SQLite backend only)."""
+    if not _use_sqlite() or await asyncio.to_thread(_is_backfilled, user_id):
+        return
+    if user_id not in _backfills:
+        _backfills[user_id] = asyncio.ensure_future(_backfill(user_id))
+    await asyncio.shield(_backfills[user_id])
+
+
+def _remove_row(user_id: str, content_id: str) -> None:
+    with _lock:
+        conn = _get_connection()
+        conn.execute(
+            f"DELETE FROM {_FTS_TABLE} WHERE content_id = ? AND user_id = ?",
+            (content_id, user_id),
+        )
+        conn.commit()
+
+
+def _index_row_postgres(row: dict) -> None:
+    from .auth import get_supabase_admin_client, supabase_span
+
+    with supabase_span("rpc", "set_content_history_search_vector"):
+        get_supabase_admin_client().rpc("set_content_history_search_vector", {
+            "p_id": str(row["id"]),
+            "p_title": row.get("original_title") or "",
+            "p_content": row.get("content") or "",
+        }).execute()
+
+
+async def index_content_history(row: dict) -> None:
+    """Add a freshly saved history row to the search index.
+
+    `row` must carry the plain `content`, since stored rows only reference a blob.
+    """
+    index = _index_row if _use_sqlite() else _index_row_postgres
+    await asyncio.to_thread(index, row)
+
+
+async def remove_from_search_index(user_id: str, content_id: str) -> None:
+    """Drop a deleted history row from the search index."""
+    if _use_sqlite():
+        await asyncio.to_thread(_remove_row, user_id, content_id)
+
+
+# ============== QUERYING ==============
+
+def _search_sqlite(
+    user_id: str,
+    query: str,
+    formats: Optional[List[str]],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    limit: int,
+    offset: int,
+) -> dict:
+    where = [f"{_FTS_TABLE} MATCH ?", "user_id = ?"]
+    params: list = [_to_match_query(query), user_id]
+    if formats:
+        where.append(f"format IN ({', '.join('?' for _ in formats)})")
+        params.extend(formats)
+    if date_from:
+        where.append("created_at >= ?")
+        params.append(date_from.isoformat())
+    if date_to:
+        where.append("created_at <= ?")
+        params.append(date_to.isoformat())
+    clause = " AND ".join(where)
+
+    with _lock:
+        conn = _get_connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM {_FTS_TABLE} WHERE {clause}", params).fetchone()[0]
+        rows = conn.execute(
+            f"""
+            SELECT content_id, format, original_title, created_at,
+                   snippet({_FTS_TABLE}, 5, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}),
+                   bm25({_FTS_TABLE}, 0, 0, 0, 0, 2.0, 1.0) AS score
+            FROM {_FTS_TABLE}
+            WHERE {clause}
+            ORDER BY score
+            LIMIT ? OFFSET ?
+            """,
+            params + [limit, offset],
+        ).fetchall()
+
+    return {
+        "total": total,
+        "results": [
+            {
+                "id": content_id,
+                "format": format,
+                "original_title": original_title or None,
+                "created_at": created_at,
+                "snippet": snippet,
+                # bm25() is "lower is better"; flip it so higher rank means more relevant
+                "rank": -score,
+            }
+            for content_id, format, original_title, created_at, snippet, score in rows
+        ],
+    }
+
+
+def _search_postgres(
+    user_id: str,
+    query: str,
+    formats: Optional[List[str]],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    limit: int,
+    offset: int,
+) -> dict:
+    from .auth import get_supabase_admin_client, supabase_span
+
+    supabase = get_supabase_admin_client()
+    with supabase_span("rpc", "search_content_history"):
+        result = supabase.rpc("search_content_history", {
+            "p_user_id": user_id,
+            "p_query": query,
+            "p_formats": formats or None,
+            "p_date_from": date_from.isoformat() if date_from else None,
+            "p_date_to": date_to.isoformat() if date_to else None,
+            "p_limit": limit,
+            "p_offset": offset,
+        }).execute()
+
+    return {
+        "total": result.data[0]["total_count"] if result.data else 0,
+        "rows": result.data or [],
+    }
+
+
+async def search_content_history(
+    user_id: str,
+    query: str,
+    formats: Optional[List[str]] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict:
+    """Ranked, paginated full-text search over a user's history.
+
+    Returns {"total": int, "results": [...]} with highlighted snippets.
+    """
+    if _use_sqlite():
+        await ensure_search_backfill(user_id)
+        return await asyncio.to_thread(
+            _search_sqlite, user_id, query, formats, date_from, date_to, limit, offset
+        )
+
+    found = await asyncio.to_thread(
+        _search_postgres, user_id, query, formats, date_from, date_to, limit, offset
+    )
+    # Only the bodies on the requested page are fetched and decompressed
+    rows = await hydrate_history_rows(found["rows"])
+    return {
+        "total": found["total"],
+        "results": [
+            {
+                "id": row["id"],
+                "format": row["format"],
+                "original_title": row.get("original_title"),
+                "created_at": str(row["created_at"]),
+                "snippet": _highlight(row["content"], query),
+                "rank": row["rank"],
+            }
+            for row in rows
+        ],
+    }
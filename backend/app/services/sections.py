@@ -0,0 +1,174 @@
+"""
+Sectioned Documents - Incremental regeneration of long-form output.
+
+BLOG and NEWSLETTER results are split into H2 sections and kept server-side with
+a fingerprint per section of the inputs that shaped it (source, brand voice,
+tone, instructions and any section-specific instruction). A regenerate request
+re-runs only the sections the user marks, or, by default, the ones whose
+fingerprint changed, concurrently; every other section is stitched back verbatim.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from ..config import get_settings
+from ..schemas import ContentFormat, ContentRequest
+from .gemini import enforce_length_limits, regenerate_section
+from .shared_state import get_async_shared_store
+
+SECTIONED_FORMATS = (ContentFormat.BLOG, ContentFormat.NEWSLETTER)
+_NAMESPACE = "sectioned_document"
+_H2_RE = re.compile(r"^##(?!#)\s+.*$", re.MULTILINE)
+
+
+@dataclass
+class Section:
+    heading: str
+    text: str
+    fingerprint: str
+    instruction: Optional[str] = None
+
+
+@dataclass
+class SectionedDocument:
+    id: str
+    user_id: Optional[str]
+    format: ContentFormat
+    sections: List[Section] = field(default_factory=list)
+    version: int = 0
+
+    @property
+    def content(self) -> str:
+        return "\n\n".join(s.text for s in self.sections if s.text)
+
+    def to_state(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "format": self.format.value,
+            "sections": [s.__dict__ for s in self.sections],
+        }
+
+
+def split_sections(content: str) -> List[tuple]:
+    """(heading, text) pairs: the preamble before the first H2, then one per H2."""
+    starts = [m.start() for m in _H2_RE.finditer(content)]
+    bounds = [0] + starts + [len(content)]
+    sections = []
+    for begin, end in zip(bounds, bounds[1:]):
+        text = content[begin:end].strip()
+        if begin == 0 and not text:
+            continue
+        heading = text.split("\n", 1)[0].lstrip("#").strip() if begin in starts else "Introduction"
+        sections.append((heading, text))
+    return sections
+
+
+def _fingerprint(request: ContentRequest, format: ContentFormat, section_instruction: Optional[str] = None) -> str:
+    """Hash of every input that shapes a section's text."""
+    source = request.source_file.data if request.source_file else request.source_text
+    inputs = {
+        "format": format.value,
+        "source": hashlib.sha256(source.encode("utf-8")).hexdigest(),
+        "brand_voice": request.brand_voice.model_dump(),
+        "tone": request.tone_override,
+        "custom_instructions": request.custom_instructions,
+        "seo_keywords": request.seo_keywords,
+        "section_instruction": section_instruction,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+
+async def _get_owned(document_id: str, user_id: Optional[str]) -> SectionedDocument:
+    entry = await get_async_shared_store().get(_NAMESPACE, document_id)
+    if not entry or entry.value["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return SectionedDocument(
+        id=document_id,
+        user_id=user_id,
+        format=ContentFormat(entry.value["format"]),
+        sections=[Section(**s) for s in entry.value["sections"]],
+        version=entry.version,
+    )
+
+
+async def create_sectioned_document(
+    request: ContentRequest,
+    format: ContentFormat,
+    content: str,
+    user_id: Optional[str] = None,
+) -> SectionedDocument:
+    """Split freshly generated long-form content and keep it for later regeneration."""
+    fingerprint = _fingerprint(request, format)
+    document = SectionedDocument(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        format=format,
+        sections=[Section(heading, text, fingerprint) for heading, text in split_sections(content)],
+    )
+    settings = get_settings()
+    store = get_async_shared_store()
+    overflow = await store.count(_NAMESPACE) - settings.sectioned_document_max_entries + 1
+    if overflow > 0:
+        for old_id in await store.oldest_keys(_NAMESPACE, overflow):
+            await store.delete(_NAMESPACE, old_id)
+    document.version = await store.set(
+        _NAMESPACE, document.id, document.to_state(), settings.sectioned_document_ttl_seconds
+    )
+    return document
+
+
+async def regenerate_sections(
+    document_id: str,
+    request: ContentRequest,
+    section_indexes: Optional[List[int]] = None,
+    section_instructions: Optional[Dict[int, str]] = None,
+    user_id: Optional[str] = None,
+) -> tuple:
+    """Re-run the marked (or affected) sections under the new inputs.
+
+    Returns the updated document and the indexes that were regenerated.
+    """
+    document = await _get_owned(document_id, user_id)
+    section_instructions = section_instructions or {}
+    count = len(document.sections)
+    requested = set(section_indexes or []) | set(section_instructions)
+    if any(not 0 <= i < count for i in requested):
+        raise HTTPException(status_code=422, detail=f"Section index out of range (document has {count} sections)")
+
+    # A section keeps its own instruction until a new one is given
+    instructions = [section_instructions.get(i, s.instruction) for i, s in enumerate(document.sections)]
+    fingerprints = [_fingerprint(request, document.format, instructions[i]) for i in range(count)]
+    if section_indexes is not None or section_instructions:
+        targets = sorted(requested)
+    else:
+        targets = [i for i in range(count) if fingerprints[i] != document.sections[i].fingerprint]
+
+    outline = [s.heading for s in document.sections]
+    rewritten = await asyncio.gather(*(
+        regenerate_section(request, document.format, outline, document.sections[i].text, instructions[i])
+        for i in targets
+    ))
+    for i, text in zip(targets, rewritten):
+        h2 = _H2_RE.match(text)
+        heading = h2.group(0).lstrip("#").strip() if h2 else document.sections[i].heading
+        document.sections[i] = Section(heading, text, fingerprints[i], instructions[i])
+
+    if targets:
+        if 0 in targets:
+            # The opening section carries the blog meta description
+            document.sections[0].text = await enforce_length_limits(document.format, document.sections[0].text)
+        saved = await get_async_shared_store().replace(
+            _NAMESPACE, document.id, document.to_state(), document.version,
+            get_settings().sectioned_document_ttl_seconds,
+        )
+        if not saved:
+            raise HTTPException(status_code=409, detail="Document was regenerated concurrently")
+        document.version += 1
+
+    return document, targets
@@ -0,0 +1,230 @@
+"""
+Shared State Service - Cross-worker key/value store on SQLite (WAL).
+
+When the API runs with several uvicorn workers, in-process dicts diverge between
+processes. Anything that must be coherent across workers (editor sessions, caches,
+counters for limits) goes through this store instead. Entries are namespaced,
+carry a version for compare-and-swap updates, and expire after an optional TTL.
+
+A write can wait up to the busy timeout for another worker's lock, so async code
+uses get_async_shared_store(), which runs every call in a worker thread.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+from ..config import get_settings
+
+
+class Entry(NamedTuple):
+    value: Any
+    version: int
+
+
+class SharedStore:
+    """Small multi-process safe KV store. One connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS shared_state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_shared_state_expiry ON shared_state(expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expiry(ttl_seconds: Optional[float]) -> Optional[float]:
+        return time.time() + ttl_seconds if ttl_seconds else None
+
+    def get(self, namespace: str, key: str) -> Optional[Entry]:
+        row = self._conn().execute(
+            "SELECT value, version FROM shared_state "
+            "WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return Entry(json.loads(row[0]), row[1]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> int:
+        """Insert or overwrite; returns the new version (0 for a fresh key)."""
+        now = time.time()
+        row = self._conn().execute(
+            """
+            INSERT INTO shared_state (namespace, key, value, version, expires_at, updated_at)
+            VALUES (?, ?, ?, 0, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET
+                value = excluded.value,
+                version = CASE WHEN shared_state.expires_at IS NULL OR shared_state.expires_at > ?
+                               THEN shared_state.version + 1 ELSE 0 END,
+                expires_at = excluded.expires_at,
+                updated_at = excluded.updated_at
+            RETURNING version
+            """,
+            (namespace, key, json.dumps(value), self._expiry(ttl_seconds), now, now),
+        ).fetchone()
+        return row[0]
+
+    def setdefault(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> Entry:
+        """Insert only if the key is absent (or expired); return the live entry."""
+        now = time.time()
+        self._conn().execute(
+            """
+            INSERT INTO shared_state (namespace, key, value, version, expires_at, updated_at)
+            VALUES (?, ?, ?, 0, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET
+                value = excluded.value, version = 0,
+                expires_at = excluded.expires_at, updated_at = excluded.updated_at
+            WHERE shared_state.expires_at IS NOT NULL AND shared_state.expires_at <= ?
+            """,
+            (namespace, key, json.dumps(value), self._expiry(ttl_seconds), now, now),
+        )
+        return self.get(namespace, key)
+
+    def replace(
+        self, namespace: str, key: str, value: Any, expected_version: int,
+        ttl_seconds: Optional[float] = None,
+    ) -> bool:
+        """Compare-and-swap: write only if the entry is still at expected_version."""
+        now = time.time()
+        cursor = self._conn().execute(
+            """
+            UPDATE shared_state
+            SET value = ?, version = version + 1, expires_at = ?, updated_at = ?
+            WHERE namespace = ? AND key = ? AND version = ?
+              AND (expires_at IS NULL OR expires_at > ?)
+            """,
+            (json.dumps(value), self._expiry(ttl_seconds), now, namespace, key, expected_version, now),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, namespace: str, key: str, amount: int = 1, ttl_seconds: Optional[float] = None) -> int:
+        """Atomically add to a counter. The TTL is set when the counter is created."""
+        now = time.time()
+        row = self._conn().execute(
+            """
+            INSERT INTO shared_state (namespace, key, value, version, expires_at, updated_at)
+            VALUES (?, ?, ?, 0, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET
+                value = CASE WHEN shared_state.expires_at IS NULL OR shared_state.expires_at > ?
+                             THEN CAST(shared_state.value AS INTEGER) + ? ELSE ? END,
+                expires_at = CASE WHEN shared_state.expires_at IS NULL OR shared_state.expires_at > ?
+                                  THEN shared_state.expires_at ELSE excluded.expires_at END,
+                version = shared_state.version + 1,
+                updated_at = excluded.updated_at
+            RETURNING value
+            """,
+            (namespace, key, amount, self._expiry(ttl_seconds), now, now, amount, amount, now),
+        ).fetchone()
+        return int(row[0])
+
+    def delete(self, namespace: str, key: str) -> bool:
+        cursor = self._conn().execute(
+            "DELETE FROM shared_state WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        return cursor.rowcount == 1
+
+    def count(self, namespace: str) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM shared_state "
+            "WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time()),
+        ).fetchone()[0]
+
+    def oldest_keys(self, namespace: str, limit: int, offset: int = 0) -> list:
+        """Least recently updated keys of a namespace, for size-capped eviction."""
+        rows = self._conn().execute(
+            "SELECT key FROM shared_state WHERE namespace = ? ORDER BY updated_at LIMIT ? OFFSET ?",
+            (namespace, limit, offset),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge_expired(self) -> int:
+        cursor = self._conn().execute(
+            "DELETE FROM shared_state WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+
+class AsyncSharedStore:
+    """The same store for async code: every call runs in a worker thread, so a
+    busy database never blocks the event loop."""
+
+    def __init__(self, store: SharedStore):
+        self.store = store
+
+    async def get(self, namespace: str, key: str) -> Optional[Entry]:
+        return await asyncio.to_thread(self.store.get, namespace, key)
+
+    async def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> int:
+        return await asyncio.to_thread(self.store.set, namespace, key, value, ttl_seconds)
+
+    async def setdefault(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> Entry:
+        return await asyncio.to_thread(self.store.setdefault, namespace, key, value, ttl_seconds)
+
+    async def replace(
+        self, namespace: str, key: str, value: Any, expected_version: int,
+        ttl_seconds: Optional[float] = None,
+    ) -> bool:
+        return await asyncio.to_thread(self.store.replace, namespace, key, value, expected_version, ttl_seconds)
+
+    async def incr(self, namespace: str, key: str, amount: int = 1, ttl_seconds: Optional[float] = None) -> int:
+        return await asyncio.to_thread(self.store.incr, namespace, key, amount, ttl_seconds)
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        return await asyncio.to_thread(self.store.delete, namespace, key)
+
+    async def count(self, namespace: str) -> int:
+        return await asyncio.to_thread(self.store.count, namespace)
+
+    async def oldest_keys(self, namespace: str, limit: int, offset: int = 0) -> list:
+        return await asyncio.to_thread(self.store.oldest_keys, namespace, limit, offset)
+
+    async def purge_expired(self) -> int:
+        return await asyncio.to_thread(self.store.purge_expired)
+
+
+_store: Optional[SharedStore] = None
+_async_store: Optional[AsyncSharedStore] = None
+_store_lock = threading.Lock()
+
+
+def get_shared_store() -> SharedStore:
+    """Get the process-wide handle on the shared store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SharedStore(get_settings().shared_state_path)
+    return _store
+
+
+def get_async_shared_store() -> AsyncSharedStore:
+    """Get the process-wide store for use from async code."""
+    global _async_store
+    if _async_store is None:
+        _async_store = AsyncSharedStore(get_shared_store())
+    return _async_store
@@ -0,0 +1,169 @@
+"""
+Source Summary Service - One outline and key-point list per source, shared by every tool.
+
+A long source used to be sent in full to every format it was repurposed into and
+again to strategy, hooks and the SEO tools. Requests that set `useSummary` work
+from a compact summary instead, built once per source:
+
+- the source is split into chunks of the "summarize" input budget at paragraph
+  boundaries and every chunk is summarized concurrently
+- the partial summaries are merged in order, in groups that fit the same budget,
+  until one outline and key-point list is left
+
+Summaries are keyed by the hash of the source text and kept in the shared store,
+so every format, worker and follow-up tool reuses them. Entries expire after
+SUMMARY_TTL_SECONDS and the oldest are evicted beyond SUMMARY_MAX_ENTRIES.
+Sources under SUMMARY_MIN_TOKENS are always sent as they are.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Dict, List
+
+from ..config import get_settings
+from ..schemas import SourceSummary
+from ..timing import phase
+from .budget import count_tokens, input_budget, output_limit, split_to_tokens
+from .llm import get_provider
+from .shared_state import get_async_shared_store
+
+_NAMESPACE = "source_summary"
+
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "outline": {"type": "array", "items": {"type": "string"}},
+        "keyPoints": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["outline", "keyPoints"]
+}
+
+# Per-worker: summaries being built, so concurrent formats of one batch share a single run
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def source_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def render_summary(summary: SourceSummary) -> str:
+    """The summary as prompt text."""
+    outline = "\n".join(f"- {line}" for line in summary.outline)
+    points = "\n".join(f"- {point}" for point in summary.key_points)
+    return f"Outline:\n{outline}\n\nKey points:\n{points}"
+
+
+async def _summarize_chunk(text: str, part: int, parts: int) -> Dict[str, List[str]]:
+    prompt = f"""This is part {part} of {parts} of a source document that will be repurposed into blog
+    posts, social threads, hooks and SEO copy. Write an outline of this part (its sections or moves, in
+    order, one short line each) and its key points: the claims, numbers, names, examples and quotes a
+    writer would need, each as one self-contained sentence. Do not add anything that is not in the text.
+
+    TEXT:
+    {text}
+    """
+
+    data = await get_provider("summarize").generate_json(
+        prompt,
+        schema=SUMMARY_SCHEMA,
+        temperature=0.2,
+        span_attributes={"summary.part": part, "summary.parts": parts},
+        max_output_tokens=output_limit("summarize")
+    )
+    return data or {"outline": [], "keyPoints": []}
+
+
+async def _merge(summaries: List[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    items = "\n".join(json.dumps(summary, ensure_ascii=False) for summary in summaries)
+    prompt = f"""These are the outlines and key points of consecutive parts of one source document, in
+    order. Merge them into a single outline of the whole document and a single list of its key points.
+    Drop repeats, keep every distinct fact, number, name and quote, and do not add anything new.
+
+    {items}
+    """
+
+    data = await get_provider("summarize").generate_json(
+        prompt,
+        schema=SUMMARY_SCHEMA,
+        temperature=0.2,
+        span_attributes={"summary.merged": len(summaries)},
+        max_output_tokens=output_limit("summarize")
+    )
+    return data or {"outline": [], "keyPoints": []}
+
+
+def _groups(summaries: List[dict], budget: int) -> List[List[dict]]:
+    """Consecutive groups within the budget, at least two per group so every level shrinks."""
+    groups: List[List[dict]] = []
+    current: List[dict] = []
+    used = 0
+    for summary in summaries:
+        cost = count_tokens(json.dumps(summary, ensure_ascii=False))
+        if len(current) >= 2 and used + cost > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(summary)
+        used += cost
+    if len(current) == 1 and groups:
+        groups[-1].append(current[0])
+    elif current:
+        groups.append(current)
+    return groups
+
+
+async def _build(key: str, text: str) -> SourceSummary:
+    settings = get_settings()
+    budget = input_budget("summarize")
+    chunks = split_to_tokens(text, budget)
+    with phase("summarize"):
+        level = list(await asyncio.gather(*(
+            _summarize_chunk(chunk, i + 1, len(chunks)) for i, chunk in enumerate(chunks)
+        )))
+        while len(level) > 1:
+            level = list(await asyncio.gather(*(_merge(group) for group in _groups(level, budget))))
+
+    if not level[0].get("outline") and not level[0].get("keyPoints"):
+        raise ValueError("Empty source summary")
+    summary = SourceSummary(
+        sourceKey=key,
+        outline=level[0].get("outline", []),
+        keyPoints=level[0].get("keyPoints", []),
+        sourceTokens=count_tokens(text),
+        tokens=0,
+    )
+    summary.tokens = count_tokens(render_summary(summary))
+
+    store = get_async_shared_store()
+    overflow = await store.count(_NAMESPACE) - settings.summary_max_entries + 1
+    if overflow > 0:
+        for old_key in await store.oldest_keys(_NAMESPACE, overflow):
+            await store.delete(_NAMESPACE, old_key)
+    await store.set(_NAMESPACE, key, summary.model_dump(by_alias=True), settings.summary_ttl_seconds)
+    print(f"Source summary: {summary.source_tokens} -> {summary.tokens} tokens in {len(chunks)} chunks")
+    return summary
+
+
+async def get_source_summary(text: str) -> SourceSummary:
+    """The cached summary of a source, building it on first use."""
+    key = source_key(text)
+    entry = await get_async_shared_store().get(_NAMESPACE, key)
+    if entry:
+        return SourceSummary(**entry.value)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_build(key, text))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def compact_source(text: str) -> str:
+    """Summary text for a long source, or the source itself when it is short or the
+    summary cannot be built."""
+    if count_tokens(text) < get_settings().summary_min_tokens:
+        return text
+    try:
+        return render_summary(await get_source_summary(text))
+    except Exception as e:
+        print(f"Source summary failed, using the full text: {e}")
+        return text
@@ -0,0 +1,177 @@
+"""
+Text Limits - Platform length rules for generated content.
+
+Counts characters the way each platform does (Twitter/X weights URLs, emoji and
+CJK differently from plain Latin text), splits threads into tweets and finds the
+segments that break a limit, so only those need to be rewritten.
+"""
+import re
+from typing import List, NamedTuple
+
+from ..schemas import ContentFormat
+
+TWEET_MAX_WEIGHT = 280
+LINKEDIN_MAX_CHARS = 3000
+META_DESCRIPTION_MAX_CHARS = 160
+META_TITLE_MAX_CHARS = 60
+
+# twitter-text v3: t.co wraps every URL to 23 characters
+TWITTER_URL_WEIGHT = 23
+
+# Code point ranges that count as one character; everything else counts as two
+_LIGHT_RANGES = ((0x0000, 0x10FF), (0x2000, 0x200D), (0x2010, 0x201F), (0x2032, 0x2037))
+
+_URL_RE = re.compile(r"(?:https?://|www\.)[^\s<>\"]+", re.IGNORECASE)
+_URL_TRAILING = ".,;:!?)]}'\""
+
+# Thread separators: a line of three or more dashes, as the prompt asks for. Numbering
+# such as "1/" or "2/8" is not a separator and stays in (and counts toward) its tweet
+_THREAD_SPLIT_RE = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+_META_DESCRIPTION_RE = re.compile(r"^(\s*\**\s*Meta Description\s*:?\s*\**\s*:?\s*)(.+)$", re.IGNORECASE | re.MULTILINE)
+
+
+class Segment(NamedTuple):
+    """One length-limited piece of generated content."""
+    index: int
+    text: str
+    length: int
+    limit: int
+
+    @property
+    def over_limit(self) -> bool:
+        return self.length > self.limit
+
+
+def _is_emoji(code: int) -> bool:
+    return (
+        0x1F000 <= code <= 0x1FAFF
+        or 0x2600 <= code <= 0x27BF
+        or 0x2B00 <= code <= 0x2BFF
+        or code in (0x00A9, 0x00AE, 0x203C, 0x2049, 0x2122, 0x2139, 0x3030, 0x303D)
+    )
+
+
+def _joins_previous(code: int) -> bool:
+    """Code points that extend the preceding emoji into one glyph."""
+    return (
+        code == 0x200D                      # zero-width joiner
+        or 0xFE00 <= code <= 0xFE0F         # variation selectors
+        or 0x1F3FB <= code <= 0x1F3FF       # skin tones
+        or 0xE0020 <= code <= 0xE007F       # tag sequences (subdivision flags)
+        or code == 0x20E3                   # keycap
+    )
+
+
+def _char_weight(code: int) -> int:
+    for low, high in _LIGHT_RANGES:
+        if low <= code <= high:
+            return 1
+    return 2
+
+
+def _url_spans(text: str) -> List[tuple]:
+    spans = []
+    for match in _URL_RE.finditer(text):
+        end = match.end()
+        while end > match.start() and text[end - 1] in _URL_TRAILING:
+            end -= 1
+        spans.append((match.start(), end))
+    return spans
+
+
+def twitter_length(text: str) -> int:
+    """Weighted length of a tweet as counted by Twitter/X."""
+    text = text.strip()
+    weight = 0
+    pos = 0
+    for start, end in _url_spans(text) + [(len(text), len(text))]:
+        weight += _plain_weight(text[pos:start])
+        if end > start:
+            weight += TWITTER_URL_WEIGHT
+        pos = end
+    return weight
+
+
+def _plain_weight(text: str) -> int:
+    weight = 0
+    in_emoji = False
+    after_zwj = False
+    pending_flag = False
+    for char in text:
+        code = ord(char)
+        if 0x1F1E6 <= code <= 0x1F1FF:
+            # Regional indicators pair up into one flag
+            if not pending_flag:
+                weight += 2
+            pending_flag = not pending_flag
+            in_emoji, after_zwj = True, False
+            continue
+        pending_flag = False
+        if in_emoji and (_joins_previous(code) or after_zwj):
+            after_zwj = code == 0x200D
+            continue
+        if _is_emoji(code):
+            weight += 2
+            in_emoji = True
+        else:
+            weight += _char_weight(code)
+            in_emoji = False
+        after_zwj = False
+    return weight
+
+
+def parse_thread(text: str) -> List[str]:
+    """Split a generated thread into tweets on its `---` separators."""
+    tweets = [part.strip() for part in _THREAD_SPLIT_RE.split(text)]
+    return [tweet for tweet in tweets if tweet]
+
+
+def join_thread(tweets: List[str]) -> str:
+    return "\n\n---\n\n".join(tweets)
+
+
+def thread_segments(text: str) -> List[Segment]:
+    return [
+        Segment(i, tweet, twitter_length(tweet), TWEET_MAX_WEIGHT)
+        for i, tweet in enumerate(parse_thread(text))
+    ]
+
+
+def find_meta_description(text: str):
+    """The `**Meta Description:**` line of a blog post, or None."""
+    return _META_DESCRIPTION_RE.search(text)
+
+
+def replace_meta_description(text: str, description: str) -> str:
+    match = find_meta_description(text)
+    if match is None:
+        return text
+    return text[:match.start(2)] + description + text[match.end(2):]
+
+
+def truncate_to_limit(text: str, limit: int, counter=len) -> str:
+    """Last resort when a rewrite is still too long: cut at a word boundary."""
+    if counter(text) <= limit:
+        return text
+    words = text.split(" ")
+    while len(words) > 1 and counter(" ".join(words) + "…") > limit:
+        words.pop()
+    result = " ".join(words).rstrip(" ,;:-") + "…"
+    while counter(result) > limit:
+        result = result[:-2] + "…"
+    return result
+
+
+def trim_to_limits(format: ContentFormat, text: str) -> str:
+    """Fit text to the platform's limits by truncation alone, without a model call."""
+    if format == ContentFormat.TWITTER:
+        return join_thread([truncate_to_limit(s.text, s.limit, twitter_length) for s in thread_segments(text)])
+    if format == ContentFormat.LINKEDIN:
+        return truncate_to_limit(text, LINKEDIN_MAX_CHARS)
+    if format == ContentFormat.BLOG:
+        match = find_meta_description(text)
+        if match is None:
+            return text
+        description = match.group(2).strip().strip("*").strip()
+        return replace_meta_description(text, truncate_to_limit(description, META_DESCRIPTION_MAX_CHARS))
+    return text
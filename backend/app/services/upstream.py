@@ -0,0 +1,36 @@
+"""
+Upstream Quota Service - Shared back-off after the model API runs out of quota.
+
+Every model call reports quota errors (HTTP 429 / RESOURCE_EXHAUSTED) here. Each
+strike inside the strike window doubles a back-off period, kept in the shared
+store so all workers see it. Optional background work checks the back-off before
+spending quota.
+"""
+import time
+
+from ..config import get_settings
+from .shared_state import get_async_shared_store
+
+_NAMESPACE = "upstream_quota"
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """Whether an SDK error means the upstream quota or rate limit was hit."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code == 429 or "RESOURCE_EXHAUSTED" in str(exc)
+
+
+async def record_quota_error() -> float:
+    """Count a quota strike and extend the back-off. Returns the back-off in seconds."""
+    settings = get_settings()
+    store = get_async_shared_store()
+    strikes = await store.incr(_NAMESPACE, "strikes", ttl_seconds=settings.quota_backoff_max_seconds)
+    backoff = min(settings.quota_backoff_seconds * 2 ** (strikes - 1), settings.quota_backoff_max_seconds)
+    await store.set(_NAMESPACE, "backoff_until", time.time() + backoff, ttl_seconds=backoff)
+    return backoff
+
+
+async def quota_backoff_remaining() -> float:
+    """Seconds left before optional work may use the upstream again (0 when clear)."""
+    entry = await get_async_shared_store().get(_NAMESPACE, "backoff_until")
+    return max(0.0, entry.value - time.time()) if entry else 0.0
@@ -0,0 +1,174 @@
+"""
+Usage Stats Service - Per-user generation aggregates for the dashboard.
+
+Every history save adds its contribution (format, word count, psychology scores,
+day) to the user's aggregate, every delete subtracts it and scoring a saved row
+with /psychology swaps its scores, so /stats is one key lookup instead of a scan
+over the history. Aggregates live in the shared store and are updated by
+compare-and-swap, so concurrent saves on different workers never lose a count. A
+missing aggregate (first use, or a reset store) is rebuilt from the stored
+history on the next read, paging through it like the export so memory stays
+flat; saves made while it is missing are already part of that rebuild and are
+not counted again. Daily buckets older than USAGE_DAILY_DAYS are dropped.
+"""
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from ..config import get_settings
+from .shared_state import get_async_shared_store
+
+_NAMESPACE = "usage_stats"
+_CAS_ATTEMPTS = 20
+# Rows this recent when an aggregate is rebuilt may still have a record_usage() in flight
+_REBUILD_OVERLAP_SECONDS = 60
+PSYCHOLOGY_SCORES = ("toneScore", "viralityScore", "structuralTension")
+
+
+def _empty() -> dict:
+    return {
+        "total": 0,
+        "words": 0,
+        "formats": {},
+        "psychology": {"count": 0, **{score: 0.0 for score in PSYCHOLOGY_SCORES}},
+        "daily": {},
+        "rebuiltAt": 0.0,
+        "rebuiltIds": [],
+    }
+
+
+def _scores(psychology: Optional[dict]) -> Optional[dict]:
+    """Numeric psychology scores of a row, accepting either field naming."""
+    if not psychology:
+        return None
+    scores = {}
+    for score in PSYCHOLOGY_SCORES:
+        snake = "".join(f"_{c.lower()}" if c.isupper() else c for c in score)
+        value = psychology.get(score, psychology.get(snake))
+        if not isinstance(value, (int, float)):
+            return None
+        scores[score] = float(value)
+    return scores
+
+
+def _apply(stats: dict, row: dict, sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) one history row's contribution."""
+    if sign > 0 and row.get("id") in stats["rebuiltIds"]:
+        return
+    words = len((row.get("content") or "").split())
+    day = str(row.get("created_at") or date.today().isoformat())[:10]
+
+    stats["total"] += sign
+    stats["words"] += sign * words
+    bucket = stats["formats"].setdefault(row["format"], {"count": 0, "words": 0})
+    bucket["count"] += sign
+    bucket["words"] += sign * words
+    daily = stats["daily"].setdefault(day, {"count": 0, "words": 0})
+    daily["count"] += sign
+    daily["words"] += sign * words
+
+    _apply_scores(stats, row.get("psychology"), sign)
+
+    if bucket["count"] <= 0:
+        del stats["formats"][row["format"]]
+    if daily["count"] <= 0:
+        del stats["daily"][day]
+
+
+def _apply_scores(stats: dict, psychology: Optional[dict], sign: int) -> None:
+    scores = _scores(psychology)
+    if scores:
+        stats["psychology"]["count"] += sign
+        for score, value in scores.items():
+            stats["psychology"][score] += sign * value
+
+
+def _prune(stats: dict) -> dict:
+    cutoff = (date.today() - timedelta(days=get_settings().usage_daily_days)).isoformat()
+    stats["daily"] = {day: bucket for day, bucket in stats["daily"].items() if day >= cutoff}
+    if stats["rebuiltIds"] and time.time() - stats["rebuiltAt"] > _REBUILD_OVERLAP_SECONDS:
+        stats["rebuiltIds"] = []
+    return stats
+
+
+async def _rebuild(user_id: str) -> dict:
+    from .export import iter_history
+
+    stats = _empty()
+    recent = (datetime.now(timezone.utc) - timedelta(seconds=_REBUILD_OVERLAP_SECONDS)).isoformat()
+    async for rows in iter_history(user_id):
+        for row in rows:
+            _apply(stats, row, 1)
+            if str(row.get("created_at") or "") >= recent:
+                stats["rebuiltIds"].append(row["id"])
+    stats["rebuiltAt"] = time.time()
+    return _prune(stats)
+
+
+async def _load(user_id: str):
+    """The live entry, rebuilding it from history when it is missing."""
+    store = get_async_shared_store()
+    entry = await store.get(_NAMESPACE, user_id)
+    if entry is None:
+        entry = await store.setdefault(_NAMESPACE, user_id, await _rebuild(user_id))
+    return entry
+
+
+async def _update(user_id: str, change: Callable[[dict], None]) -> None:
+    store = get_async_shared_store()
+    for _ in range(_CAS_ATTEMPTS):
+        entry = await store.get(_NAMESPACE, user_id)
+        if entry is None:
+            # The next read rebuilds from the history, which already reflects this change
+            return
+        stats = entry.value
+        change(stats)
+        if await store.replace(_NAMESPACE, user_id, _prune(stats), entry.version):
+            return
+    print(f"Usage stats update for {user_id} dropped after {_CAS_ATTEMPTS} conflicts")
+
+
+async def record_usage(row: dict) -> None:
+    """Count a freshly saved history row (with its plain `content`)."""
+    await _update(row["user_id"], lambda stats: _apply(stats, row, 1))
+
+
+async def forget_usage(row: dict) -> None:
+    """Remove a deleted history row (with its plain `content`) from the counts."""
+    await _update(row["user_id"], lambda stats: _apply(stats, row, -1))
+
+
+async def rescore_usage(row: dict, psychology: dict, scored_at: float) -> None:
+    """Replace the psychology scores a history row contributes; `scored_at` is when
+    the new scores were written to it."""
+    def change(stats: dict) -> None:
+        if stats["rebuiltAt"] > scored_at:
+            # Rebuilt from a history that already has the new scores
+            return
+        _apply_scores(stats, row.get("psychology"), -1)
+        _apply_scores(stats, psychology, 1)
+    await _update(row["user_id"], change)
+
+
+async def get_usage_stats(user_id: str, days: int = 7) -> dict:
+    """Totals, per-format counts, average psychology scores and the last `days` of activity."""
+    stats = (await _load(user_id)).value
+    psychology = stats["psychology"]
+    today = date.today()
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        bucket = stats["daily"].get(day, {"count": 0, "words": 0})
+        daily.append({"date": day, "count": bucket["count"], "words": bucket["words"]})
+    return {
+        "totalGenerations": stats["total"],
+        "totalWords": stats["words"],
+        "formats": [
+            {"format": name, "count": bucket["count"], "words": bucket["words"]}
+            for name, bucket in sorted(stats["formats"].items())
+        ],
+        "averagePsychology": {
+            score: round(psychology[score] / psychology["count"], 2) for score in PSYCHOLOGY_SCORES
+        } if psychology["count"] else None,
+        "daily": daily,
+    }
@@ -0,0 +1,115 @@
+"""
+Variants Service - Local dedupe and ranking of alternative candidates.
+
+`variants=N` on /generate and /tools/hooks asks the model for several candidates
+in one call. What comes back is cleaned up here, without another model call:
+
+- near-duplicates are dropped: candidates whose word shingles overlap by at least
+  VARIANT_SIMILARITY_THRESHOLD (Jaccard) with a better-ranked one
+- the rest are ranked by cheap text heuristics: a tight, specific opening line
+  (numbers, a question, talking to "you"), readable sentence lengths, lexical
+  variety, and a penalty for running over the platform's length limits
+"""
+import re
+import statistics
+from typing import Callable, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from ..config import get_settings
+from ..schemas import ContentFormat
+from .text_limits import LINKEDIN_MAX_CHARS, thread_segments
+
+T = TypeVar("T")
+
+_WORD = re.compile(r"[a-z0-9']+")
+_SENTENCE = re.compile(r"[^.!?\n]+[.!?]*")
+_SECOND_PERSON = {"you", "your", "you're", "yours", "yourself"}
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _shingles(text: str) -> Set[tuple]:
+    words = _words(text)
+    size = 3 if len(words) >= 12 else 1
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard overlap of word shingles (trigrams, or words for short texts)."""
+    left, right = _shingles(a), _shingles(b)
+    if not left or not right:
+        return 1.0 if left == right else 0.0
+    return len(left & right) / len(left | right)
+
+
+# ============== HEURISTICS ==============
+
+def opening_score(text: str) -> float:
+    """0-1: how hook-like the first line is."""
+    line = next((line.strip(" #*>-") for line in text.splitlines() if line.strip()), "")
+    if not line:
+        return 0.0
+    length = len(line)
+    score = 0.6 if 30 <= length <= 120 else max(0.6 - abs(length - 75) / 250, 0.0)
+    words = set(_words(line))
+    if any(c.isdigit() for c in line):
+        score += 0.15
+    if "?" in line:
+        score += 0.1
+    if words & _SECOND_PERSON:
+        score += 0.15
+    return min(score, 1.0)
+
+
+def readability_score(text: str) -> float:
+    """0-1: mean sentence length near 16 words scores highest."""
+    lengths = [len(_words(s)) for s in _SENTENCE.findall(text)]
+    lengths = [n for n in lengths if n]
+    if not lengths:
+        return 0.0
+    return max(1.0 - abs(statistics.mean(lengths) - 16) / 16, 0.0)
+
+
+def variety_score(text: str) -> float:
+    """0-1: distinct words per word over the first 300 words."""
+    words = _words(text)[:300]
+    return len(set(words)) / len(words) if words else 0.0
+
+
+def limit_overflow(format: Optional[ContentFormat], text: str) -> float:
+    """Fraction of the platform limit the text runs over (0 when it fits)."""
+    if format == ContentFormat.TWITTER:
+        segments = thread_segments(text)
+        over = sum(max(s.length - s.limit, 0) for s in segments)
+        allowed = sum(s.limit for s in segments) or 1
+        return over / allowed
+    if format == ContentFormat.LINKEDIN:
+        return max(len(text) - LINKEDIN_MAX_CHARS, 0) / LINKEDIN_MAX_CHARS
+    return 0.0
+
+
+def score_content(text: str, format: Optional[ContentFormat] = None) -> float:
+    """0-1 quality estimate of a generated post."""
+    score = 0.4 * opening_score(text) + 0.35 * readability_score(text) + 0.25 * variety_score(text)
+    return round(max(score - limit_overflow(format, text), 0.0), 4)
+
+
+# ============== RANKING ==============
+
+def rank_variants(
+    items: Sequence[T],
+    text: Callable[[T], str],
+    score: Callable[[T], float],
+    limit: Optional[int] = None,
+) -> List[Tuple[T, float]]:
+    """Best-first (item, score) pairs with near-duplicates of better items removed."""
+    threshold = get_settings().variant_similarity_threshold
+    ranked = sorted(((item, score(item)) for item in items if text(item).strip()), key=lambda pair: -pair[1])
+    kept: List[Tuple[T, float]] = []
+    for item, value in ranked:
+        if all(similarity(text(item), text(other)) < threshold for other, _ in kept):
+            kept.append((item, value))
+        if limit is not None and len(kept) >= limit:
+            break
+    return kept
@@ -0,0 +1,128 @@
+"""
+Request timing - per-phase timers emitted as a Server-Timing header.
+
+Routers and services wrap their expensive steps in `phase("name")` (auth, prompt,
+model, parse, history, ...). The middleware collects the phases of each request
+and reports them, summed per name, in `Server-Timing`. An admin can also send
+`X-Profile: <PROFILE_TOKEN>` to capture a sampling profile of that one request,
+written under PROFILE_DIR. Profiles need pyinstrument, whose async mode keeps
+other requests on the loop out of the profile; profiled requests run one at a time.
+"""
+import asyncio
+import hmac
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - optional dependency
+    Profiler = None
+
+_phases: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_phases", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block and record it against the current request (no-op outside one)."""
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, (time.perf_counter() - start) * 1000))
+
+
+def _server_timing(phases: List[Tuple[str, float]], total_ms: float) -> str:
+    totals: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for name, duration in phases:
+        totals[name] = totals.get(name, 0.0) + duration
+        counts[name] = counts.get(name, 0) + 1
+    entries = [
+        f'{name};dur={duration:.1f}' + (f';desc="{counts[name]} calls"' if counts[name] > 1 else "")
+        for name, duration in totals.items()
+    ]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """Collects `phase()` timings per request and adds the Server-Timing header."""
+
+    def __init__(self, app: ASGIApp, profile_token: Optional[str] = None, profile_dir: str = "data/profiles"):
+        self.app = app
+        self.profile_token = profile_token
+        self.profile_dir = profile_dir
+        # One profiler may sample the thread at a time
+        self._profile_lock = asyncio.Lock()
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        if not self.profile_token:
+            return False
+        supplied = Headers(scope=scope).get("x-profile", "")
+        if not hmac.compare_digest(supplied.encode(), self.profile_token.encode()):
+            return False
+        if Profiler is None:
+            print("X-Profile ignored: pyinstrument is not installed")
+            return False
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._wants_profile(scope):
+            async with self._profile_lock:
+                await self._serve(scope, receive, send, profile=True)
+        else:
+            await self._serve(scope, receive, send, profile=False)
+
+    async def _serve(self, scope: Scope, receive: Receive, send: Send, profile: bool) -> None:
+        phases: List[Tuple[str, float]] = []
+        token = _phases.set(phases)
+        start = time.perf_counter()
+        profiler = None
+        profile_path = None
+        if profile:
+            profiler, profile_path = self._start_profile(scope)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", _server_timing(phases, (time.perf_counter() - start) * 1000))
+                if profile_path:
+                    headers.append("X-Profile-File", os.path.basename(profile_path))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _phases.reset(token)
+            if profiler is not None:
+                self._finish_profile(profiler, profile_path)
+
+    def _start_profile(self, scope: Scope):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        profiler = Profiler(interval=0.001, async_mode="enabled")
+        profiler.start()
+        path = os.path.join(self.profile_dir, f"{stamp}-{scope['method']}-{slug}.html")
+        return profiler, path
+
+    def _finish_profile(self, profiler, path: str) -> None:
+        profiler.stop()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        print(f"Profile written to {path}")
@@ -0,0 +1,234 @@
+"""
+Tracing - OpenTelemetry-style spans for routes, model calls and Supabase operations.
+
+Each sampled HTTP request opens a root span (named after its route template).
+Services open child spans with `span(name, **attributes)`, e.g. one per Gemini
+call and per Supabase operation. Finished traces are handed to a pluggable
+exporter on a background thread, so the request path only pays for a few
+object allocations; unsampled requests pay for a single context lookup.
+
+Configuration:
+- TRACE_SAMPLE_RATE: fraction of requests traced (0 disables tracing)
+- TRACE_EXPORTER: "jsonl" (one JSON trace per line in TRACE_FILE), "console",
+  or a "module:Class" import path of a SpanExporter subclass
+"""
+import importlib
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "_trace")
+
+    def __init__(self, name: str, trace: "_Trace", parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace.trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self._trace = trace
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": ((self.end_ns or self.start_ns) - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class _NoopSpan:
+    """Returned when the request is not sampled; accepts and drops everything."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+
+
+# ============== EXPORTERS ==============
+
+class SpanExporter:
+    """Receives each finished trace as a list of spans (root last)."""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class JsonLinesExporter(SpanExporter):
+    """Appends one JSON object per trace to a local file, for offline analysis."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "trace_id": spans[0].trace_id,
+                "spans": [s.to_dict() for s in spans],
+            }, default=str) + "\n")
+
+
+class ConsoleExporter(SpanExporter):
+    def export(self, spans: List[Span]) -> None:
+        for s in spans:
+            indent = "  " if s.parent_id else ""
+            print(f"{indent}[trace {s.trace_id[:8]}] {s.name} {s.to_dict()['duration_ms']:.1f}ms {s.attributes}")
+
+
+class _BackgroundExporter:
+    """Moves exporting off the request path; drops traces if the queue is full."""
+
+    def __init__(self, exporter: SpanExporter, max_queue: int = 1000):
+        self.exporter = exporter
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(spans)
+            except Exception as e:
+                print(f"Trace export failed: {e}")
+
+
+# ============== TRACER ==============
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_sample_rate = 0.0
+_exporter: Optional[_BackgroundExporter] = None
+
+
+def configure_tracing(sample_rate: float, exporter: str, trace_file: str) -> None:
+    """Set the sampling rate and exporter. Called once at application start-up."""
+    global _sample_rate, _exporter
+    _sample_rate = max(0.0, min(1.0, sample_rate))
+    if _sample_rate == 0.0 or exporter == "none":
+        _sample_rate = 0.0
+        return
+    if exporter == "jsonl":
+        instance: SpanExporter = JsonLinesExporter(trace_file)
+    elif exporter == "console":
+        instance = ConsoleExporter()
+    else:
+        module_name, _, class_name = exporter.partition(":")
+        instance = getattr(importlib.import_module(module_name), class_name)()
+    _exporter = _BackgroundExporter(instance)
+
+
+def current_span():
+    """The active span, or a no-op span outside a sampled trace."""
+    return _current.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Open a child span of the active span. A no-op when there is no sampled trace."""
+    parent = _current.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = Span(name, parent._trace, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.record_exception(exc)
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        parent._trace.spans.append(child)
+        _current.reset(token)
+
+
+class TracingMiddleware:
+    """Opens a sampled root span per HTTP request, named after the matched route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _exporter is None or random.random() >= _sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace = _Trace()
+        root = Span(f"{scope['method']} {scope['path']}", trace, None, {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        token = _current.set(root)
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.status = "ERROR"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            root.record_exception(exc)
+            raise
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                root.name = f"{scope['method']} {route.path}"
+                root.set_attribute("http.route", route.path)
+            root.end_ns = time.time_ns()
+            trace.spans.append(root)
+            _exporter.submit(trace.spans)
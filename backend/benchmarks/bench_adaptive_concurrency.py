@@ -0,0 +1,124 @@
+"""
+Adaptive concurrency benchmark - fixed vs. AIMD model-call limits against a
+local stand-in for Gemini that runs out of quota.
+
+The stand-in serves --quota-rps requests per second (token bucket) with
+--capacity calls at base latency; past that, latency grows with load, and
+calls beyond the quota fail with 429 like RESOURCE_EXHAUSTED. --clients
+closed-loop callers drive `_generate` for --duration seconds under each limit
+setting, and the script reports goodput, 429s reaching callers, early sheds
+(503 + Retry-After) and latency percentiles.
+
+Usage (from backend/):
+    python benchmarks/bench_adaptive_concurrency.py --clients 48 --duration 6
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "local-stand-in")
+os.environ.setdefault("SHARED_STATE_PATH", os.path.join(tempfile.mkdtemp(), "bench_state.db"))
+
+from fastapi import HTTPException  # noqa: E402
+
+from app.services import gemini, scheduler  # noqa: E402
+from app.services.limiter import AdaptiveLimit  # noqa: E402
+from app.services.shared_state import get_shared_store  # noqa: E402
+
+
+class QuotaExceeded(Exception):
+    code = 429
+
+    def __str__(self):
+        return "429 RESOURCE_EXHAUSTED (local stand-in)"
+
+
+class StandInModels:
+    """Token-bucket quota plus load-dependent latency."""
+
+    def __init__(self, quota_rps: float, capacity: int, base_latency: float):
+        self.quota_rps = quota_rps
+        self.capacity = capacity
+        self.base_latency = base_latency
+        self.tokens = quota_rps
+        self.refilled = time.monotonic()
+        self.inflight = 0
+
+    async def generate_content(self, **kwargs):
+        now = time.monotonic()
+        self.tokens = min(self.quota_rps, self.tokens + (now - self.refilled) * self.quota_rps)
+        self.refilled = now
+        if self.tokens < 1:
+            await asyncio.sleep(self.base_latency / 5)
+            raise QuotaExceeded()
+        self.tokens -= 1
+        self.inflight += 1
+        try:
+            overload = max(0, self.inflight - self.capacity) / self.capacity
+            await asyncio.sleep(self.base_latency * (1 + 2 * overload))
+        finally:
+            self.inflight -= 1
+        return types.SimpleNamespace(text="ok", usage_metadata=None)
+
+
+async def _run(label: str, limit: AdaptiveLimit, args) -> None:
+    upstream = StandInModels(args.quota_rps, args.capacity, args.base_latency)
+    gemini._get_client = lambda: types.SimpleNamespace(aio=types.SimpleNamespace(models=upstream))
+    scheduler._scheduler = scheduler.ModelScheduler(limit, args.max_queue_wait)
+    get_shared_store().purge_expired()
+    for key in ("strikes", "backoff_until"):
+        get_shared_store().delete("upstream_quota", key)
+
+    latencies, counts = [], {"ok": 0, "quota": 0, "shed": 0}
+    deadline = time.monotonic() + args.duration
+
+    async def client():
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                await gemini._generate(model=gemini.TEXT_MODEL, contents="bench")
+                if time.monotonic() > deadline:
+                    return
+                counts["ok"] += 1
+                latencies.append(time.monotonic() - started)
+            except HTTPException as e:
+                counts["quota" if "quota" in e.detail else "shed"] += 1
+                await asyncio.sleep(min(float(e.headers["Retry-After"]), args.duration) / 10)
+
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [0.0] * 19
+    print(
+        f"{label:<18} goodput {counts['ok'] / args.duration:>6.1f}/s   429s {counts['quota']:>5d}   "
+        f"shed {counts['shed']:>5d}   p50 {quantiles[9] * 1000:>6.0f} ms   p95 {quantiles[18] * 1000:>6.0f} ms   "
+        f"final limit {limit.value}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=48)
+    parser.add_argument("--duration", type=float, default=6.0)
+    parser.add_argument("--quota-rps", type=float, default=30.0)
+    parser.add_argument("--capacity", type=int, default=16)
+    parser.add_argument("--base-latency", type=float, default=0.1)
+    parser.add_argument("--max-queue-wait", type=float, default=2.0)
+    parser.add_argument("--fixed", type=int, nargs="+", default=[2, 32])
+    args = parser.parse_args()
+
+    print(
+        f"stand-in: {args.quota_rps:.0f} req/s quota, {args.capacity} calls at "
+        f"{args.base_latency * 1000:.0f} ms, {args.clients} clients, {args.duration:.0f} s each\n"
+    )
+    for fixed in args.fixed:
+        await _run(f"fixed limit {fixed}", AdaptiveLimit(fixed, fixed, fixed, enabled=False), args)
+    await _run("adaptive (AIMD)", AdaptiveLimit(4, 1, max(args.fixed)), args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
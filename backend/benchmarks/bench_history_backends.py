@@ -0,0 +1,126 @@
+"""
+History backend benchmark - local SQLite store vs. the Supabase path.
+
+Drives the HistoryStore interface the way the API does: concurrent saves (one
+coroutine per request), newest-50 list views and single-item reads. Reports
+write throughput and p50/p95 latency per operation for the SQLite store with
+batched commits, the same store committing every write on its own ("sqlite-1")
+and, with --supabase, the configured Supabase
+project (SUPABASE_URL / SUPABASE_SERVICE_KEY; its rows are deleted afterwards).
+
+Usage (from backend/):
+    python benchmarks/bench_history_backends.py --rows 5000 --concurrency 32
+    python benchmarks/bench_history_backends.py --rows 500 --supabase
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from app.services.history_store import SQLiteHistoryStore, SupabaseHistoryStore  # noqa: E402
+
+WORDS = (
+    "content strategy audience growth engine viral hook story brand voice insight "
+    "newsletter thread linkedin blog launch product founder lesson framework data"
+).split()
+FORMATS = ["BLOG", "TWITTER", "LINKEDIN", "NEWSLETTER"]
+
+
+def _row(rng: random.Random, user_id: str) -> dict:
+    body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(150, 600)))
+    return {
+        "user_id": user_id,
+        "format": rng.choice(FORMATS),
+        "original_title": body[:50],
+        "content": body,
+        "psychology": None,
+        "image_url": None,
+    }
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[max(int(len(samples) * 0.95) - 1, 0)] * 1000
+
+
+async def run(store, rows: int, users: int, concurrency: int, samples: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    user_ids = [f"bench-{seed}-{i}" for i in range(users)]
+    semaphore = asyncio.Semaphore(concurrency)
+    dataset = [_row(rng, user_ids[i % users]) for i in range(rows)]
+    write_times, ids = [], []
+
+    async def save(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            row = await store.insert_history(dataset[i])
+            write_times.append(time.perf_counter() - started)
+            ids.append((row["user_id"], row["id"]))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(save(i) for i in range(rows)))
+    write_seconds = time.perf_counter() - started
+
+    list_times, item_times = [], []
+    for _ in range(samples):
+        started = time.perf_counter()
+        await store.list_history(rng.choice(user_ids), 50)
+        list_times.append(time.perf_counter() - started)
+        user_id, content_id = rng.choice(ids)
+        started = time.perf_counter()
+        await store.get_history(user_id, content_id)
+        item_times.append(time.perf_counter() - started)
+
+    return {
+        "ids": ids,
+        "rows_per_s": rows / write_seconds,
+        "write": _percentiles(write_times),
+        "list": _percentiles(list_times),
+        "item": _percentiles(item_times),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32, help="saves in flight at once")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--supabase", action="store_true", help="also run against the configured Supabase project")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, batch_size in (("sqlite", args.batch_size), ("sqlite-1", 1)):
+            store = SQLiteHistoryStore(os.path.join(tmp, f"{label}.db"), batch_size=batch_size)
+            results[label] = await run(store, args.rows, args.users, args.concurrency, args.samples, args.seed)
+            store.close()
+
+    if args.supabase:
+        store = SupabaseHistoryStore()
+        results["supabase"] = await run(store, args.rows, args.users, args.concurrency, args.samples, args.seed)
+        for user_id, content_id in results["supabase"]["ids"]:
+            await store.delete_history(user_id, content_id)
+
+    print(f"rows={args.rows} users={args.users} concurrency={args.concurrency} batch_size={args.batch_size}")
+    print(f"{'backend':<9} {'writes/s':>9} {'write p50/p95 ms':>18} {'list p50/p95 ms':>18} {'item p50/p95 ms':>18}")
+    for label, r in results.items():
+        print(
+            f"{label:<9} {r['rows_per_s']:>9.0f} "
+            f"{r['write'][0]:>8.2f}/{r['write'][1]:<9.2f} "
+            f"{r['list'][0]:>8.2f}/{r['list'][1]:<9.2f} "
+            f"{r['item'][0]:>8.2f}/{r['item'][1]:<9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+"""
+History storage benchmark - inline bodies vs. content-addressed compressed blobs.
+
+Builds a synthetic history in two local SQLite databases, one per layout, and
+reports on-disk size, write throughput and read latency for list views
+(newest 50, no bodies) and full-item reads (fetch + decompress).
+
+Usage (from backend/):
+    python benchmarks/bench_history_storage.py --rows 100000
+"""
+import argparse
+import base64
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.blobs import compress, content_hash, decompress, make_preview  # noqa: E402
+
+WORDS = (
+    "content strategy audience growth engine viral hook story brand voice insight "
+    "newsletter thread linkedin blog launch product founder lesson framework data "
+    "signal pattern colony worker scale habit trust value offer pain point proof"
+).split()
+FORMATS = ["BLOG", "TWITTER", "LINKEDIN", "NEWSLETTER"]
+
+
+def _body(rng: random.Random) -> str:
+    paragraphs = []
+    for _ in range(rng.randint(4, 12)):
+        sentence_count = rng.randint(3, 7)
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(sentence_count)
+        ]
+        paragraphs.append(f"## {rng.choice(WORDS).title()}\n\n" + " ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def _image(rng: random.Random, size: int) -> str:
+    return "data:image/png;base64," + base64.b64encode(rng.randbytes(size)).decode("ascii")
+
+
+def build_dataset(rows: int, seed: int, dup_ratio: float, image_ratio: float, image_size: int):
+    """Yield synthetic history rows; a share of them repeat earlier bodies/images."""
+    rng = random.Random(seed)
+    bodies, images = [], []
+    for i in range(rows):
+        if bodies and rng.random() < dup_ratio:
+            content = rng.choice(bodies)
+        else:
+            content = _body(rng)
+            if len(bodies) < 5000:
+                bodies.append(content)
+        image_url = None
+        if rng.random() < image_ratio:
+            if images and rng.random() < dup_ratio:
+                image_url = rng.choice(images)
+            else:
+                image_url = _image(rng, image_size)
+                if len(images) < 500:
+                    images.append(image_url)
+        yield {
+            "id": str(i),
+            "user_id": f"user-{i % 200}",
+            "format": FORMATS[i % 4],
+            "content": content,
+            "image_url": image_url,
+            "created_at": f"{1_700_000_000 + i:012d}",
+        }
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def write_inline(path: str, dataset) -> float:
+    conn = _connect(path)
+    conn.execute("""CREATE TABLE content_history (
+        id TEXT PRIMARY KEY, user_id TEXT, format TEXT, content TEXT,
+        image_url TEXT, created_at TEXT)""")
+    conn.execute("CREATE INDEX idx_user_created ON content_history(user_id, created_at DESC)")
+    start = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO content_history VALUES (:id, :user_id, :format, :content, :image_url, :created_at)",
+        dataset,
+    )
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return elapsed
+
+
+def write_blobs(path: str, dataset, level: int) -> float:
+    conn = _connect(path)
+    conn.execute("CREATE TABLE content_blobs (hash TEXT PRIMARY KEY, codec TEXT, data TEXT, raw_size INTEGER)")
+    conn.execute("""CREATE TABLE content_history (
+        id TEXT PRIMARY KEY, user_id TEXT, format TEXT, content_hash TEXT,
+        preview TEXT, image_hash TEXT, created_at TEXT)""")
+    conn.execute("CREATE INDEX idx_user_created ON content_history(user_id, created_at DESC)")
+    seen = set()
+    start = time.perf_counter()
+    for row in dataset:
+        refs = {}
+        for key, text in (("content_hash", row["content"]), ("image_hash", row["image_url"])):
+            if text is None:
+                refs[key] = None
+                continue
+            digest = content_hash(text)
+            if digest not in seen:
+                codec, payload = compress(text, level=level)
+                conn.execute(
+                    "INSERT OR IGNORE INTO content_blobs VALUES (?, ?, ?, ?)",
+                    (digest, codec, payload, len(text)),
+                )
+                seen.add(digest)
+            refs[key] = digest
+        conn.execute(
+            "INSERT INTO content_history VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (row["id"], row["user_id"], row["format"], refs["content_hash"],
+             make_preview(row["content"]), refs["image_hash"], row["created_at"]),
+        )
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return elapsed
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return (
+        statistics.median(samples) * 1000,
+        samples[int(len(samples) * 0.95) - 1] * 1000,
+    )
+
+
+def read_latencies(path: str, layout: str, rows: int, samples: int, seed: int):
+    rng = random.Random(seed)
+    conn = _connect(path)
+    list_sql = (
+        "SELECT id, format, substr(content, 1, 280), created_at FROM content_history "
+        if layout == "inline" else
+        "SELECT id, format, preview, created_at FROM content_history "
+    ) + "WHERE user_id = ? ORDER BY created_at DESC LIMIT 50"
+
+    list_times, item_times = [], []
+    for _ in range(samples):
+        user_id = f"user-{rng.randrange(200)}"
+        start = time.perf_counter()
+        conn.execute(list_sql, (user_id,)).fetchall()
+        list_times.append(time.perf_counter() - start)
+
+        item_id = str(rng.randrange(rows))
+        start = time.perf_counter()
+        if layout == "inline":
+            conn.execute("SELECT content, image_url FROM content_history WHERE id = ?", (item_id,)).fetchone()
+        else:
+            content_ref, image_ref = conn.execute(
+                "SELECT content_hash, image_hash FROM content_history WHERE id = ?", (item_id,)
+            ).fetchone()
+            for ref in filter(None, (content_ref, image_ref)):
+                codec, payload = conn.execute(
+                    "SELECT codec, data FROM content_blobs WHERE hash = ?", (ref,)
+                ).fetchone()
+                decompress(codec, payload)
+        item_times.append(time.perf_counter() - start)
+    conn.close()
+    return _percentiles(list_times), _percentiles(item_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dup-ratio", type=float, default=0.3, help="share of re-generated bodies")
+    parser.add_argument("--image-ratio", type=float, default=0.05, help="share of rows with an image")
+    parser.add_argument("--image-size", type=int, default=16_384, help="raw image bytes before base64")
+    parser.add_argument("--level", type=int, default=10, help="compression level")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    def dataset():
+        return build_dataset(args.rows, args.seed, args.dup_ratio, args.image_ratio, args.image_size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for layout in ("inline", "blobs"):
+            path = os.path.join(tmp, f"{layout}.db")
+            if layout == "inline":
+                write_seconds = write_inline(path, dataset())
+            else:
+                write_seconds = write_blobs(path, dataset(), args.level)
+            (list_p50, list_p95), (item_p50, item_p95) = read_latencies(
+                path, layout, args.rows, args.samples, args.seed
+            )
+            results[layout] = {
+                "size_mb": os.path.getsize(path) / 1e6,
+                "rows_per_s": args.rows / write_seconds,
+                "list": (list_p50, list_p95),
+                "item": (item_p50, item_p95),
+            }
+
+    print(f"rows={args.rows} dup_ratio={args.dup_ratio} image_ratio={args.image_ratio} level={args.level}")
+    print(f"{'layout':<8} {'size MB':>9} {'writes/s':>10} {'list p50/p95 ms':>18} {'item p50/p95 ms':>18}")
+    for layout, r in results.items():
+        print(
+            f"{layout:<8} {r['size_mb']:>9.1f} {r['rows_per_s']:>10.0f} "
+            f"{r['list'][0]:>8.3f}/{r['list'][1]:<8.3f} {r['item'][0]:>8.3f}/{r['item'][1]:<8.3f}"
+        )
+    saved = 1 - results["blobs"]["size_mb"] / results["inline"]["size_mb"]
+    print(f"storage saved by blobs: {saved:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Response benchmark - serialization CPU and bytes on the wire for large payloads.
+
+Representative bodies for /api/content/history, /generate-batch and /image are
+rendered with Starlette's default JSONResponse and with the orjson-backed
+DefaultJSONResponse, then compressed with the codecs the CompressionMiddleware
+negotiates.
+
+Usage (from backend/):
+    python benchmarks/bench_responses.py --repeat 50
+"""
+import argparse
+import base64
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.responses import DefaultJSONResponse, brotli, compress_body  # noqa: E402
+
+WORDS = (
+    "content strategy audience growth engine viral hook story brand voice insight "
+    "newsletter thread linkedin blog launch product founder lesson framework data"
+).split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def payloads(seed: int) -> dict:
+    rng = random.Random(seed)
+    history = [
+        {
+            "id": f"{i:08d}-0000-0000-0000-000000000000",
+            "user_id": "00000000-0000-0000-0000-000000000001",
+            "format": rng.choice(["BLOG", "TWITTER", "LINKEDIN", "NEWSLETTER"]),
+            "content": _text(rng, rng.randint(300, 1200)),
+            "original_title": _text(rng, 6),
+            "psychology": {"toneScore": rng.random() * 100, "viralityScore": rng.random() * 100},
+            "image_url": None,
+            "created_at": "2025-01-01T00:00:00+00:00",
+        }
+        for i in range(50)
+    ]
+    batch = {"results": [
+        {"format": fmt, "content": _text(rng, 900)}
+        for fmt in ("BLOG", "TWITTER", "LINKEDIN", "NEWSLETTER")
+    ]}
+    image = {"imageUrl": "data:image/png;base64," + base64.b64encode(rng.randbytes(1_200_000)).decode()}
+    return {"history (50 items)": history, "generate-batch (4)": batch, "image (1.2 MB png)": image}
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=5)
+    args = parser.parse_args()
+
+    renderers = {"json (stdlib)": JSONResponse, "default": DefaultJSONResponse}
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+
+    print(f"default response class: {DefaultJSONResponse.__name__}")
+    for name, payload in payloads(args.seed).items():
+        print(f"\n{name}")
+        body = b""
+        for label, cls in renderers.items():
+            renderer = cls.__new__(cls)
+            seconds, body = _time(lambda: renderer.render(payload), args.repeat)
+            print(f"  serialize {label:<14} {seconds * 1000:>8.3f} ms   {len(body):>10,d} bytes")
+        for encoding in encodings:
+            seconds, compressed = _time(
+                lambda: compress_body(body, encoding, args.gzip_level, args.brotli_quality),
+                max(1, args.repeat // 5),
+            )
+            print(
+                f"  {encoding:<24} {seconds * 1000:>8.3f} ms   {len(compressed):>10,d} bytes "
+                f"({len(compressed) / len(body):.1%} of identity)"
+            )
+
+
+if __name__ == "__main__":
+    main()
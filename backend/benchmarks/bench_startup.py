@@ -0,0 +1,118 @@
+"""
+Cold-start benchmark - import time, time to first /health, time to first generation.
+
+Each measurement runs in a fresh interpreter so module caches are cold:
+- import: `import app.main` wall time, plus the heavy SDKs on their own for reference
+- health: spawning uvicorn until the first 200 from /health
+- generate: spawning uvicorn until the first 200 from POST /api/content/generate
+  (needs a real GEMINI_API_KEY; skipped otherwise)
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py --runs 5 [--generate] [--warmup]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GENERATE_BODY = {
+    "sourceText": "Small teams ship faster when they write things down.",
+    "inputType": "TEXT",
+    "selectedFormats": ["LINKEDIN"],
+    "brandVoice": {"name": "Bench", "tone": "Friendly", "audience": "Founders", "keywords": []},
+}
+
+
+def _env(warmup: bool) -> dict:
+    env = {**os.environ, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "bench")}
+    env["WARMUP_ON_STARTUP"] = "true" if warmup else "false"
+    return env
+
+
+def time_import(module: str, warmup: bool) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=_env(warmup),
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_first_response(method: str, path: str, body, warmup: bool, timeout: float = 120.0) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(warmup),
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+                payload = json.dumps(body) if body is not None else None
+                headers = {"Content-Type": "application/json"} if body is not None else {}
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    return time.perf_counter() - start
+                raise RuntimeError(f"{method} {path} returned {response.status}")
+            except (ConnectionRefusedError, ConnectionResetError):
+                time.sleep(0.01)
+        raise RuntimeError("server did not answer in time")
+    finally:
+        server.terminate()
+        server.wait(timeout=15)
+
+
+def _report(label: str, samples) -> None:
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<32} median {statistics.median(ms):>8.1f} ms   min {min(ms):>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--generate", action="store_true", help="also time the first real generation")
+    parser.add_argument("--warmup", action="store_true", help="enable WARMUP_ON_STARTUP")
+    args = parser.parse_args()
+
+    print(f"runs={args.runs} warmup={args.warmup}")
+    for module in ("app.main", "google.genai", "supabase"):
+        try:
+            _report(f"import {module}", [time_import(module, args.warmup) for _ in range(args.runs)])
+        except subprocess.CalledProcessError as e:
+            print(f"import {module}: failed ({e.stderr.strip().splitlines()[-1]})")
+
+    _report("spawn -> first /health", [
+        time_first_response("GET", "/health", None, args.warmup) for _ in range(args.runs)
+    ])
+
+    if args.generate:
+        if os.environ.get("GEMINI_API_KEY") in (None, "", "bench"):
+            print("spawn -> first generation: skipped (set GEMINI_API_KEY)")
+        else:
+            _report("spawn -> first generation", [
+                time_first_response(
+                    "POST", "/api/content/generate?format=LINKEDIN", GENERATE_BODY, args.warmup
+                )
+                for _ in range(args.runs)
+            ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read once per process; point every store at a scratch directory
+_scratch = tempfile.mkdtemp(prefix="contant-tests-")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("SHARED_STATE_PATH", os.path.join(_scratch, "shared_state.db"))
+
+# Imported after the environment is set up
+from app.services import auth, blobs, export  # noqa: E402
+from app.services.history_store import SQLiteHistoryStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A SQLite history store in a scratch directory, used by the history, blob and export code."""
+    store = SQLiteHistoryStore(str(tmp_path / "history.db"))
+    for module in (auth, blobs, export):
+        monkeypatch.setattr(module, "get_history_store", lambda: store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def save_row(store):
+    """Insert a history row whose body is stored as a blob, as a blob-storage save does."""
+    async def save(text: str, user_id: str = "u1", format: str = "BLOG") -> dict:
+        return await store.insert_history({
+            "user_id": user_id, "format": format, "content": None,
+            "content_hash": await blobs.store_blob(text), "preview": blobs.make_preview(text),
+        })
+    return save
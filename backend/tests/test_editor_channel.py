@@ -0,0 +1,34 @@
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("frame", [[], "auth", 1])
+def test_non_object_auth_frame_closes_with_policy_violation(client, frame):
+    with client.websocket_connect("/api/content/ws") as ws:
+        ws.send_json(frame)
+        assert ws.receive_json()["status"] == 400
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+        assert closed.value.code == 1008
+
+
+def test_non_object_frames_after_auth_get_an_error_frame(client):
+    with client.websocket_connect("/api/content/ws") as ws:
+        ws.send_json({"type": "auth"})
+        assert ws.receive_json()["type"] == "ready"
+        for frame in ([], "x", 1, {"type": "request", "id": "1", "op": "document", "params": "x"}):
+            ws.send_json(frame)
+            reply = ws.receive_json()
+            assert reply["type"] == "error" and reply["status"] == 400
+        ws.send_json({"type": "cancel", "id": "nothing"})
+        ws.send_json({"type": "bogus"})
+        assert ws.receive_json()["detail"] == "Unknown frame type: bogus"
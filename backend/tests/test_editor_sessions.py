@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.config import get_settings
+from app.services import editor
+from app.services.shared_state import get_shared_store
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    caches = {"created": [], "deleted": []}
+
+    def create(document, ttl):
+        name = f"cache-{len(caches['created'])}"
+        caches["created"].append(name)
+        return name
+
+    async def modify(selected, instruction, **kwargs):
+        return selected.upper()
+
+    monkeypatch.setattr(editor, "create_editor_context_cache", create)
+    monkeypatch.setattr(editor, "delete_editor_context_cache", caches["deleted"].append)
+    monkeypatch.setattr(editor, "modify_selection", modify)
+    monkeypatch.setattr(get_settings(), "editor_cache_min_chars", 10)
+    monkeypatch.setattr(get_settings(), "editor_cache_rebuild_edits", 1)
+    return caches
+
+
+def test_cache_is_rebuilt_after_a_committed_edit(fake_model):
+    async def scenario():
+        session = await editor.create_editor_session("hello world, this is a document")
+        assert session.context_cache == "cache-0"
+        result = await editor.apply_session_edit(session.id, 0, 5, "shout", session.version)
+        stored = await editor.get_editor_session(session.id)
+        assert stored.document.startswith("HELLO")
+        assert stored.context_cache == "cache-1"
+        assert result["version"] == stored.version
+        assert fake_model["deleted"] == ["cache-0"]
+
+    asyncio.run(scenario())
+
+
+def test_conflicting_edit_keeps_the_old_cache(fake_model, monkeypatch):
+    async def scenario():
+        session = await editor.create_editor_session("hello world, this is a document")
+
+        def create_while_another_edit_lands(document, ttl):
+            # A concurrent edit bumps the version while the new cache is being built
+            store = get_shared_store()
+            entry = store.get(editor._NAMESPACE, session.id)
+            store.replace(editor._NAMESPACE, session.id, entry.value, entry.version)
+            fake_model["created"].append("cache-late")
+            return "cache-late"
+
+        monkeypatch.setattr(editor, "create_editor_context_cache", create_while_another_edit_lands)
+        await editor.apply_session_edit(session.id, 0, 5, "shout", session.version)
+        stored = await editor.get_editor_session(session.id)
+        assert stored.document.startswith("HELLO")
+        assert stored.context_cache == "cache-0"
+        assert fake_model["deleted"] == ["cache-late"]
+
+    asyncio.run(scenario())
+
+
+def test_stale_edit_does_not_touch_the_cache(fake_model):
+    async def scenario():
+        session = await editor.create_editor_session("hello world, this is a document")
+        await editor.apply_session_edit(session.id, 0, 5, "shout", session.version)
+        with pytest.raises(Exception) as conflict:
+            await editor.apply_session_edit(session.id, 6, 11, "shout", session.version)
+        assert conflict.value.status_code == 409
+        assert fake_model["created"] == ["cache-0", "cache-1"]
+
+    asyncio.run(scenario())
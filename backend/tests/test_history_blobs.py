@@ -0,0 +1,42 @@
+import asyncio
+
+from app.services import auth, blobs
+
+
+def test_list_returns_previews_and_item_hydrates(save_row, monkeypatch):
+    loads = []
+    load_blobs = blobs.load_blobs
+
+    async def counting_load(hashes):
+        hashes = list(hashes)
+        loads.append(hashes)
+        return await load_blobs(hashes)
+
+    monkeypatch.setattr(blobs, "load_blobs", counting_load)
+
+    async def scenario():
+        row = await save_row("full body " * 100)
+        listed = await auth.get_content_history("u1")
+        assert listed[0]["content"] is None and listed[0]["preview"]
+        assert loads == []
+        item = await auth.get_content_history_item("u1", row["id"])
+        assert item["content"] == "full body " * 100
+
+    asyncio.run(scenario())
+
+
+def test_shared_blob_is_kept_until_its_last_row_is_deleted(store, save_row):
+    async def scenario():
+        first = await save_row("same body")
+        second = await save_row("same body")
+        digest = first["content_hash"]
+
+        await store.delete_history("u1", first["id"])
+        await blobs.release_blobs([digest])
+        assert await store.get_blobs([digest])
+
+        await store.delete_history("u1", second["id"])
+        await blobs.release_blobs([digest])
+        assert await store.get_blobs([digest]) == []
+
+    asyncio.run(scenario())
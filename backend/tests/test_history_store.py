@@ -0,0 +1,54 @@
+import asyncio
+import sqlite3
+
+from app.services.history_store import SQLiteHistoryStore
+
+
+def _row(user_id: str = "u1") -> dict:
+    return {"user_id": user_id, "format": "BLOG", "original_title": "t", "content": "body"}
+
+
+def test_writer_survives_a_locked_database(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = SQLiteHistoryStore(path, busy_timeout=0.2)
+    blocker = sqlite3.connect(path, isolation_level=None)
+
+    async def scenario():
+        blocker.execute("BEGIN IMMEDIATE")
+        try:
+            await store.insert_history(_row())
+        except sqlite3.OperationalError as e:
+            assert "locked" in str(e)
+        else:
+            raise AssertionError("insert should fail while another connection holds the write lock")
+        finally:
+            blocker.execute("ROLLBACK")
+
+        assert store._writer.is_alive()
+        saved = await store.insert_history(_row())
+        assert await store.get_history("u1", saved["id"]) is not None
+        assert await store.delete_history("u1", saved["id"])
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        blocker.close()
+        store.close()
+
+
+def test_failing_write_does_not_undo_its_batch(tmp_path):
+    store = SQLiteHistoryStore(str(tmp_path / "history.db"))
+
+    async def scenario():
+        good, bad = await asyncio.gather(
+            store.insert_history(_row()),
+            store.insert_history({"user_id": "u1", "format": None}),
+            return_exceptions=True,
+        )
+        assert isinstance(bad, sqlite3.IntegrityError)
+        assert await store.get_history("u1", good["id"]) is not None
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        store.close()
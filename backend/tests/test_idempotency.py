@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.services import idempotency
+from app.services.idempotency import run_idempotent
+from app.services.shared_state import get_shared_store
+
+
+def test_concurrent_duplicates_share_one_run():
+    calls = []
+
+    async def run():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"content": "once"}
+
+    async def scenario():
+        results = await asyncio.gather(*(
+            run_idempotent("generate", "same-worker", "u1", "fp", run) for _ in range(3)
+        ))
+        assert [r[0] for r in results] == [{"content": "once"}] * 3
+        assert sorted(r[1] for r in results) == [False, True, True]
+        assert await run_idempotent("generate", "same-worker", "u1", "fp", run) == ({"content": "once"}, True)
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_duplicate_on_another_worker_waits_for_the_stored_response():
+    async def never():
+        raise AssertionError("the duplicate must not run")
+
+    async def scenario():
+        store = get_shared_store()
+        key = idempotency._store_key("generate", "u1", "cross-worker")
+        # Claimed by another process: nothing in this worker's _inflight
+        store.set(idempotency._NAMESPACE, key, {"state": "pending", "fingerprint": "fp", "claim": "other"}, 60)
+
+        async def finish():
+            await asyncio.sleep(0.3)
+            store.set(idempotency._NAMESPACE, key, {"state": "done", "fingerprint": "fp", "response": {"a": 1}}, 60)
+
+        finisher = asyncio.ensure_future(finish())
+        assert await run_idempotent("generate", "cross-worker", "u1", "fp", never) == ({"a": 1}, True)
+        await finisher
+
+    asyncio.run(scenario())
+
+
+def test_key_reused_for_a_different_request_is_rejected():
+    async def run():
+        return {"content": "first"}
+
+    async def scenario():
+        await run_idempotent("generate", "mismatch", "u1", "fp-1", run)
+        with pytest.raises(HTTPException) as error:
+            await run_idempotent("generate", "mismatch", "u1", "fp-2", run)
+        assert error.value.status_code == 422
+
+    asyncio.run(scenario())
+
+
+def test_failed_run_releases_the_key():
+    async def fail():
+        raise RuntimeError("model down")
+
+    async def succeed():
+        return {"content": "retry"}
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await run_idempotent("generate", "failure", "u1", "fp", fail)
+        assert get_shared_store().get(idempotency._NAMESPACE, idempotency._store_key("generate", "u1", "failure")) is None
+        assert await run_idempotent("generate", "failure", "u1", "fp", succeed) == ({"content": "retry"}, False)
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_retry_saves_each_format_once(monkeypatch):
+    import httpx
+
+    from app.main import app
+    from app.routers import content
+    from app.schemas import UserResponse
+    from app.services import get_current_user
+
+    saved = []
+    attempts = {"LINKEDIN": 0}
+
+    async def generate(request, format):
+        if format.value == "LINKEDIN":
+            attempts["LINKEDIN"] += 1
+            if attempts["LINKEDIN"] == 1:
+                raise RuntimeError("model down")
+        return f"{format.value} post"
+
+    async def save(user_id, format, content, original_title=None):
+        saved.append(format)
+        return {"id": f"row-{format}"}
+
+    monkeypatch.setattr(content, "generate_platform_content", generate)
+    monkeypatch.setattr(content, "save_content_history", save)
+    monkeypatch.setattr(content, "schedule_prefetch", lambda *args: None)
+    app.dependency_overrides[get_current_user] = lambda: UserResponse(id="batch-user", email="", created_at=None)
+
+    body = {
+        "sourceText": "source",
+        "inputType": "TEXT",
+        "selectedFormats": ["BLOG", "LINKEDIN"],
+        "brandVoice": {"name": "b", "tone": "t", "audience": "a", "keywords": []},
+    }
+    headers = {"Idempotency-Key": "batch-retry"}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            failed = await client.post("/api/content/generate-batch", json=body, headers=headers)
+            assert failed.status_code == 500
+            assert saved == []
+            retried = await client.post("/api/content/generate-batch", json=body, headers=headers)
+            assert retried.status_code == 200
+            replayed = await client.post("/api/content/generate-batch", json=body, headers=headers)
+            assert replayed.headers["Idempotent-Replayed"] == "true"
+        assert saved == ["BLOG", "LINKEDIN"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_eviction_keeps_pending_claims(monkeypatch):
+    monkeypatch.setattr(get_settings(), "idempotency_max_entries", 2)
+
+    async def run():
+        return {"content": "new"}
+
+    async def scenario():
+        store = get_shared_store()
+        for key in store.oldest_keys(idempotency._NAMESPACE, 10000):
+            store.delete(idempotency._NAMESPACE, key)
+        pending = idempotency._store_key("generate", "u1", "still-running")
+        done = idempotency._store_key("generate", "u1", "finished")
+        store.set(idempotency._NAMESPACE, pending, {"state": "pending", "fingerprint": "fp", "claim": "other"}, 60)
+        store.set(idempotency._NAMESPACE, done, {"state": "done", "fingerprint": "fp", "response": {}}, 60)
+        await run_idempotent("generate", "newest", "u1", "fp", run)
+        assert store.get(idempotency._NAMESPACE, pending) is not None
+        assert store.get(idempotency._NAMESPACE, done) is None
+        assert store.count(idempotency._NAMESPACE) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.config import get_settings
+from app.services import auth, search, usage_stats
+
+
+@pytest.fixture
+def local_setup(store, tmp_path, monkeypatch):
+    """HISTORY_BACKEND=sqlite with LOCAL_USER_ID, Supabase unconfigured, SEARCH_BACKEND left at its default."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "history_backend", "sqlite")
+    monkeypatch.setattr(settings, "local_user_id", "u1")
+    monkeypatch.setattr(settings, "search_backend", "postgres")
+    monkeypatch.setattr(settings, "search_index_path", str(tmp_path / "search.db"))
+    monkeypatch.setattr(settings, "supabase_url", None)
+    monkeypatch.setattr(search, "_connection", None)
+    yield store
+    if search._connection is not None:
+        search._connection.close()
+
+
+def test_save_and_search_without_supabase(local_setup):
+    async def scenario():
+        row = await auth.save_content_history("u1", "BLOG", "Offline posts about gardening.")
+        assert row["id"]
+        found = await search.search_content_history("u1", "gardening")
+        assert [r["id"] for r in found["results"]] == [row["id"]]
+
+    asyncio.run(scenario())
+
+
+def test_save_survives_a_failing_secondary_step(local_setup, monkeypatch):
+    async def broken(row):
+        raise RuntimeError("aggregate store down")
+
+    monkeypatch.setattr(auth, "record_usage", broken)
+    monkeypatch.setattr(auth, "index_content_history", broken)
+
+    async def scenario():
+        row = await auth.save_content_history("u1", "BLOG", "Saved despite the failures.")
+        assert await auth.get_content_history_item("u1", row["id"])
+
+    asyncio.run(scenario())
+
+
+def test_psychology_scores_are_saved_on_the_history_item(local_setup, monkeypatch):
+    import httpx
+
+    from app.main import app
+    from app.routers import content
+
+    async def analyze(text):
+        return {"toneScore": 8, "viralityScore": 6, "readingLevel": "easy", "triggers": [],
+                "structuralTension": 4, "explanation": "fine"}
+
+    async def not_prefetched(kind, text):
+        return None
+
+    monkeypatch.setattr(content, "analyze_content_psychology", analyze)
+    monkeypatch.setattr(content, "get_prefetched", not_prefetched)
+
+    async def scenario():
+        row = await auth.save_content_history("u1", "BLOG", "A post worth scoring.")
+        assert (await usage_stats.get_usage_stats("u1"))["averagePsychology"] is None
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            scored = await client.post(
+                "/api/content/psychology", json={"content": "A post worth scoring.", "historyId": row["id"]}
+            )
+            assert scored.status_code == 200
+            missing = await client.post(
+                "/api/content/psychology", json={"content": "Anything.", "historyId": "no-such-row"}
+            )
+            assert missing.status_code == 404
+        saved = await auth.get_content_history_item("u1", row["id"])
+        assert saved["psychology"]["viralityScore"] == 6
+        average = (await usage_stats.get_usage_stats("u1"))["averagePsychology"]
+        assert average == {"toneScore": 8, "viralityScore": 6, "structuralTension": 4}
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import get_settings
+from app.main import app
+from app.services import prefetch
+from app.services.shared_state import get_shared_store
+
+
+def _get(path: str, headers: dict = None) -> httpx.Response:
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers or {})
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("path", ["/api/content/prefetch/stats", "/api/content/scheduler/stats"])
+def test_stats_need_the_operator_token(monkeypatch, path):
+    monkeypatch.setattr(get_settings(), "profile_token", None)
+    assert _get(path, {"X-Admin-Token": "anything"}).status_code == 403
+
+    monkeypatch.setattr(get_settings(), "profile_token", "secret")
+    assert _get(path).status_code == 403
+    assert _get(path, {"X-Admin-Token": "wrong"}).status_code == 403
+    assert _get(path, {"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_prefetch_counts_are_flushed_in_batches(monkeypatch):
+    monkeypatch.setattr(get_settings(), "prefetch_stats_flush_seconds", 3600)
+    store = get_shared_store()
+
+    def stored() -> int:
+        entry = store.get(prefetch._STATS_NAMESPACE, "misses")
+        return int(entry.value) if entry else 0
+
+    before = stored()
+
+    async def scenario():
+        for _ in range(5):
+            prefetch._count("misses")
+
+    asyncio.run(scenario())
+    assert stored() == before
+    assert asyncio.run(prefetch.get_prefetch_stats())["misses"] == before + 5
+    prefetch.flush_prefetch_stats()
+    assert stored() == before + 5
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from app.config import get_settings
+from app.services import search
+
+
+@pytest.fixture
+def sqlite_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "search_backend", "sqlite")
+    monkeypatch.setattr(get_settings(), "search_index_path", str(tmp_path / "search.db"))
+    monkeypatch.setattr(get_settings(), "history_export_page_size", 2)
+    monkeypatch.setattr(search, "_connection", None)
+    yield
+    if search._connection is not None:
+        search._connection.close()
+
+
+def test_first_search_indexes_rows_saved_before_the_index(sqlite_search, save_row):
+    async def scenario():
+        for topic in ("rust ownership", "python typing", "rust lifetimes"):
+            text = f"A short post about {topic}."
+            await save_row(text, "old-user")
+        found = await search.search_content_history("old-user", "rust")
+        assert found["total"] == 2
+        # Already backfilled: a second search does not page the history again
+        assert search._is_backfilled("old-user")
+        assert (await search.search_content_history("old-user", "python"))["total"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,36 @@
+import asyncio
+import types
+
+import pytest
+
+from app.services import gemini
+from app.services.scheduler import get_model_scheduler
+
+
+class _StreamingModels:
+    async def generate_content_stream(self, **kwargs):
+        async def chunks():
+            for i in range(100):
+                await asyncio.sleep(0)
+                yield types.SimpleNamespace(text=f"chunk{i} ", usage_metadata=None)
+        return chunks()
+
+
+def test_failed_consumer_releases_the_scheduler_slot(monkeypatch):
+    monkeypatch.setattr(gemini, "_get_client", lambda: types.SimpleNamespace(
+        aio=types.SimpleNamespace(models=_StreamingModels())
+    ))
+
+    async def closed_socket(text):
+        raise ConnectionError("websocket closed")
+
+    async def scenario():
+        scheduler = get_model_scheduler()
+        with pytest.raises(ConnectionError):
+            await gemini.modify_selection(
+                "old text", "rewrite", full_context="old text", on_chunk=closed_socket
+            )
+        # Checked before control returns to the loop, which would finalize a leaked generator
+        assert scheduler.inflight == 0
+
+    asyncio.run(scenario())
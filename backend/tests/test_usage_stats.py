@@ -0,0 +1,19 @@
+import asyncio
+
+from app.config import get_settings
+from app.services import usage_stats
+
+
+def test_rebuild_pages_through_the_whole_history(save_row, monkeypatch):
+    monkeypatch.setattr(get_settings(), "history_export_page_size", 2)
+
+    async def scenario():
+        for i in range(5):
+            text = f"post number {i} " * 3
+            await save_row(text, "rebuild-user", "BLOG" if i % 2 else "TWITTER")
+        stats = await usage_stats.get_usage_stats("rebuild-user")
+        assert stats["totalGenerations"] == 5
+        assert stats["totalWords"] == 5 * 9
+        assert {f["format"]: f["count"] for f in stats["formats"]} == {"BLOG": 2, "TWITTER": 3}
+
+    asyncio.run(scenario())
@@ -1,6 +1,7 @@
 import React, { useState, useCallback, useEffect, useRef } from 'react';
 import { ContentFormat, InputType, BrandVoice, GeneratedContent, PsychologyAnalysis, ContentStrategy } from '../types';
-import { generatePlatformContent, modifyContent, analyzeContentPsychology, generateContentStrategy, generateMarketingImage } from '../services/api';
+import { generatePlatformResult, modifyContent, analyzeContentPsychology, generateContentStrategy, generateMarketingImage } from '../services/api';
+import { ChannelCancelledError, EditorChannel } from '../services/editorChannel';
 import { Upload, FileText, CheckCircle, AlertCircle, Loader2, Copy, Twitter, Linkedin, Mail, AlignLeft, Search, Clock, Sliders, RefreshCw, ChevronDown, FileJson, FileType, HardDrive, Cloud, Sparkles, MoreVertical, Wand2, Edit3, Send, BrainCircuit, Image as ImageIcon, Calendar, Microscope, LayoutTemplate, PenTool } from 'lucide-react';
 import { AntIcon } from './Layout';
 
@@ -38,7 +39,7 @@ const ContentCreator: React.FC<Props> = ({ brandVoice, onContentGenerated, showT
   const [selectedFormats, setSelectedFormats] = useState<ContentFormat[]>([]);
   const [seoKeywords, setSeoKeywords] = useState('');
   const [isGenerating, setIsGenerating] = useState(false);
-  const [results, setResults] = useState<{ format: ContentFormat; content: string; psychology?: PsychologyAnalysis; imageUrl?: string }[]>([]);
+  const [results, setResults] = useState<{ format: ContentFormat; content: string; historyId?: string; psychology?: PsychologyAnalysis; imageUrl?: string }[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [activeResultIndex, setActiveResultIndex] = useState(0);
 
@@ -63,6 +64,9 @@ const ContentCreator: React.FC<Props> = ({ brandVoice, onContentGenerated, showT
   const [modificationPrompt, setModificationPrompt] = useState('');
   const [isModifying, setIsModifying] = useState(false);
   const selectionRef = useRef<HTMLDivElement>(null);
+  // One socket per editor; the document it holds server-side and that document's version
+  const channelRef = useRef<EditorChannel | null>(null);
+  const channelDocRef = useRef<{ content: string; version: number } | null>(null);
   const resultsContainerRef = useRef<HTMLDivElement>(null);
   const textareaRef = useRef<HTMLTextAreaElement>(null);
 
@@ -96,6 +100,10 @@ const ContentCreator: React.FC<Props> = ({ brandVoice, onContentGenerated, showT
     return () => document.removeEventListener('mousedown', handleClickOutside);
   }, [activeDropdown, selection]);
 
+  useEffect(() => {
+    return () => channelRef.current?.close();
+  }, []);
+
   useEffect(() => {
     if (isGenerating) {
       setProgressStep(0);
@@ -187,7 +195,7 @@ const ContentCreator: React.FC<Props> = ({ brandVoice, onContentGenerated, showT
 
     try {
       const promises = selectedFormats.map(async (format) => {
-        const content = await generatePlatformContent({
+        const { content, historyId } = await generatePlatformResult({
           sourceText,
           sourceFile: sourceFile || undefined,
           inputType,
@@ -197,11 +205,11 @@ const ContentCreator: React.FC<Props> = ({ brandVoice, onContentGenerated, showT
           seoKeywords: seoKeywords ? seoKeywords.split(',').map(s => s.trim()).filter(s => s) : undefined,
           toneOverride: toneOverride || undefined
         }, format);
-        return { format, content, success: true };
+        return { format, content, historyId, success: true };
       });
 
       const rawResults = await Promise.all(promises);
-      const finalResults = rawResults.map(r => ({ format: r.format, content: r.content }));
+      const finalResults = rawResults.map(r => ({ format: r.format, content: r.content, historyId: r.historyId }));
 
       rawResults.forEach(r => {
         if (r.success) {
@@ -234,7 +242,7 @@ const ContentCreator: React.FC<Props> = ({ brandVoice, onContentGenerated, showT
     }
     setIsAnalyzing(true);
     try {
-      const analysis = await analyzeContentPsychology(results[activeResultIndex].content);
+      const analysis = await analyzeContentPsychology(results[activeResultIndex].content, results[activeResultIndex].historyId);
       setResults(prev => prev.map((r, i) => i === activeResultIndex ? { ...r, psychology: analysis } : r));
       setResultTab('PSYCHOLOGY');
     } catch (e) {
@@ -304,20 +312,63 @@ const ContentCreator: React.FC<Props> = ({ brandVoice, onContentGenerated, showT
     setIsModifying(true);
     const { text, resultIndex, start, end } = selection;
     const currentFullContent = results[resultIndex].content;
+    const splice = (replacement: string) =>
+      currentFullContent.substring(0, start) + replacement + currentFullContent.substring(end);
+    const showContent = (content: string) =>
+      setResults(prev => prev.map((r, i) => i === resultIndex ? { ...r, content } : r));
     try {
-      const newText = await modifyContent(currentFullContent, text, modificationPrompt);
-      const updatedContent = currentFullContent.substring(0, start) + newText + currentFullContent.substring(end);
-      setResults(prev => prev.map((r, i) => i === resultIndex ? { ...r, content: updatedContent } : r));
+      let newText: string;
+      try {
+        newText = await modifyOverChannel(currentFullContent, start, end, modificationPrompt, (partial) => showContent(splice(partial)));
+      } catch (err) {
+        if (err instanceof ChannelCancelledError) throw err;
+        // Socket unavailable (proxy, old backend): one-shot REST call instead
+        channelDocRef.current = null;
+        newText = await modifyContent(currentFullContent, text, modificationPrompt);
+      }
+      showContent(splice(newText));
       showToast("Task re-assigned", 'success');
       setSelection(null);
       setModificationPrompt('');
     } catch (err) {
-      showToast("Refinement failed", 'error');
+      if (!(err instanceof ChannelCancelledError)) {
+        showContent(currentFullContent);
+        showToast("Refinement failed", 'error');
+      }
     } finally {
       setIsModifying(false);
     }
   };
 
+  /** Modify a range through the editor channel, streaming the replacement as it arrives */
+  const modifyOverChannel = async (
+    content: string,
+    start: number,
+    end: number,
+    instruction: string,
+    onPartial: (replacement: string) => void
+  ): Promise<string> => {
+    if (!channelRef.current) channelRef.current = new EditorChannel();
+    const channel = channelRef.current;
+    // The document is uploaded once and only again after local edits or a tab switch
+    let doc = channelDocRef.current;
+    if (doc?.content !== content) {
+      const opened = await channel.openDocument(content);
+      doc = { content, version: opened.version };
+      channelDocRef.current = doc;
+    }
+    let partial = '';
+    const result = await channel.modifyRange(start, end, instruction, doc.version, (chunk) => {
+      partial += chunk;
+      onPartial(partial);
+    });
+    channelDocRef.current = {
+      content: content.substring(0, start) + result.replacement + content.substring(end),
+      version: result.version,
+    };
+    return result.replacement;
+  };
+
   const activeRes = results[activeResultIndex];
 
   return (
@@ -1,17 +1,8 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Cell } from 'recharts';
 import { Activity, TrendingUp, Zap, FileText, ArrowRight, PenTool, Hash, Linkedin, Mail, Sparkles } from 'lucide-react';
-import { GeneratedContent } from '../types';
-
-const data = [
-  { name: 'Mon', words: 4000 },
-  { name: 'Tue', words: 3000 },
-  { name: 'Wed', words: 2000 },
-  { name: 'Thu', words: 2780 },
-  { name: 'Fri', words: 1890 },
-  { name: 'Sat', words: 2390 },
-  { name: 'Sun', words: 3490 },
-];
+import { GeneratedContent, UsageStats } from '../types';
+import { getUsageStats } from '../services/api';
 
 interface Props {
   history: GeneratedContent[];
@@ -19,9 +10,21 @@ interface Props {
 }
 
 const Dashboard: React.FC<Props> = ({ history, onNavigate }) => {
-  const totalGenerations = history.length;
+  const [stats, setStats] = useState<UsageStats | null>(null);
+
+  // Aggregates are kept server-side; refetch when the history changes
+  useEffect(() => {
+    getUsageStats(7).then(setStats).catch(() => setStats(null));
+  }, [history.length]);
+
+  const totalGenerations = stats ? stats.totalGenerations : history.length;
   const recentGenerations = history.slice(0, 3);
-  const totalWords = history.reduce((acc, curr) => acc + curr.content.split(/\s+/).length, 0);
+  const totalWords = stats ? stats.totalWords : history.reduce((acc, curr) => acc + curr.content.split(/\s+/).length, 0);
+  const averageVirality = stats?.averagePsychology?.viralityScore;
+  const data = (stats?.daily || []).map(day => ({
+    name: new Date(`${day.date}T00:00:00`).toLocaleDateString(undefined, { weekday: 'short' }),
+    words: day.words,
+  }));
 
   const StatCard = ({ title, value, subtext, icon: Icon, colorClass, delay }: any) => (
     <div className={`glass p-6 rounded-3xl transition-all duration-300 hover:-translate-y-1 hover:shadow-xl hover:border-white/80 dark:hover:border-slate-700 animate-in fade-in slide-in-from-bottom-4 ${delay}`}>
@@ -89,8 +92,8 @@ const Dashboard: React.FC<Props> = ({ history, onNavigate }) => {
         />
         <StatCard 
           title="Avg. Quality" 
-          value="9.8" 
-          subtext="AI Score / 10" 
+          value={averageVirality !== undefined ? averageVirality.toFixed(1) : '—'} 
+          subtext="Avg. virality score" 
           icon={Activity} 
           colorClass="bg-violet-500 text-violet-600"
           delay="delay-300"
@@ -147,10 +150,9 @@ const Dashboard: React.FC<Props> = ({ history, onNavigate }) => {
         <div className="lg:col-span-2 bg-white dark:bg-slate-900 p-8 rounded-3xl border border-slate-100 dark:border-slate-800 shadow-sm min-h-[400px] hover:shadow-lg transition-shadow duration-300">
           <div className="flex items-center justify-between mb-8">
             <h3 className="text-xl font-bold text-slate-900 dark:text-white">Word Count Activity</h3>
-            <select className="bg-slate-50 dark:bg-slate-800 border border-slate-200 dark:border-slate-700 text-slate-600 dark:text-slate-300 text-xs font-bold rounded-lg px-3 py-1.5 outline-none focus:ring-2 focus:ring-blue-500/50">
-              <option>This Week</option>
-              <option>Last Week</option>
-            </select>
+            <span className="bg-slate-50 dark:bg-slate-800 border border-slate-200 dark:border-slate-700 text-slate-600 dark:text-slate-300 text-xs font-bold rounded-lg px-3 py-1.5">
+              Last 7 Days
+            </span>
           </div>
           <ResponsiveContainer width="100%" height={300}>
             <BarChart data={data}>
@@ -23,7 +23,12 @@ import {
     SEOGapAnalysis,
     BacklinkStrategy,
     LocalSEO,
-    ContentRequest
+    ContentRequest,
+    ThreadTweet,
+    DocumentSection,
+    SourceExtraction,
+    SourceSummary,
+    UsageStats
 } from '../types';
 
 
@@ -60,25 +65,49 @@ async function apiRequest<T>(
 
 // ============== CONTENT GENERATION ==============
 
-export const generatePlatformContent = async (
+export const generatePlatformResult = async (
     request: ContentRequest,
-    format: ContentFormat
-): Promise<string> => {
-    const result = await apiRequest<{ content: string }>('/api/content/generate', {
+    format: ContentFormat,
+    idempotencyKey?: string
+): Promise<GenerationResult> => {
+    return apiRequest<GenerationResult>('/api/content/generate', {
         method: 'POST',
         body: JSON.stringify({ ...request, format }),
+        headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
     });
+};
+
+export const generatePlatformContent = async (
+    request: ContentRequest,
+    format: ContentFormat,
+    idempotencyKey?: string
+): Promise<string> => {
+    const result = await generatePlatformResult(request, format, idempotencyKey);
     return result.content;
 };
 
+export interface GenerationResult {
+    format: ContentFormat;
+    content: string;
+    // Set when the result was saved to the signed-in user's history
+    historyId?: string;
+    thread?: ThreadTweet[];
+    documentId?: string;
+    sections?: DocumentSection[];
+    sourceExtraction?: SourceExtraction;
+    variants?: { content: string; score: number }[];
+}
+
 export const generateContentBatch = async (
-    request: ContentRequest
-): Promise<{ format: ContentFormat; content: string }[]> => {
-    const result = await apiRequest<{ results: { format: ContentFormat; content: string }[] }>(
+    request: ContentRequest,
+    idempotencyKey?: string
+): Promise<GenerationResult[]> => {
+    const result = await apiRequest<{ results: GenerationResult[] }>(
         '/api/content/generate-batch',
         {
             method: 'POST',
             body: JSON.stringify(request),
+            headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
         }
     );
     return result.results;
@@ -96,21 +125,73 @@ export const modifyContent = async (
     return result.content;
 };
 
-export const analyzeContentPsychology = async (
+export const createEditorSession = async (
     content: string
+): Promise<{ sessionId: string; version: number }> => {
+    return apiRequest<{ sessionId: string; version: number }>('/api/content/sessions', {
+        method: 'POST',
+        body: JSON.stringify({ content }),
+    });
+};
+
+export const modifyInSession = async (
+    sessionId: string,
+    start: number,
+    end: number,
+    instruction: string,
+    baseVersion: number
+): Promise<{ replacement: string; start: number; end: number; version: number }> => {
+    return apiRequest(`/api/content/sessions/${sessionId}/modify`, {
+        method: 'POST',
+        body: JSON.stringify({ start, end, instruction, baseVersion }),
+    });
+};
+
+export const closeEditorSession = async (sessionId: string): Promise<void> => {
+    await apiRequest<{ success: boolean }>(`/api/content/sessions/${sessionId}`, {
+        method: 'DELETE',
+    });
+};
+
+export const regenerateSections = async (
+    documentId: string,
+    request: ContentRequest,
+    sections?: number[],
+    sectionInstructions?: Record<number, string>
+): Promise<{ content: string; sections: DocumentSection[]; regenerated: number[] }> => {
+    return apiRequest('/api/content/regenerate', {
+        method: 'POST',
+        body: JSON.stringify({ documentId, request, sections, sectionInstructions }),
+    });
+};
+
+export const analyzeContentPsychology = async (
+    content: string,
+    historyId?: string
 ): Promise<PsychologyAnalysis> => {
     return apiRequest<PsychologyAnalysis>('/api/content/psychology', {
         method: 'POST',
-        body: JSON.stringify({ content }),
+        body: JSON.stringify({ content, historyId }),
     });
 };
 
 export const generateContentStrategy = async (
-    topic: string
+    topic: string,
+    useSummary = false
 ): Promise<ContentStrategy> => {
     return apiRequest<ContentStrategy>('/api/content/strategy', {
         method: 'POST',
-        body: JSON.stringify({ topic }),
+        body: JSON.stringify({ topic, useSummary }),
+    });
+};
+
+export const summarizeSource = async (
+    sourceText: string,
+    sourceFile?: ContentRequest['sourceFile']
+): Promise<SourceSummary> => {
+    return apiRequest<SourceSummary>('/api/content/summary', {
+        method: 'POST',
+        body: JSON.stringify({ sourceText, sourceFile }),
     });
 };
 
@@ -131,6 +212,40 @@ export const getContentHistory = async (): Promise<any[]> => {
     return apiRequest<any[]>('/api/content/history');
 };
 
+export const exportContentHistory = async (
+    format: 'ndjson' | 'markdown' = 'ndjson',
+    cursor?: string
+): Promise<Blob> => {
+    const token = localStorage.getItem('supabase_token');
+    const params = new URLSearchParams({ format });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${API_URL}/api/content/history/export?${params}`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    if (!response.ok) {
+        const error = await response.json().catch(() => ({ detail: 'Export failed' }));
+        throw new Error(error.detail || `HTTP ${response.status}`);
+    }
+    return response.blob();
+};
+
+export const getUsageStats = async (days = 7): Promise<UsageStats> => {
+    return apiRequest<UsageStats>(`/api/content/stats?days=${days}`);
+};
+
+export const searchContentHistory = async (
+    query: string,
+    options: { formats?: ContentFormat[]; dateFrom?: string; dateTo?: string; page?: number; pageSize?: number } = {}
+): Promise<{ results: any[]; total: number; page: number; page_size: number }> => {
+    const params = new URLSearchParams({ q: query });
+    options.formats?.forEach((format) => params.append('format', format));
+    if (options.dateFrom) params.set('date_from', options.dateFrom);
+    if (options.dateTo) params.set('date_to', options.dateTo);
+    if (options.page) params.set('page', String(options.page));
+    if (options.pageSize) params.set('page_size', String(options.pageSize));
+    return apiRequest(`/api/content/history/search?${params.toString()}`);
+};
+
 export const deleteContentHistory = async (contentId: string): Promise<void> => {
     await apiRequest<{ success: boolean }>(`/api/content/history/${contentId}`, {
         method: 'DELETE',
@@ -143,11 +258,13 @@ export const deleteContentHistory = async (contentId: string): Promise<void> =>
 export const generateContextualHooks = async (
     context: string,
     platform: string,
-    frameworks: string[]
+    frameworks: string[],
+    useSummary = false,
+    variants?: number
 ): Promise<HookSuggestion[]> => {
     return apiRequest<HookSuggestion[]>('/api/tools/hooks', {
         method: 'POST',
-        body: JSON.stringify({ context, platform, frameworks }),
+        body: JSON.stringify({ context, platform, frameworks, useSummary, variants }),
     });
 };
 
@@ -231,11 +348,12 @@ export const performSEOAudit = async (
 
 export const generateSEOMetaTags = async (
     content: string,
-    keyword: string
+    keyword: string,
+    useSummary = false
 ): Promise<SEOMeta[]> => {
     return apiRequest<SEOMeta[]>('/api/seo/meta', {
         method: 'POST',
-        body: JSON.stringify({ content, keyword }),
+        body: JSON.stringify({ content, keyword, useSummary }),
     });
 };
 
@@ -0,0 +1,146 @@
+/**
+ * ContANT AI - Editor Channel
+ * One WebSocket per editor: authenticates once, then multiplexes requests by id,
+ * streams modify output and cancels superseded requests (see /api/content/ws).
+ */
+
+import { NarrativePoint, PsychologyAnalysis, SEOAudit } from '../types';
+
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+const WS_URL = `${API_URL.replace(/^http/, 'ws')}/api/content/ws`;
+
+type ServerFrame =
+    | { type: 'ready'; user: string | null }
+    | { type: 'chunk'; id: string; text: string }
+    | { type: 'result'; id: string; data: any }
+    | { type: 'error'; id: string | null; status: number; detail: any }
+    | { type: 'cancelled'; id: string };
+
+interface Pending {
+    resolve: (data: any) => void;
+    reject: (error: Error) => void;
+    onChunk?: (text: string) => void;
+}
+
+interface RequestOptions {
+    /** A new request with the same key cancels the previous one still running */
+    key?: string;
+    onChunk?: (text: string) => void;
+}
+
+export class ChannelCancelledError extends Error {
+    constructor() {
+        super('Request was cancelled');
+        this.name = 'ChannelCancelledError';
+    }
+}
+
+export class EditorChannel {
+    private socket: WebSocket | null = null;
+    private ready: Promise<void> | null = null;
+    private pending = new Map<string, Pending>();
+    private nextId = 0;
+
+    connect(): Promise<void> {
+        if (this.ready) return this.ready;
+        this.ready = new Promise((resolve, reject) => {
+            const socket = new WebSocket(WS_URL);
+            this.socket = socket;
+            socket.onopen = () => {
+                const token = localStorage.getItem('supabase_token');
+                socket.send(JSON.stringify({ type: 'auth', token }));
+            };
+            socket.onmessage = (event) => {
+                const frame: ServerFrame = JSON.parse(event.data);
+                if (frame.type === 'ready') {
+                    resolve();
+                } else if (frame.type === 'error' && frame.id === null) {
+                    reject(new Error(frame.detail));
+                } else {
+                    this.handle(frame);
+                }
+            };
+            socket.onclose = () => {
+                reject(new Error('Editor channel closed'));
+                this.pending.forEach((p) => p.reject(new Error('Editor channel closed')));
+                this.pending.clear();
+                this.socket = null;
+                this.ready = null;
+            };
+        });
+        return this.ready;
+    }
+
+    close(): void {
+        this.socket?.close();
+    }
+
+    private handle(frame: ServerFrame): void {
+        if (frame.type === 'ready' || frame.id === null) return;
+        const pending = this.pending.get(frame.id);
+        if (!pending) return;
+        if (frame.type === 'chunk') {
+            pending.onChunk?.(frame.text);
+            return;
+        }
+        this.pending.delete(frame.id);
+        if (frame.type === 'result') {
+            pending.resolve(frame.data);
+        } else if (frame.type === 'cancelled') {
+            pending.reject(new ChannelCancelledError());
+        } else {
+            const detail = typeof frame.detail === 'string' ? frame.detail : JSON.stringify(frame.detail);
+            pending.reject(new Error(detail || `HTTP ${frame.status}`));
+        }
+    }
+
+    async request<T>(op: string, params: Record<string, unknown>, options: RequestOptions = {}): Promise<T> {
+        await this.connect();
+        const id = String(++this.nextId);
+        return new Promise<T>((resolve, reject) => {
+            this.pending.set(id, { resolve, reject, onChunk: options.onChunk });
+            this.socket!.send(JSON.stringify({
+                type: 'request',
+                id,
+                op,
+                params,
+                key: options.key,
+                stream: Boolean(options.onChunk),
+            }));
+        });
+    }
+
+    cancel(id: string): void {
+        this.socket?.send(JSON.stringify({ type: 'cancel', id }));
+    }
+
+    // ============== OPERATIONS ==============
+
+    /** Upload the document once; later calls default to it */
+    openDocument(content: string): Promise<{ sessionId: string; version: number }> {
+        return this.request('document', { content });
+    }
+
+    modifyRange(
+        start: number,
+        end: number,
+        instruction: string,
+        baseVersion: number,
+        onChunk?: (text: string) => void
+    ): Promise<{ replacement: string; start: number; end: number; version: number }> {
+        return this.request('modify', { start, end, instruction, baseVersion }, { key: 'modify', onChunk });
+    }
+
+    analyzePsychology(content?: string): Promise<PsychologyAnalysis> {
+        return this.request('psychology', content === undefined ? {} : { content }, { key: 'psychology' });
+    }
+
+    analyzeNarrative(content?: string): Promise<NarrativePoint[]> {
+        return this.request('narrative', content === undefined ? {} : { content }, { key: 'narrative' });
+    }
+
+    auditSEO(targetKeyword: string, content?: string): Promise<SEOAudit> {
+        const params = content === undefined ? { targetKeyword } : { content, targetKeyword };
+        return this.request('seo_audit', params, { key: 'seo_audit' });
+    }
+}
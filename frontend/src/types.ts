@@ -28,6 +28,42 @@ export interface GeneratedContent {
   imageUrl?: string;
 }
 
+export interface SourceExtraction {
+  kind: 'pdf' | 'html' | 'docx' | 'markdown' | 'text';
+  rawTokens: number;
+  tokens: number;
+  reduction: number;
+  sentAs: 'text' | 'file';
+}
+
+export interface SourceSummary {
+  sourceKey: string;
+  outline: string[];
+  keyPoints: string[];
+  sourceTokens: number;
+  tokens: number;
+}
+
+export interface UsageStats {
+  totalGenerations: number;
+  totalWords: number;
+  formats: { format: string; count: number; words: number }[];
+  averagePsychology: Pick<PsychologyAnalysis, 'toneScore' | 'viralityScore' | 'structuralTension'> | null;
+  daily: { date: string; count: number; words: number }[];
+}
+
+export interface ThreadTweet {
+  text: string;
+  length: number;
+  limit: number;
+}
+
+export interface DocumentSection {
+  index: number;
+  heading: string;
+  fingerprint: string;
+}
+
 export interface ContentRequest {
   sourceText: string;
   sourceFile?: {
@@ -41,6 +77,8 @@ export interface ContentRequest {
   customInstructions?: string;
   seoKeywords?: string[];
   toneOverride?: string;
+  useSummary?: boolean;
+  variants?: number;
 }
 
 export interface ToastMessage {